@@ -0,0 +1,323 @@
+import argparse
+import atexit
+import bisect
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+
+import pyarrow as pa
+import pyarrow.ipc as ipc
+
+# ---------- ATTEMPT LOG ----------
+# Every answer attempt is appended to an Arrow IPC event log. Each process
+# writes its own segment files; a segment is written as "<name>.arrow.open"
+# and renamed to "<name>.arrow" once sealed, and only sealed segments are
+# ever read by the aggregation job.
+#
+# A batch that fails to write (disk full, a lost mount) stays buffered and is
+# retried at the next flush, up to max_buffered rows; the segment it broke is
+# cut back to its last whole batch and sealed, and the retry opens a new one.
+
+DEFAULT_LOG_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "attempt_logs")
+
+logger = logging.getLogger(__name__)
+
+ATTEMPT_SCHEMA = pa.schema([
+    ("ts", pa.float64()),
+    ("learner_id", pa.string()),
+    ("item", pa.string()),
+    ("level", pa.string()),
+    ("topic", pa.string()),
+    ("chosen", pa.string()),
+    ("correct", pa.bool_()),
+    ("error_category", pa.string()),
+])
+
+
+class AttemptLog:
+    def __init__(self, log_dir=DEFAULT_LOG_DIR, batch_rows=256, segment_rows=50000,
+                 flush_interval=5.0, segment_seconds=300.0, max_buffered=100_000):
+        self.log_dir = log_dir
+        self.batch_rows = batch_rows
+        self.max_buffered = max_buffered
+        self.segment_rows = segment_rows
+        self.flush_interval = flush_interval
+        self.segment_seconds = segment_seconds
+        os.makedirs(log_dir, exist_ok=True)
+        self.buffer = {name: [] for name in ATTEMPT_SCHEMA.names}
+        self.buffered = 0
+        self.lock = threading.Lock()
+        self.write_lock = threading.Lock()
+        self.segment = None
+        self.stopped = False
+        self.wake = threading.Event()
+        self.thread = threading.Thread(target=self._run, name="attempt-log", daemon=True)
+        self.thread.start()
+        atexit.register(self.close)
+
+    def append(self, learner_id, item, level, topic, chosen, correct, error_category=None):
+        with self.lock:
+            row = (time.time(), learner_id, item, level, topic, chosen, correct, error_category)
+            for name, value in zip(ATTEMPT_SCHEMA.names, row):
+                self.buffer[name].append(value)
+            self.buffered += 1
+            full = self.buffered >= self.batch_rows
+        if full:
+            self.wake.set()
+
+    def flush(self):
+        with self.write_lock:
+            with self.lock:
+                if not self.buffered:
+                    columns = None
+                else:
+                    columns, self.buffered = self.buffer, 0
+                    self.buffer = {name: [] for name in ATTEMPT_SCHEMA.names}
+            if columns:
+                try:
+                    self._write(pa.RecordBatch.from_pydict(columns, schema=ATTEMPT_SCHEMA))
+                except Exception:
+                    self._requeue(columns)
+                    if self.segment:
+                        self._seal(broken=True)
+                    raise
+            if self.segment and self._segment_due():
+                self._seal()
+
+    def _requeue(self, columns):
+        # Puts unwritten rows back in front of the ones appended since,
+        # dropping the oldest past max_buffered.
+        with self.lock:
+            for name in ATTEMPT_SCHEMA.names:
+                self.buffer[name][:0] = columns[name]
+            self.buffered += len(columns["ts"])
+            excess = self.buffered - self.max_buffered
+            if excess > 0:
+                for name in ATTEMPT_SCHEMA.names:
+                    del self.buffer[name][:excess]
+                self.buffered -= excess
+                logger.warning("Attempt log buffer full, dropped %d unwritten attempts", excess)
+
+    def _write(self, batch):
+        if self.segment is None:
+            name = f"attempts-{time.strftime('%Y%m%dT%H%M%S')}-{os.getpid()}-{uuid.uuid4().hex[:8]}"
+            path = os.path.join(self.log_dir, name + ".arrow.open")
+            sink = pa.OSFile(path, "wb")
+            writer = ipc.new_stream(sink, ATTEMPT_SCHEMA)
+            self.segment = {
+                "path": path,
+                "sink": sink,
+                "writer": writer,
+                "rows": 0,
+                "opened": time.time(),
+                # Where the last whole batch ends.
+                "end": sink.tell(),
+            }
+        self.segment["writer"].write_batch(batch)
+        self.segment["rows"] += batch.num_rows
+        self.segment["end"] = self.segment["sink"].tell()
+
+    def _segment_due(self):
+        return (self.segment["rows"] >= self.segment_rows
+                or time.time() - self.segment["opened"] >= self.segment_seconds)
+
+    def _seal(self, broken=False):
+        # A broken segment may end in part of a batch: it is cut back to the
+        # last whole one and sealed without the end-of-stream marker, which
+        # readers do not need.
+        segment, self.segment = self.segment, None
+        if not broken:
+            try:
+                segment["writer"].close()
+            except Exception:
+                broken = True
+        try:
+            segment["sink"].close()
+        except Exception:
+            broken = True
+        if broken:
+            os.truncate(segment["path"], segment["end"])
+        os.replace(segment["path"], segment["path"][:-len(".open")])
+
+    def _run(self):
+        # A failed write is logged and retried at the next flush; the thread
+        # keeps running.
+        while not self.stopped:
+            self.wake.wait(self.flush_interval)
+            self.wake.clear()
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Writing the attempt log failed; retrying at the next flush")
+
+    def close(self):
+        if self.stopped:
+            return
+        self.stopped = True
+        self.wake.set()
+        self.thread.join(timeout=self.flush_interval)
+        self.flush()
+        with self.write_lock:
+            if self.segment:
+                self._seal()
+
+
+def open_attempt_log(log_dir=None):
+    # LOGIC_TUTOR_ATTEMPT_LOG sets the log directory; "off" disables logging.
+    log_dir = log_dir or os.environ.get("LOGIC_TUTOR_ATTEMPT_LOG", DEFAULT_LOG_DIR)
+    if log_dir == "off":
+        return None
+    return AttemptLog(log_dir)
+
+
+def sealed_segments(log_dir):
+    if not os.path.isdir(log_dir):
+        return []
+    return sorted(name for name in os.listdir(log_dir) if name.endswith(".arrow"))
+
+
+def iter_batches(path):
+    # Streams one record batch at a time; a segment is never loaded whole.
+    with pa.OSFile(path, "rb") as source:
+        reader = ipc.open_stream(source)
+        for batch in reader:
+            yield batch
+
+
+# ---------- COHORT AGGREGATION ----------
+# Aggregates are plain dicts so they can be checkpointed as JSON and extended
+# by later runs: an incremental run only reads segments it has not seen yet.
+
+# Upper bounds (seconds) of the time-to-correct histogram buckets.
+TIME_BUCKETS = (5, 10, 20, 30, 60, 120, 300, 600, 1800, 3600, 86400)
+
+
+def empty_aggregate():
+    return {
+        "segments": [],
+        "items": {},
+        "first_attempt": {},
+        "solved": {},
+    }
+
+
+def _item_stats(aggregate, item):
+    stats = aggregate["items"].get(item)
+    if stats is None:
+        stats = {
+            "attempts": 0,
+            "errors": 0,
+            "distractors": {},
+            "categories": {},
+            "time_to_correct": {"count": 0, "total": 0.0, "buckets": [0] * (len(TIME_BUCKETS) + 1)},
+        }
+        aggregate["items"][item] = stats
+    return stats
+
+
+def aggregate_batch(aggregate, batch):
+    columns = batch.to_pydict()
+    for ts, learner_id, item, chosen, correct, category in zip(
+        columns["ts"], columns["learner_id"], columns["item"],
+        columns["chosen"], columns["correct"], columns["error_category"]
+    ):
+        stats = _item_stats(aggregate, item)
+        stats["attempts"] += 1
+        pair = f"{learner_id}|{item}"
+        solved = pair in aggregate["solved"]
+        if not solved:
+            first = min(aggregate["first_attempt"].get(pair, ts), ts)
+            aggregate["first_attempt"][pair] = first
+        if correct:
+            if not solved:
+                # Once solved, only the flag is kept for the pair.
+                aggregate["solved"][pair] = True
+                del aggregate["first_attempt"][pair]
+                elapsed = ts - first
+                timing = stats["time_to_correct"]
+                timing["count"] += 1
+                timing["total"] += elapsed
+                timing["buckets"][bisect.bisect_left(TIME_BUCKETS, elapsed)] += 1
+        else:
+            stats["errors"] += 1
+            stats["distractors"][chosen] = stats["distractors"].get(chosen, 0) + 1
+            if category:
+                stats["categories"][category] = stats["categories"].get(category, 0) + 1
+
+
+def aggregate_log(log_dir, aggregate=None):
+    aggregate = aggregate or empty_aggregate()
+    seen = set(aggregate["segments"])
+    for name in sealed_segments(log_dir):
+        if name in seen:
+            continue
+        for batch in iter_batches(os.path.join(log_dir, name)):
+            aggregate_batch(aggregate, batch)
+        aggregate["segments"].append(name)
+    return aggregate
+
+
+def _bucket_median(buckets, count):
+    if not count:
+        return None
+    seen = 0
+    for index, bucket_count in enumerate(buckets):
+        seen += bucket_count
+        if seen * 2 >= count:
+            return TIME_BUCKETS[index] if index < len(TIME_BUCKETS) else None
+    return None
+
+
+def cohort_report(aggregate, top_distractors=3):
+    report = []
+    for item, stats in aggregate["items"].items():
+        timing = stats["time_to_correct"]
+        distractors = sorted(stats["distractors"].items(), key=lambda entry: -entry[1])
+        categories = sorted(stats["categories"].items(), key=lambda entry: -entry[1])
+        report.append({
+            "item": item,
+            "attempts": stats["attempts"],
+            "errors": stats["errors"],
+            "error_rate": stats["errors"] / stats["attempts"] if stats["attempts"] else 0.0,
+            "top_distractors": distractors[:top_distractors],
+            "misconceptions": categories[:top_distractors],
+            "learners_correct": timing["count"],
+            "mean_seconds_to_correct": timing["total"] / timing["count"] if timing["count"] else None,
+            "median_seconds_to_correct_at_most": _bucket_median(timing["buckets"], timing["count"]),
+        })
+    report.sort(key=lambda row: -row["error_rate"])
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Aggregate cohort answer attempts.")
+    parser.add_argument("--log-dir", default=os.environ.get("LOGIC_TUTOR_ATTEMPT_LOG", DEFAULT_LOG_DIR))
+    parser.add_argument("--checkpoint", help="JSON file holding the aggregate between incremental runs")
+    parser.add_argument("--full", action="store_true", help="ignore the checkpoint and re-read every segment")
+    parser.add_argument("--out", help="write the report here instead of stdout")
+    args = parser.parse_args(argv)
+
+    aggregate = None
+    if args.checkpoint and not args.full and os.path.exists(args.checkpoint):
+        with open(args.checkpoint, encoding="utf-8") as f:
+            aggregate = json.load(f)
+    aggregate = aggregate_log(args.log_dir, aggregate)
+    if args.checkpoint:
+        tmp_path = args.checkpoint + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(aggregate, f)
+        os.replace(tmp_path, args.checkpoint)
+
+    text = json.dumps(cohort_report(aggregate), indent=2, ensure_ascii=False)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,30 @@
+import functools
+import json
 import streamlit as st
-import pandas as pd
 import random
+import uuid
 from datetime import datetime
+from logic_engine import (
+    VARIABLE_NAMES, MAX_VARIABLES, FormulaError, format_formula, parse_formula
+)
+from background import PoolBusy, counterexample_task, open_background_pool, proof_task, truth_table_task
+from result_cache import MISSING, cache_stats, canonical_formula, canonical_or_text, get_cache
+from content_packs import current_pack
+from feedback import get_feedback_index
+from grading import (
+    grade_formula, grade_generated_puzzle, grade_match, grade_proposition, grade_puzzle, grade_quiz,
+    grade_transformation, grade_translation, grade_truth_table, truth_table_answers
+)
+from question_bank import LEVELS, get_question_bank
+from puzzle_generator import get_puzzle_pool
+import content
+from progress_store import open_progress_writer, serialize_progress
+from static_content import load_static_content, markdown_table
+from metrics import LearnerMetrics
+from scheduler import AdaptiveScheduler
+from learner_state import LearnerState, merge_progress
+from scoring import apply_event, score_event
+from instrumentation import PROFILER, profiled
 
 # Configure the page
 st.set_page_config(
@@ -11,43 +34,209 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+@st.cache_resource
+def get_progress_writer():
+    return open_progress_writer(merge=merge_progress)
+
+def get_learner_id():
+    # Learners are identified by the ?learner= query parameter, so a reconnect
+    # or a bookmarked link picks the same saved progress back up.
+    if 'learner_id' not in st.session_state:
+        learner_id = st.query_params.get("learner")
+        if not learner_id:
+            learner_id = uuid.uuid4().hex
+            st.query_params["learner"] = learner_id
+        st.session_state.learner_id = learner_id
+    return st.session_state.learner_id
+
+def get_session_id():
+    # One per browser session; part of every score event's idempotency key.
+    if 'session_id' not in st.session_state:
+        st.session_state.session_id = uuid.uuid4().hex
+    return st.session_state.session_id
+
+def sync_progress():
+    # Runs at the start of every rerun. The stored copy only differs from the
+    # one this session last saw when another tab or worker saved in between;
+    # this session's own changes are already merged into it, so it is adopted.
+    latest = get_progress_writer().latest(get_learner_id())
+    if 'learner' in st.session_state and latest == st.session_state.get('saved_progress'):
+        return
+    learner = st.session_state.get('learner') or LearnerState()
+    learner.load_progress(json.loads(latest) if latest else None)
+    st.session_state.learner = learner
+    st.session_state.saved_progress = latest
+    st.session_state.pop('metrics', None)
+
+def save_progress():
+    # Queued for the background writer only when something actually changed.
+    document = serialize_progress(st.session_state.learner)
+    if document != st.session_state.get('saved_progress'):
+        get_progress_writer().put(get_learner_id(), document, st.session_state.get('saved_progress'))
+        st.session_state.saved_progress = document
+
+def partial_rerun(func):
+    # Widgets inside func rerun only func, not the whole script. main() does
+    # not run then, so the fragment saves the progress it may have changed.
+    @functools.wraps(func)
+    def run(*args, **kwargs):
+        result = func(*args, **kwargs)
+        save_progress()
+        return result
+    return st.fragment(run)
+
 # Initialize session state for user progress
 def initialize_session_state():
-    if 'score' not in st.session_state:
-        st.session_state.score = 0
-    if 'quiz_progress' not in st.session_state:
-        st.session_state.quiz_progress = {"beginner": 0, "intermediate": 0, "advanced": 0}
-    if 'game_progress' not in st.session_state:
-        st.session_state.game_progress = {"truth_table": 0, "puzzle": 0, "matching": 0}
-    if 'current_quiz' not in st.session_state:
-        st.session_state.current_quiz = {}
-    if 'game_state' not in st.session_state:
-        st.session_state.game_state = {}
-    if 'error_tracking' not in st.session_state:
-        st.session_state.error_tracking = {}
-    if 'learning_path' not in st.session_state:
-        st.session_state.learning_path = {
-            "propositional_basics": False,
-            "connectives": False,
-            "truth_tables": False,
-            "conditionals": False,
-            "converse_inverse": False
-        }
+    # All learner data lives in one LearnerState; see learner_state.py.
+    sync_progress()
+    if 'metrics' not in st.session_state:
+        learner = st.session_state.learner
+        st.session_state.metrics = LearnerMetrics.from_progress(
+            quiz_totals(),
+            GAME_TOTALS,
+            learner.quiz_completed(),
+            learner.games_completed(),
+            learner.errors,
+            learner.learning_path()
+        )
+
+# ---------- SCORING ----------
+# All progress changes go through these helpers so the dashboard metrics
+# stay in step with the raw progress dicts. Points only come from score
+# events (scoring.py), at most one per item and attempt of an activity.
+
+QUIZ_LENGTH = 5
+
+# Completion denominators, taken from the content itself: each level's
+# questions in the bank and each game's items. Generated puzzles are a
+# practice pool far larger than the games, so they are counted on their own
+# rather than in Game Completion.
+GAME_TOTALS = {
+    "truth_table": len(content.TRUTH_TABLE_EXPRESSIONS),
+    "puzzle": len(content.LOGIC_PUZZLES) + len(content.TRANSFORMATIONS),
+    "matching": len(content.MATCH_ITEMS)
+}
+
+def quiz_totals():
+    bank = get_question_bank()
+    return {level: len(bank.pool(level)) for level in LEVELS}
+
+def award_points(result, activity, index, kind, counter):
+    # Returns False, changing nothing, when the item already scored in this
+    # attempt: re-checking a correct answer is not worth points again.
+    learner = st.session_state.learner
+    if not learner.claim(activity, index):
+        return False
+    event = score_event(get_learner_id(), get_session_id(), result["item"], learner.attempt(activity),
+                        kind, counter, result["points"])
+    apply_event(learner, event)
+    get_progress_writer().append_event(event)
+    # Completion counts each item once, however many attempts score it.
+    if kind == "quiz" and learner.complete(f"quiz:{counter}", index):
+        st.session_state.metrics.record_quiz(counter)
+    elif kind == "game" and learner.complete(activity, index):
+        st.session_state.metrics.record_game(counter)
+    return True
+
+def record_error(error_key):
+    count, evicted = st.session_state.learner.record_error(error_key)
+    if evicted is not None:
+        st.session_state.metrics.forget_error(evicted)
+    st.session_state.metrics.record_error(error_key, count)
+
+@st.cache_resource
+def get_attempt_log():
+    # Imported on first use: pyarrow is slow to import and not needed to start.
+    from analytics import open_attempt_log
+    return open_attempt_log()
+
+def log_attempt(item, level, topic, chosen, correct, error_category=None):
+    # Feeds the cohort-wide attempt log read by analytics.py.
+    attempt_log = get_attempt_log()
+    if attempt_log is not None:
+        attempt_log.append(get_learner_id(), item, level, topic, chosen, correct, error_category)
+
+def log_result(result, chosen):
+    log_attempt(result["item"], result["level"], result["topic"], chosen, result["correct"],
+                result["error_category"])
+
+def complete_topic(topic):
+    if st.session_state.learner.complete_topic(topic):
+        st.session_state.metrics.record_topic()
+
+# ---------- BACKGROUND WORK ----------
+# Heavy checks go to the shared background pool (background.py). A page
+# asks for a result under a slot name; each session keeps one job per slot,
+# so reruns and polls reuse it instead of submitting the work again.
+# Finished results go into the shared result cache, so the next learner who
+# asks the same thing gets the answer without a job.
+
+INLINE_WAIT_SECONDS = 0.05
+POLL_SECONDS = 0.5
+PENDING = object()
+
+@st.cache_resource
+def get_background_pool():
+    return open_background_pool()
+
+def run_in_background(slot, cache_name, key, func, *args):
+    # The result, or PENDING while the job runs; the page is then rerun once
+    # it is done. key must identify the result within the named cache.
+    jobs = st.session_state.setdefault('background_jobs', {})
+    pool = get_background_pool()
+    key = (cache_name, *key)
+    entry = jobs.get(slot)
+    if entry is None or entry[0] != key or entry[1].cancelled():
+        cache = get_cache(cache_name)
+        cached = cache.get(key[1:])
+        if cached is not MISSING:
+            return cached
+        if entry is not None:
+            pool.release(get_session_id(), entry[0])
+        try:
+            future = pool.submit(get_session_id(), key, func, *args)
+            future.add_done_callback(lambda done: remember_result(cache, key[1:], done))
+        except PoolBusy:
+            jobs.pop(slot, None)
+            st.warning("The tutor is busy right now. Please try again in a moment.")
+            return PENDING
+        jobs[slot] = (key, future)
+    else:
+        future = entry[1]
+    try:
+        return future.result(timeout=INLINE_WAIT_SECONDS)
+    except TimeoutError:
+        wait_for(future)
+        return PENDING
+
+def remember_result(cache, key, future):
+    if not future.cancelled() and future.exception() is None:
+        cache.put(key, future.result())
+
+def wait_for(future):
+    def poll():
+        if future.done():
+            st.rerun()
+        st.caption("⏳ Working on it…")
+    st.fragment(poll, run_every=POLL_SECONDS)()
+
+def leave_page():
+    # Work for the page being left is no longer wanted.
+    if st.session_state.pop('background_jobs', None):
+        get_background_pool().release(get_session_id())
 
 # ---------- LEARN SECTION ----------
 
+def get_learn_tables():
+    # Pre-rendered markdown from the static content artifact, shared by every session.
+    return load_static_content()["learn_tables"]
+
+@profiled
 def show_learn_section():
     st.header("Learn Propositional Logic")
     chapter = st.selectbox(
         "Choose a chapter to learn:",
-        [
-            "Basic Concepts & Definitions",
-            "Logical Connectives",
-            "Truth Tables",
-            "Conditional Statements",
-            "Converse, Inverse & Contrapositive",
-            "Logical Equivalences"
-        ]
+        content.LEARN_CHAPTERS
     )
 
     if chapter == "Basic Concepts & Definitions":
@@ -56,16 +245,17 @@ def show_learn_section():
         show_logical_connectives()
     elif chapter == "Truth Tables":
         show_truth_tables_learning()
-        st.session_state.learning_path["truth_tables"] = True
+        complete_topic("truth_tables")
     elif chapter == "Conditional Statements":
         show_conditionals()
-        st.session_state.learning_path["conditionals"] = True
+        complete_topic("conditionals")
     elif chapter == "Converse, Inverse & Contrapositive":
         show_converse_inverse_contrapositive()
-        st.session_state.learning_path["converse_inverse"] = True
+        complete_topic("converse_inverse")
     elif chapter == "Logical Equivalences":
         show_logical_equivalences()
 
+@profiled
 def show_basic_concepts():
     st.subheader("Basic Concepts of Propositional Logic")
     st.markdown("""
@@ -90,15 +280,7 @@ def show_basic_concepts():
     st.markdown("### Identify Propositions")
     st.markdown("Determine which of the following are valid propositions:")
 
-    examples = [
-        ("Paris is the capital of France", True, "This is a declarative statement with a clear truth value (True)"),
-        ("What time is it?", False, "This is a question, not a declarative statement"),
-        ("x + 5 = 10", False, "This depends on the value of x, so it's not a specific proposition"),
-        ("This statement is false", False, "This creates a paradox and cannot have a consistent truth value"),
-        ("Water boils at 100°C at sea level", True, "This is a factual declarative statement")
-    ]
-
-    for i, (example, is_proposition, explanation) in enumerate(examples):
+    for i, (example, _, explanation) in enumerate(content.PROPOSITION_EXAMPLES):
         col1, col2, col3 = st.columns([3, 1, 1])
         with col1:
             st.write(f"**{i+1}. {example}**")
@@ -110,22 +292,23 @@ def show_basic_concepts():
             )
         with col3:
             if user_answer != "Select":
-                if (user_answer == "Yes" and is_proposition) or (user_answer == "No" and not is_proposition):
+                result = grade_proposition(i, user_answer)
+                if result["correct"]:
                     st.success("✓ Correct")
-                    if f"prop_correct_{i}" not in st.session_state:
-                        st.session_state.score += 2
-                        st.session_state[f"prop_correct_{i}"] = True
-                        st.session_state.learning_path["propositional_basics"] = True
+                    # Solved examples stay solved across sessions, so each scores once ever.
+                    learner = st.session_state.learner
+                    if not learner.is_solved(i) and award_points(result, "propositions", i, "proposition", i):
+                        complete_topic("propositional_basics")
                 else:
                     st.error("✗ Incorrect")
                     st.info(f"**Explanation:** {explanation}")
 
+@profiled
 def show_logical_connectives():
     st.subheader("Logical Connectives")
     connective = st.selectbox(
         "Choose a logical connective to learn:",
-        ["AND (Conjunction ∧)", "OR (Disjunction ∨)", "NOT (Negation ¬)",
-         "IMPLIES (Conditional →)", "IF AND ONLY IF (Biconditional ↔)", "XOR (Exclusive OR ⊕)"]
+        content.CONNECTIVE_CHOICES
     )
 
     if "AND" in connective:
@@ -141,27 +324,17 @@ def show_logical_connectives():
     elif "XOR" in connective:
         show_xor_connective()
 
-    st.session_state.learning_path["connectives"] = True
+    complete_topic("connectives")
 
+@profiled
 def show_and_connective():
     st.markdown("""
     ### AND Connective (Conjunction) - Symbol: ∧
     """)
-    and_table = pd.DataFrame({
-        'p': [True, True, False, False],
-        'q': [True, False, True, False],
-        'p ∧ q': [True, False, False, False]
-    })
-    st.dataframe(and_table, hide_index=True)
+    st.markdown(get_learn_tables()["and"])
 
     st.markdown("### Practice Exercise")
-    practice_cases = [
-        ("TRUE ∧ TRUE", True),
-        ("TRUE ∧ FALSE", False),
-        ("FALSE ∧ TRUE", False),
-        ("FALSE ∧ FALSE", False)
-    ]
-    for expr, answer in practice_cases:
+    for expr, answer in content.AND_PRACTICE_CASES:
         col1, col2, col3 = st.columns([2, 2, 1])
         with col1:
             st.write(f"**{expr}**")
@@ -179,194 +352,201 @@ def show_and_connective():
                 else:
                     st.error(f"✗ Should be {correct}")
 
+@profiled
 def show_or_connective():
     st.markdown("""
     ### OR Connective (Disjunction) - Symbol: ∨
     """)
-    or_table = pd.DataFrame({
-        'p': [True, True, False, False],
-        'q': [True, False, True, False],
-        'p ∨ q': [True, True, True, False]
-    })
-    st.dataframe(or_table, hide_index=True)
+    st.markdown(get_learn_tables()["or"])
 
+@profiled
 def show_not_connective():
     st.markdown("""
     ### NOT Connective (Negation) - Symbol: ¬
     """)
-    not_table = pd.DataFrame({
-        'p': [True, False],
-        '¬p': [False, True]
-    })
-    st.dataframe(not_table, hide_index=True)
+    st.markdown(get_learn_tables()["not"])
 
+@profiled
 def show_implies_connective():
     st.markdown("""
     ### IMPLIES Connective (Conditional) - Symbol: →
     """)
-    implies_table = pd.DataFrame({
-        'p': [True, True, False, False],
-        'q': [True, False, True, False],
-        'p → q': [True, False, True, True]
-    })
-    st.dataframe(implies_table, hide_index=True)
+    st.markdown(get_learn_tables()["implies"])
 
+@profiled
 def show_iff_connective():
     st.markdown("""
     ### IF AND ONLY IF Connective (Biconditional) - Symbol: ↔
     """)
-    iff_table = pd.DataFrame({
-        'p': [True, True, False, False],
-        'q': [True, False, True, False],
-        'p ↔ q': [True, False, False, True]
-    })
-    st.dataframe(iff_table, hide_index=True)
+    st.markdown(get_learn_tables()["iff"])
 
+@profiled
 def show_xor_connective():
     st.markdown("""
     ### XOR Connective (Exclusive OR) - Symbol: ⊕
     """)
-    xor_table = pd.DataFrame({
-        'p': [True, True, False, False],
-        'q': [True, False, True, False],
-        'p ⊕ q': [False, True, True, False]
-    })
-    st.dataframe(xor_table, hide_index=True)
+    st.markdown(get_learn_tables()["xor"])
 
+MAX_DISPLAY_ROWS = 1024
+# Up to this many rows the table is markdown; only bigger ones load pandas.
+MARKDOWN_TABLE_ROWS = 32
+
+@profiled
 def show_truth_tables_learning():
     st.subheader("Understanding Truth Tables")
     st.markdown("### Interactive Truth Table Builder")
-    num_vars = st.slider("Number of variables:", 1, 3, 2)
-    variables = ['p', 'q', 'r'][:num_vars]
-
-    combinations = []
-    for i in range(2 ** num_vars):
-        combo = []
-        for j in range(num_vars):
-            combo.append(bool((i >> (num_vars - 1 - j)) & 1))
-        combinations.append(combo)
-
-    table_data = []
-    for combo in combinations:
-        row = {}
-        for i, var in enumerate(variables):
-            row[var] = combo[i]
-        table_data.append(row)
-
-    df = pd.DataFrame(table_data)
-    st.dataframe(df, hide_index=True)
+    num_vars = st.slider("Number of variables:", 1, MAX_VARIABLES, 2)
+    variables = VARIABLE_NAMES[:num_vars]
+
+    expression = st.text_input(
+        "Expression to evaluate (optional):",
+        placeholder="e.g. (p ∧ q) → r  or  (p & q) -> r"
+    )
+    text = None
+    if expression:
+        try:
+            formula = parse_formula(expression)
+        except FormulaError as e:
+            st.error(f"Could not read that expression: {e}")
+        else:
+            extra = [var for var in formula.variables if var not in variables]
+            if len(variables) + len(extra) > MAX_VARIABLES:
+                st.error(f"Truth tables are limited to {MAX_VARIABLES} variables.")
+            else:
+                text = format_formula(formula)
+
+    # Large tables are evaluated off the script thread.
+    table = run_in_background("truth_table_builder", "truth_tables", ("builder", text, tuple(variables)),
+                              truth_table_task, text, tuple(variables), MAX_DISPLAY_ROWS)
+    if table is PENDING:
+        return
+    st.markdown(f"**{table['rows']:,} rows**")
+    for label, count in table["counts"].items():
+        st.markdown(f"**{label}** is true in {count:,} of {table['rows']:,} rows.")
+    if table["rows"] > MAX_DISPLAY_ROWS:
+        st.caption(f"Showing the first {MAX_DISPLAY_ROWS:,} rows.")
+
+    columns = table["columns"]
+    if table["rows"] <= MARKDOWN_TABLE_ROWS:
+        st.markdown(markdown_table(columns))
+    else:
+        import pandas as pd
+        st.dataframe(pd.DataFrame(columns), hide_index=True)
 
+@profiled
 def show_conditionals():
     st.subheader("Conditional Statements")
     st.markdown("### Practice: Translate Conditionals")
 
-    translations = [
-        {
-            "expression": "You can drive if you have a license",
-            "logical_form": "have_license → can_drive",
-            "explanation": "'q if p' translates to p → q"
-        },
-        {
-            "expression": "A number is prime only if it is greater than 1",
-            "logical_form": "is_prime → greater_than_1",
-            "explanation": "'p only if q' translates to p → q"
-        },
-        {
-            "expression": "Studying hard is sufficient for passing the exam",
-            "logical_form": "study_hard → pass_exam",
-            "explanation": "'p is sufficient for q' translates to p → q"
-        }
-    ]
-
-    for i, trans in enumerate(translations):
+    for i, trans in enumerate(content.TRANSLATIONS):
         st.markdown(f"**{i+1}. Natural Language:** {trans['expression']}")
         user_translation = st.text_input(
             f"Logical form for example {i+1}:",
             key=f"trans_{i}",
-            placeholder="p → q format"
+            placeholder="p → q format, or in words: if ..., then ..."
         )
         if user_translation:
-            if user_translation.strip().lower() == trans['logical_form'].lower():
+            result = grade_translation(i, user_translation)
+            if result["correct"]:
                 st.success("✓ Correct translation!")
             else:
-                st.error(f"Not quite. The logical form is: **{trans['logical_form']}**")
+                st.error(f"Not quite. {result['feedback']} The logical form is: **{trans['logical_form']}**")
                 st.info(f"**Explanation:** {trans['explanation']}")
 
+@profiled
 def show_converse_inverse_contrapositive():
     st.subheader("Converse, Inverse, and Contrapositive")
     st.markdown("### Related Conditionals")
-    col1, col2, col3, col4 = st.columns(4)
-    with col1:
-        st.markdown("**Original**\np → q")
-    with col2:
-        st.markdown("**Converse**\nq → p")
-    with col3:
-        st.markdown("**Inverse**\n¬p → ¬q")
-    with col4:
-        st.markdown("**Contrapositive**\n¬q → ¬p")
+    for col, (name, form) in zip(st.columns(4), content.RELATED_CONDITIONALS):
+        with col:
+            st.markdown(f"**{name}**\n{form}")
 
+@profiled
 def show_logical_equivalences():
     st.subheader("Logical Equivalences")
     st.markdown("### Important Logical Equivalences")
 
-    equivalences = [
-        ("Double Negation", "¬¬p ≡ p"),
-        ("Identity Laws", "p ∧ T ≡ p\np ∨ F ≡ p"),
-        ("Domination Laws", "p ∨ T ≡ T\np ∧ F ≡ F"),
-        ("Idempotent Laws", "p ∨ p ≡ p\np ∧ p ≡ p"),
-        ("Commutative Laws", "p ∨ q ≡ q ∨ p\np ∧ q ≡ q ∧ p"),
-        ("Associative Laws", "(p ∨ q) ∨ r ≡ p ∨ (q ∨ r)\n(p ∧ q) ∧ r ≡ p ∧ (q ∧ r)"),
-        ("Distributive Laws", "p ∨ (q ∧ r) ≡ (p ∨ q) ∧ (p ∨ r)\np ∧ (q ∨ r) ≡ (p ∧ q) ∧ (p ∧ r)"),
-        ("De Morgan's Laws", "¬(p ∧ q) ≡ ¬p ∨ ¬q\n¬(p ∨ q) ≡ ¬p ∧ ¬q"),
-        ("Absorption Laws", "p ∨ (p ∧ q) ≡ p\np ∧ (p ∨ q) ≡ p"),
-        ("Conditional Equivalences", "p → q ≡ ¬p ∨ q\np → q ≡ ¬q → ¬p"),
-        ("Biconditional Equivalences", "p ↔ q ≡ (p → q) ∧ (q → p)\np ↔ q ≡ ¬p ↔ ¬q")
-    ]
-
-    for name, laws in equivalences:
+    for name, laws in content.EQUIVALENCES:
         with st.expander(f"**{name}**"):
             st.code(laws)
 
+    st.markdown("### Is This Equivalent?")
+    st.markdown("Enter any two formulas to check whether they are logically equivalent.")
+    col1, col2 = st.columns(2)
+    with col1:
+        left = st.text_input("First formula:", placeholder="e.g. p → q", key="equiv_check_left")
+    with col2:
+        right = st.text_input("Second formula:", placeholder="e.g. ¬q → ¬p", key="equiv_check_right")
+    checked = PENDING
+    if left and right:
+        try:
+            pair = (canonical_formula(left), canonical_formula(right))
+        except FormulaError:
+            checked = (False, None)
+        else:
+            checked = run_in_background("equivalence_check", "counterexamples", pair, counterexample_task, *pair)
+    if checked is not PENDING:
+        readable, row = checked
+        if not readable:
+            st.warning(content.SIMPLIFICATION_FEEDBACK["unreadable"])
+        elif row is None:
+            st.success("✓ Equivalent: the two formulas agree on every row of the truth table.")
+        else:
+            st.error("✗ Not equivalent. They give different results when:")
+            st.markdown(markdown_table({name: ["T" if value else "F"] for name, value in row.items()}))
+
     st.markdown("### Practice: Apply Logical Equivalences")
 
-    practice_problems = [
-        {
-            "problem": "Simplify: ¬(p ∧ ¬q)",
-            "steps": [
-                "Apply De Morgan's Law: ¬(p ∧ ¬q) ≡ ¬p ∨ ¬¬q",
-                "Apply Double Negation: ¬p ∨ ¬¬q ≡ ¬p ∨ q"
-            ],
-            "answer": "¬p ∨ q"
-        },
-        {
-            "problem": "Rewrite p → q using only OR and NOT",
-            "steps": [
-                "Conditional equivalence: p → q ≡ ¬p ∨ q"
-            ],
-            "answer": "¬p ∨ q"
-        }
-    ]
-
-    for i, prob in enumerate(practice_problems):
+    for i, prob in enumerate(content.PRACTICE_PROBLEMS):
         st.markdown(f"**Problem {i+1}:** {prob['problem']}")
         user_solution = st.text_input("Your solution:", key=f"equiv_{i}")
         if user_solution:
-            if user_solution.strip().replace(" ", "") == prob['answer'].replace(" ", ""):
+            correct, reason = grade_formula(user_solution, prob['answer'], simplified=True)
+            if correct:
                 st.success("✓ Correct!")
             else:
+                if reason in content.SIMPLIFICATION_FEEDBACK:
+                    st.warning(content.SIMPLIFICATION_FEEDBACK[reason])
                 st.error("Not quite. Let's work through it:")
                 for step in prob['steps']:
                     st.write(f"- {step}")
                 st.info(f"**Final answer:** {prob['answer']}")
+        show_proof_exercise(i, prob)
+
+@profiled
+def show_proof_exercise(i, prob):
+    with st.expander("✍️ Prove it step by step"):
+        st.markdown(f"Start from **{prob['start']}** and write one formula per line, "
+                    "each one law from the list above away from the line before.")
+        lines = [line.strip().lstrip("≡").strip()
+                 for line in st.text_area("Your steps:", key=f"equiv_proof_{i}").splitlines()]
+        lines = [line for line in lines if line]
+        if not lines:
+            return
+        steps = tuple(canonical_or_text(line) for line in lines)
+        key = (current_pack().version, prob['start'], steps, prob['answer'])
+        checked = run_in_background(f"proof_{i}", "proofs", key,
+                                    proof_task, prob['start'], list(steps), prob['answer'])
+        if checked is PENDING:
+            return
+        results, complete = checked
+        for line, (ok, detail) in zip(lines, results):
+            if ok:
+                st.success(f"✓ {line}  ({detail})")
+            else:
+                st.error(f"✗ {line}: {content.PROOF_FEEDBACK[detail]}")
+        if complete:
+            st.success("🎉 Proof complete!")
 
 # ---------- QUIZZES ----------
 
+@profiled
 def show_quizzes():
     st.header("Practice Quizzes")
-    st.markdown(f"### Current Score: {st.session_state.score}")
+    st.markdown(f"### Current Score: {st.session_state.learner.score}")
     quiz_level = st.radio(
         "Select Quiz Level:",
-        ["Beginner", "Intermediate", "Advanced"],
+        ["Beginner", "Intermediate", "Advanced", "Adaptive Practice"],
         horizontal=True
     )
 
@@ -374,362 +554,318 @@ def show_quizzes():
         run_beginner_quiz()
     elif quiz_level == "Intermediate":
         run_intermediate_quiz()
-    else:
+    elif quiz_level == "Advanced":
         run_advanced_quiz()
-
+    else:
+        run_adaptive_quiz()
+
+# Learning-path topics a correct answer counts towards.
+TOPIC_LEARNING_PATH = {
+    "connective_evaluation": "propositional_basics",
+    "related_conditionals": "converse_inverse",
+}
+
+def get_scheduler():
+    return AdaptiveScheduler(get_question_bank(), st.session_state.learner.adaptive)
+
+def get_quiz_questions(level):
+    # Each learner keeps their drawn questions until they ask for new ones,
+    # so reruns reuse the same quiz instead of asking the scheduler again.
+    bank = get_question_bank()
+    quiz_sets = st.session_state.learner.quiz_sets
+    questions = [bank.get(question_id) for question_id in quiz_sets.get(level, ())]
+    if level not in quiz_sets or None in questions:
+        # New quiz, or a content pack update removed one of the drawn questions.
+        questions = get_scheduler().draw(level, QUIZ_LENGTH)
+        quiz_sets[level] = tuple(q["id"] for q in questions)
+        st.session_state.learner.next_attempt(f"quiz:{level}")
+    return questions
+
+@profiled
 def run_beginner_quiz():
     st.subheader("Beginner Level Quiz")
-    questions = [
-        {
-            "question": "What is the result of TRUE AND FALSE?",
-            "options": ["TRUE", "FALSE", "Cannot determine", "Both TRUE and FALSE"],
-            "correct": 1,
-            "hint": "AND is only true when both operands are true.",
-            "explanation": "The AND connective requires both propositions to be true for the result to be true. Since FALSE is one operand, the result is FALSE.",
-            "points": 10,
-            "error_feedback": {
-                "TRUE": "Remember: AND requires BOTH to be true",
-                "Cannot determine": "With specific truth values, we can always determine the result",
-                "Both TRUE and FALSE": "A proposition cannot be both true and false simultaneously"
-            }
-        },
-        {
-            "question": "Which connective represents logical OR?",
-            "options": ["∧", "∨", "¬", "→"],
-            "correct": 1,
-            "hint": "OR is represented by the ∨ symbol.",
-            "explanation": "∨ is the symbol for logical OR (disjunction). ∧ is AND, ¬ is NOT, and → is IMPLIES.",
-            "points": 10,
-            "error_feedback": {
-                "∧": "That's the symbol for AND, not OR",
-                "¬": "That's the symbol for NOT (negation)",
-                "→": "That's the symbol for IMPLIES (conditional)"
-            }
-        }
-    ]
-    display_enhanced_quiz(questions, "beginner")
+    display_enhanced_quiz(get_quiz_questions("beginner"), "beginner")
 
+@profiled
 def run_intermediate_quiz():
     st.subheader("Intermediate Level Quiz")
-    questions = [
-        {
-            "question": "If p → q is FALSE, what must be true?",
-            "options": ["p is FALSE, q is TRUE", "p is TRUE, q is FALSE", "Both are FALSE", "Both are TRUE"],
-            "correct": 1,
-            "hint": "IMPLIES is false only in one specific case.",
-            "explanation": "The conditional p → q is false ONLY when p is true and q is false. In all other cases, it's true.",
-            "points": 20,
-            "error_feedback": {
-                "p is FALSE, q is TRUE": "When p is false, p → q is true regardless of q",
-                "Both are FALSE": "When both are false, p → q is true",
-                "Both are TRUE": "When both are true, p → q is true"
-            }
-        },
-        {
-            "question": "What is the contrapositive of 'If it rains, then I bring an umbrella'?",
-            "options": [
-                "If I bring an umbrella, then it rains",
-                "If it does not rain, then I do not bring an umbrella",
-                "If I do not bring an umbrella, then it does not rain",
-                "It rains if and only if I bring an umbrella"
-            ],
-            "correct": 2,
-            "hint": "Contrapositive: negate both parts and reverse them.",
-            "explanation": "Original: p → q where p='it rains', q='I bring umbrella'. Contrapositive: ¬q → ¬p = 'If I do not bring an umbrella, then it does not rain'.",
-            "points": 25,
-            "error_feedback": {
-                "If I bring an umbrella, then it rains": "That's the converse, not the contrapositive",
-                "If it does not rain, then I do not bring an umbrella": "That's the inverse, not the contrapositive",
-                "It rains if and only if I bring an umbrella": "That's the biconditional, not the contrapositive"
-            }
-        }
-    ]
-    display_enhanced_quiz(questions, "intermediate")
+    display_enhanced_quiz(get_quiz_questions("intermediate"), "intermediate")
 
+@profiled
 def run_advanced_quiz():
     st.subheader("Advanced Level Quiz")
-    questions = [
-        {
-            "question": "Which expression is logically equivalent to ¬(p ∨ q)?",
-            "options": ["¬p ∧ ¬q", "¬p ∨ ¬q", "p ∧ q", "p ∨ q"],
-            "correct": 0,
-            "hint": "This is one of De Morgan's Laws.",
-            "explanation": "De Morgan's Law states that ¬(p ∨ q) ≡ ¬p ∧ ¬q. The negation distributes and flips OR to AND.",
-            "points": 30,
-            "error_feedback": {
-                "¬p ∨ ¬q": "That would be equivalent to ¬(p ∧ q) by De Morgan's Law",
-                "p ∧ q": "That's the opposite of what we want",
-                "p ∨ q": "That's the original expression without negation"
-            }
-        },
-        {
-            "question": "If 'All humans are mortal' is true, which of these must also be true?",
-            "options": [
-                "All mortals are humans",
-                "If something is not mortal, then it is not human",
-                "If something is human, then it is not mortal",
-                "Some humans are not mortal"
-            ],
-            "correct": 1,
-            "hint": "Think about the contrapositive.",
-            "explanation": "Let p='is human', q='is mortal'. Original: p → q. The contrapositive ¬q → ¬p must also be true: 'If something is not mortal, then it is not human'.",
-            "points": 35,
-            "error_feedback": {
-                "All mortals are humans": "That's the converse, which may not be true",
-                "If something is human, then it is not mortal": "That contradicts the original statement",
-                "Some humans are not mortal": "That also contradicts the original statement"
-            }
-        }
-    ]
-    display_enhanced_quiz(questions, "advanced")
-
+    display_enhanced_quiz(get_quiz_questions("advanced"), "advanced")
+
+@profiled
+def run_adaptive_quiz():
+    st.subheader("Adaptive Practice")
+    st.markdown("Questions are picked from your own answers: missed questions come back for review, "
+                "and new ones target your weakest topics.")
+    scheduler = get_scheduler()
+    learner = st.session_state.learner
+    q = None if learner.adaptive_current is None else get_question_bank().get(learner.adaptive_current)
+    if q is None:
+        q = scheduler.next_question(scheduler.recommended_level())
+        learner.adaptive_current = q["id"] if q else None
+        learner.next_attempt("adaptive")
+    if q is None:
+        st.info("No questions available right now.")
+        return
+
+    st.markdown(f"*{q['level'].title()} · {q['topic'].replace('_', ' ')} · "
+                f"estimated chance of success {scheduler.predicted_success(q):.0%}*")
+    show_quiz_question(q, 0, q['level'], "adaptive")
+    if st.button("➡️ Next Question", key="adaptive_next"):
+        learner.adaptive_current = None
+        st.rerun()
+
+@profiled
 def display_enhanced_quiz(questions, level):
-    st.markdown(f"**Progress: {st.session_state.quiz_progress[level]}/{len(questions)} questions completed**")
+    st.markdown(f"**Progress: {st.session_state.learner.quiz_count(level)}/{len(questions)} questions completed**")
+    if st.button("🔀 New Questions", key=f"new_quiz_{level}"):
+        del st.session_state.learner.quiz_sets[level]
+        st.rerun()
     for i, q in enumerate(questions):
-        st.markdown("---")
-        st.markdown(f"**Question {i+1}:** {q['question']}")
-        st.markdown(f"*Points: {q['points']}*")
-
-        hint_key = f"hint_{level}_{i}"
-        if hint_key not in st.session_state:
-            st.session_state[hint_key] = False
+        show_quiz_question(q, i, level)
 
-        col1, col2 = st.columns([3, 1])
-        with col2:
-            if st.button("💡 Hint", key=f"hint_btn_{level}_{i}"):
-                st.session_state[hint_key] = True
+@partial_rerun
+@profiled
+def show_quiz_question(q, i, level, activity=None):
+    st.markdown("---")
+    st.markdown(f"**Question {i+1}:** {q['question']}")
+    st.markdown(f"*Points: {q['points']}*")
 
-        if st.session_state[hint_key]:
-            st.info(f"**Hint:** {q['hint']}")
+    learner = st.session_state.learner
+    col1, col2 = st.columns([3, 1])
+    with col2:
+        if st.button("💡 Hint", key=f"hint_btn_{level}_{q['id']}"):
+            learner.show_hint(q['id'])
 
-        user_answer = st.radio(
-            "Select your answer:",
-            q['options'],
-            key=f"quiz_{level}_{i}"
-        )
+    if learner.hint_shown(q['id']):
+        st.info(get_feedback_index().hints[q['id']])
 
-        if st.button(f"Check Answer {i+1}", key=f"check_btn_{level}_{i}"):
-            if user_answer == q['options'][q['correct']]:
-                st.success(f"✅ Correct! +{q['points']} points")
-                st.session_state.score += q['points']
-                st.session_state.quiz_progress[level] += 1
+    user_answer = st.radio(
+        "Select your answer:",
+        q['options'],
+        key=f"quiz_{level}_{q['id']}"
+    )
 
-                if level == "beginner" and i == 0:
-                    st.session_state.learning_path["propositional_basics"] = True
-                elif level == "intermediate" and i == 1:
-                    st.session_state.learning_path["converse_inverse"] = True
+    if st.button(f"Check Answer {i+1}", key=f"check_btn_{level}_{q['id']}"):
+        result = grade_quiz(q, user_answer)
+        log_result(result, user_answer)
+        activity = activity or f"quiz:{level}"
+        # Checking again does not count as another review.
+        if learner.first_check(activity, q['id']):
+            get_scheduler().record(q, result['correct'])
+        if result['correct']:
+            if award_points(result, activity, q['id'], "quiz", level):
+                st.success(f"✅ Correct! +{result['points']} points")
             else:
-                st.error("❌ Incorrect.")
-                if 'error_feedback' in q and user_answer in q['error_feedback']:
-                    st.warning(f"**Common misunderstanding:** {q['error_feedback'][user_answer]}")
+                st.success("✅ Correct! (Points for this question were already counted.)")
 
-                error_key = f"error_{level}_{q['question'][:20]}"
-                if error_key in st.session_state.error_tracking:
-                    st.session_state.error_tracking[error_key] += 1
-                else:
-                    st.session_state.error_tracking[error_key] = 1
-
-            with st.expander("View Detailed Explanation"):
-                st.markdown(f"**Question:** {q['question']}")
-                st.markdown(f"**Correct Answer:** {q['options'][q['correct']]}")
-                st.markdown(f"**Explanation:** {q['explanation']}")
-                if user_answer != q['options'][q['correct']]:
-                    error_count = st.session_state.error_tracking.get(
-                        f"error_{level}_{q['question'][:20]}", 0
+            if q['topic'] in TOPIC_LEARNING_PATH:
+                complete_topic(TOPIC_LEARNING_PATH[q['topic']])
+        else:
+            st.error("❌ Incorrect.")
+            if result['feedback']:
+                st.warning(f"**Common misunderstanding:** {result['feedback']}")
+            record_error(result['error_key'])
+
+        with st.expander("View Detailed Explanation"):
+            st.markdown(get_feedback_index().explanations[q['id']])
+            if not result['correct']:
+                error_count = learner.errors.get(result['error_key'], 0)
+                if error_count > 1:
+                    st.warning(
+                        f"🤔 You've made this error {error_count} times. "
+                        "Consider reviewing the related learning materials."
                     )
-                    if error_count > 1:
-                        st.warning(
-                            f"🤔 You've made this error {error_count} times. "
-                            "Consider reviewing the related learning materials."
-                        )
 
 # ---------- GAMES ----------
 
+@profiled
 def truth_table_game():
     st.subheader("Truth Table Challenge")
     st.markdown("Fill in the missing outputs for the given logical expression.")
-    expressions = [
-        {"expr": "p ∧ q", "func": lambda p, q: p and q},
-        {"expr": "p ∨ q", "func": lambda p, q: p or q},
-        {"expr": "p → q", "func": lambda p, q: (not p) or q},
-    ]
-    if "truth_table_state" not in st.session_state:
-        st.session_state.truth_table_state = {"current": 0, "score": 0}
+    show_truth_table_round(content.TRUTH_TABLE_EXPRESSIONS)
 
-    state = st.session_state.truth_table_state
-    current = expressions[state["current"]]
-    st.markdown(f"### Expression: **{current['expr']}**")
-
-    rows = [(True, True), (True, False), (False, True), (False, False)]
-    correct_outputs = [current["func"](p, q) for p, q in rows]
+@partial_rerun
+@profiled
+def show_truth_table_round(expressions):
+    learner = st.session_state.learner
+    expression = expressions[learner.truth_table_round % len(expressions)]
+    text, variables, rows, _ = truth_table_answers(expression)
+    st.markdown(f"### Expression: **{text}**")
 
     user_outputs = []
-    for idx, (p, q) in enumerate(rows):
+    for idx, row in enumerate(rows):
         col1, col2, col3 = st.columns(3)
         with col1:
-            st.write(f"p = {p}, q = {q}")
+            st.write(", ".join(f"{var} = {value}" for var, value in zip(variables, row)))
         with col2:
             ans = st.selectbox(
                 f"Result row {idx+1}",
                 ["Select", "True", "False"],
-                key=f"tt_ans_{state['current']}_{idx}"
+                key=f"tt_ans_{learner.truth_table_round}_{idx}"
             )
         user_outputs.append(ans)
 
     if st.button("✅ Check Truth Table"):
-        all_correct = True
-        for idx, ans in enumerate(user_outputs):
-            expected = "True" if correct_outputs[idx] else "False"
-            if ans == expected:
+        result = grade_truth_table(expression, user_outputs)
+        for idx, (row_correct, expected) in enumerate(zip(result['rows'], result['expected'])):
+            if row_correct:
                 st.success(f"Row {idx+1}: Correct")
             else:
-                all_correct = False
                 st.error(f"Row {idx+1}: Should be {expected}")
 
-        if all_correct:
-            st.success("All rows correct! +20 points")
-            st.session_state.score += 20
-            state["score"] += 20
-            st.session_state.game_progress["truth_table"] += 1
-            st.session_state.learning_path["truth_tables"] = True
-            state["current"] = (state["current"] + 1) % len(expressions)
+        log_result(result, ",".join(user_outputs))
+        round_index = learner.truth_table_round % len(expressions)
+        if result['correct'] and award_points(result, "truth_table", round_index, "game", "truth_table"):
+            st.success(f"All rows correct! +{result['points']} points")
+            learner.truth_table_score += result['points']
+            complete_topic("truth_tables")
+            learner.truth_table_round = (round_index + 1) % len(expressions)
+            if learner.truth_table_round == 0:
+                learner.next_attempt("truth_table")
 
-    st.markdown(f"Game score (truth tables): {state['score']}")
+    st.markdown(f"Game score (truth tables): {learner.truth_table_score}")
 
+@profiled
 def logic_puzzle_game():
     st.subheader("Logic Puzzle")
     st.markdown("Solve a small reasoning puzzle about propositions.")
-    if "puzzle_done" not in st.session_state:
-        st.session_state.puzzle_done = False
-
-    st.markdown(
-        "Suppose the statement 'If it is Sunday, then I rest' is true. "
-        "Today I am not resting. What can be concluded?"
-    )
-    options = [
-        "It is Sunday",
-        "It is not Sunday",
-        "I always rest",
-        "Nothing can be concluded"
-    ]
-    ans = st.radio("Choose the best conclusion:", options, key="puzzle_ans")
+    puzzle_set = st.radio("Puzzle set:", ["Classic", "Easy", "Medium", "Hard"], horizontal=True, key="puzzle_set")
+    if puzzle_set == "Classic":
+        classic_puzzle()
+    else:
+        generated_puzzle(puzzle_set.lower())
+
+@profiled
+def classic_puzzle():
+    puzzle = content.LOGIC_PUZZLES[0]
+    if st.session_state.learner.puzzle_done:
+        st.caption("✓ You have solved this one. The other sets have a new puzzle every round.")
+    st.markdown(puzzle["text"])
+    ans = st.radio("Choose the best conclusion:", puzzle["options"], key="puzzle_ans")
     if st.button("Check Puzzle Answer"):
-        if ans == "It is not Sunday":
-            st.success("Correct! This is the contrapositive reasoning. +10 points")
-            st.session_state.score += 10
-            st.session_state.game_progress["puzzle"] += 1
-            st.session_state.puzzle_done = True
+        result = grade_puzzle(0, ans)
+        log_result(result, ans)
+        if result["correct"]:
+            if award_points(result, "puzzle", 0, "game", "puzzle"):
+                st.success(f"{result['feedback']} +{result['points']} points")
+            else:
+                st.success(result["feedback"])
+            st.session_state.learner.puzzle_done = True
         else:
-            st.error("Not quite. Think about the contrapositive: if not q, then not p.")
-
+            st.error(result["feedback"])
+
+@profiled
+def generated_puzzle(difficulty):
+    # Puzzles come from the pregenerated pool (puzzle_generator.py); moving
+    # on is just the next index.
+    learner = st.session_state.learner
+    pool = get_puzzle_pool()[difficulty]
+    position = learner.puzzle_position(difficulty)
+    index = position % len(pool)
+    puzzle = pool[index]
+    st.markdown(f"*Puzzle {position + 1} · {puzzle['kind'].replace('_', ' ')} · {puzzle['points']} points*")
+    st.markdown(puzzle["text"])
+    ans = st.radio("Your answer:", puzzle["options"], key=f"puzzle_{difficulty}_{position}")
+    if st.button("Check Puzzle Answer", key=f"check_puzzle_{difficulty}"):
+        result = grade_generated_puzzle(difficulty, index, ans)
+        log_result(result, ans)
+        if not result["correct"]:
+            st.error(result["feedback"] or "Not quite. Try again!")
+        elif award_points(result, f"puzzle:{difficulty}", index, "game", "generated_puzzle"):
+            st.success(f"{result['feedback']} +{result['points']} points")
+        else:
+            st.success(result["feedback"])
+    if st.button("➡️ Next Puzzle", key=f"next_puzzle_{difficulty}"):
+        learner.next_puzzle(difficulty)
+        if learner.puzzle_position(difficulty) % len(pool) == 0:
+            learner.next_attempt(f"puzzle:{difficulty}")
+        st.rerun()
+
+@profiled
 def connective_match_game():
     st.subheader("Connective Match")
     st.markdown("Match natural language sentences to the correct connective.")
-    if "match_score" not in st.session_state:
-        st.session_state.match_score = 0
-
-    items = [
-        ("I will go to the party only if I finish my work", "→"),
-        ("I will have coffee or tea (or both)", "∨"),
-        ("I will not go outside", "¬"),
-    ]
-    score_gain = 0
-    for idx, (text, symbol) in enumerate(items):
-        st.markdown(f"**{idx+1}.** {text}")
-        choice = st.selectbox(
-            "Choose connective:",
-            ["Select", "∧", "∨", "¬", "→", "↔"],
-            key=f"match_{idx}"
-        )
-        if st.button(f"Check {idx+1}", key=f"btn_match_{idx}"):
-            if choice == symbol:
-                st.success("Correct! +5 points")
-                score_gain += 5
-            else:
-                st.error(f"Incorrect. The right symbol is {symbol}")
-
-    if score_gain > 0:
-        st.session_state.score += score_gain
-        st.session_state.match_score += score_gain
-        st.session_state.game_progress["matching"] += 1
-
-    st.markdown(f"Connective match game score: {st.session_state.match_score}")
+    for idx, (text, _) in enumerate(content.MATCH_ITEMS):
+        show_match_item(idx, text)
+
+    st.markdown(f"Connective match game score: {st.session_state.learner.match_score}")
+
+@partial_rerun
+@profiled
+def show_match_item(idx, text):
+    st.markdown(f"**{idx+1}.** {text}")
+    choice = st.selectbox(
+        "Choose connective:",
+        content.MATCH_CHOICES,
+        key=f"match_{idx}"
+    )
+    if st.button(f"Check {idx+1}", key=f"btn_match_{idx}"):
+        result = grade_match(idx, choice)
+        log_result(result, choice)
+        if not result["correct"]:
+            st.error(f"Incorrect. {result['feedback']}")
+        elif award_points(result, "match", idx, "game", "matching"):
+            st.success(f"Correct! +{result['points']} points")
+            st.session_state.learner.match_score += result["points"]
+        else:
+            st.success("Correct! (Points for this one were already counted.)")
 
+@profiled
 def conditional_transformation_game():
     st.subheader("Conditional Transformation Game")
     st.markdown("Transform the given conditional into its converse, inverse, or contrapositive!")
-    transformations = [
-        {
-            "original": "If a number is even, then it is divisible by 2",
-            "type": "contrapositive",
-            "target": "If a number is not divisible by 2, then it is not even",
-            "hint": "Negate both parts and reverse them"
-        },
-        {
-            "original": "If it is summer, then it is hot",
-            "type": "converse",
-            "target": "If it is hot, then it is summer",
-            "hint": "Simply reverse the order without negating"
-        },
-        {
-            "original": "If you study, then you will pass",
-            "type": "inverse",
-            "target": "If you do not study, then you will not pass",
-            "hint": "Negate both parts but keep the same order"
-        }
-    ]
-
-    if 'transform_game' not in st.session_state:
-        st.session_state.transform_game = {
-            'current_round': 0,
-            'score': 0,
-            'hints_used': 0
-        }
-
-    state = st.session_state.transform_game
-
-    if state['current_round'] < len(transformations):
-        current = transformations[state['current_round']]
-        st.markdown(f"### Round {state['current_round'] + 1}")
+    transformations = content.TRANSFORMATIONS
+
+    learner = st.session_state.learner
+
+    if learner.transform_round < len(transformations):
+        current = transformations[learner.transform_round]
+        st.markdown(f"### Round {learner.transform_round + 1}")
         st.markdown(f"**Original:** {current['original']}")
         st.markdown(f"**Transform to:** {current['type'].title()}")
-        user_answer = st.text_area("Your answer:", key=f"transform_{state['current_round']}")
+        user_answer = st.text_area("Your answer:", key=f"transform_{learner.transform_round}")
 
         col1, col2, col3 = st.columns(3)
         with col1:
             if st.button("💡 Get Hint"):
                 st.info(f"**Hint:** {current['hint']}")
-                state['hints_used'] += 1
+                learner.transform_hints += 1
         with col2:
             if st.button("✅ Check Answer"):
-                if user_answer.strip().lower() == current['target'].lower():
-                    st.success("Correct! +15 points")
-                    state['score'] += 15
-                    st.session_state.score += 15
-                    state['current_round'] += 1
-                    st.session_state.learning_path["converse_inverse"] = True
-                    st.session_state.game_progress["puzzle"] += 1
+                result = grade_transformation(learner.transform_round, user_answer)
+                log_result(result, user_answer.strip())
+                if result['correct']:
+                    if award_points(result, "transform", learner.transform_round, "game", "puzzle"):
+                        st.success(f"Correct! +{result['points']} points")
+                        learner.transform_score += result['points']
+                    else:
+                        st.success("Correct!")
+                    learner.transform_round += 1
+                    complete_topic("converse_inverse")
                 else:
-                    st.error("Not quite right. Try again!")
+                    st.error(f"Not quite right. {content.CONDITIONAL_FEEDBACK[result['error_category']]}")
                     st.info(f"**Expected:** {current['target']}")
         with col3:
             if st.button("⏭️ Skip"):
-                state['current_round'] += 1
+                learner.transform_round += 1
                 st.rerun()
     else:
-        st.success(f"Game Complete! Final Score: {state['score']}")
-        st.markdown(f"Hints used: {state['hints_used']}")
+        st.success(f"Game Complete! Final Score: {learner.transform_score}")
+        st.markdown(f"Hints used: {learner.transform_hints}")
         if st.button("🔄 Play Again"):
-            st.session_state.transform_game = {
-                'current_round': 0,
-                'score': 0,
-                'hints_used': 0
-            }
+            learner.reset_transform_game()
+            learner.next_attempt("transform")
             st.rerun()
 
+@profiled
 def show_games():
     st.header("Logic Games & Exercises")
-    st.markdown(f"### Current Game Score: {st.session_state.score}")
+    st.markdown(f"### Current Game Score: {st.session_state.learner.score}")
     game_choice = st.selectbox(
         "Choose a game:",
         ["Truth Table Challenge", "Logic Puzzle", "Connective Match", "Conditional Transformation"]
@@ -746,47 +882,51 @@ def show_games():
 
 # ---------- PROGRESS DASHBOARD ----------
 
+@profiled
 def show_progress():
     st.header("Learning Progress Dashboard")
-    col1, col2, col3 = st.columns(3)
+    metrics = st.session_state.metrics
+    col1, col2, col3, col4 = st.columns(4)
     with col1:
-        st.metric("Total Score", st.session_state.score)
+        st.metric("Total Score", st.session_state.learner.score)
     with col2:
-        quiz_completion = sum(st.session_state.quiz_progress.values()) / 15 * 100
-        st.metric("Quiz Completion", f"{quiz_completion:.1f}%")
+        st.metric("Quiz Completion", f"{metrics.quiz_completion * 100:.1f}%")
     with col3:
-        game_completion = sum(st.session_state.game_progress.values()) / 9 * 100
-        st.metric("Game Completion", f"{game_completion:.1f}%")
+        st.metric("Game Completion", f"{metrics.game_completion * 100:.1f}%")
+    with col4:
+        st.metric("Puzzles Solved", metrics.game_counts.get("generated_puzzle", 0))
 
     st.subheader("Learning Path Progress")
-    learning_objectives = [
-        ("Basic Concepts & Definitions", "propositional_basics"),
-        ("Logical Connectives", "connectives"),
-        ("Truth Tables", "truth_tables"),
-        ("Conditional Statements", "conditionals"),
-        ("Converse, Inverse & Contrapositive", "converse_inverse")
-    ]
-    for objective, key in learning_objectives:
-        status = "✅ Completed" if st.session_state.learning_path[key] else "📚 In Progress"
+    for objective, key in content.LEARNING_OBJECTIVES:
+        status = "✅ Completed" if st.session_state.learner.topic_done(key) else "📚 In Progress"
         st.markdown(f"- {objective}: {status}")
 
     st.subheader("Common Error Patterns")
-    if st.session_state.error_tracking:
+    if st.session_state.learner.errors:
         st.markdown("Areas where you've made repeated errors:")
-        for error, count in list(st.session_state.error_tracking.items())[:5]:
-            if count > 1:
-                st.warning(f"❌ {error.replace('error_', '')}: {count} errors")
+        feedback = get_feedback_index()
+        for error, count in metrics.top_errors(5):
+            st.warning(f"❌ {feedback.error_label(error)}: {count} errors")
     else:
         st.info("No repeated errors detected! Keep up the good work!")
 
     st.subheader("Learning Recommendations")
     recommendations = []
-    if not st.session_state.learning_path["converse_inverse"]:
-        recommendations.append("Practice converting between conditionals and their related forms")
-    if st.session_state.quiz_progress["beginner"] < 3:
-        recommendations.append("Complete more beginner quizzes to strengthen fundamentals")
-    if not st.session_state.learning_path["truth_tables"]:
-        recommendations.append("Work on truth table exercises for better logical intuition")
+    scheduler = get_scheduler()
+    for mastery, level, topic in scheduler.weakest_topics():
+        recommendations.append(
+            f"Practice {level} questions on {topic.replace('_', ' ')} (estimated mastery {mastery:.0%})"
+        )
+    due = sum(scheduler.due_reviews(level) for level in LEVELS)
+    if due:
+        recommendations.append(f"Review {due} missed question(s) in Adaptive Practice")
+    next_chapter = next(
+        (objective for objective, key in content.LEARNING_OBJECTIVES
+         if not st.session_state.learner.topic_done(key)),
+        None
+    )
+    if next_chapter:
+        recommendations.append(f"Work through the {next_chapter} chapter")
     if recommendations:
         for rec in recommendations:
             st.markdown(f"📋 {rec}")
@@ -795,6 +935,7 @@ def show_progress():
 
 # ---------- HOME PAGE ----------
 
+@profiled
 def show_home():
     st.header("Welcome to the Logical Reasoning Tutor! 🧠")
     st.markdown("""
@@ -820,17 +961,38 @@ def show_home():
             st.rerun()
 
     st.markdown("### 📚 Additional Resources")
-    resources = [
-        ("Stanford Introduction to Logic", "https://online.stanford.edu/courses/soe-y0001-logic-introduction-logic"),
-        ("Khan Academy Logic Courses", "https://www.khanacademy.org/math/algebra/x2f8bb11595b61c86:logic"),
-        ("Internet Encyclopedia of Philosophy - Logic", "https://iep.utm.edu/logic/"),
-        ("Wikipedia - Propositional Calculus", "https://en.wikipedia.org/wiki/Propositional_calculus")
-    ]
-    for name, url in resources:
+    for name, url in content.RESOURCES:
         st.markdown(f"- [{name}]({url})")
 
+# ---------- RENDER COSTS ----------
+
+def show_render_costs():
+    # Admin panel, only present when LOGIC_TUTOR_PROFILE is set. Figures cover
+    # the reruns still in the ring buffer, across every session of this process.
+    with st.sidebar.expander("⏱️ Render costs"):
+        summary = PROFILER.summary()
+        if not summary:
+            st.caption("No reruns recorded yet.")
+            return
+        st.caption(f"{len(PROFILER.records)} records from the last reruns "
+                   f"(buffer holds {PROFILER.records.maxlen}). Memory is left blank for views "
+                   f"that rendered while another session was rerunning.")
+        st.dataframe(summary, hide_index=True)
+        st.caption("Shared result caches")
+        st.dataframe(cache_stats(), hide_index=True)
+        st.download_button(
+            "Export JSON lines",
+            PROFILER.export_jsonl(),
+            file_name="render_costs.jsonl",
+            mime="application/json"
+        )
+        if st.button("Clear", key="render_costs_clear"):
+            PROFILER.clear()
+            st.rerun()
+
 # ---------- MAIN APP ----------
 
+@profiled
 def main():
     initialize_session_state()
     st.title("🧠 Logical Reasoning Tutor")
@@ -851,19 +1013,22 @@ def main():
         ],
         key="nav_radio"
     )
+    if page != st.session_state.get('page'):
+        leave_page()
     st.session_state.page = page
 
     st.sidebar.markdown("---")
-    st.sidebar.markdown(f"### Current Score: {st.session_state.score}")
+    st.sidebar.markdown(f"### Current Score: {st.session_state.learner.score}")
     st.sidebar.markdown("#### Learning Progress")
-    completed = sum(1 for status in st.session_state.learning_path.values() if status)
-    total = len(st.session_state.learning_path)
-    st.sidebar.progress(completed / total if total else 0)
+    metrics = st.session_state.metrics
+    completed = metrics.topics_done
+    total = metrics.topic_total
+    st.sidebar.progress(metrics.topic_completion)
     st.sidebar.markdown(f"**{completed}/{total} topics mastered**")
 
     if completed < total:
         next_topic = next(
-            (topic for topic, status in st.session_state.learning_path.items() if not status),
+            (topic for topic, status in st.session_state.learner.learning_path().items() if not status),
             None
         )
         if next_topic:
@@ -892,10 +1057,16 @@ def main():
         )
     with col2:
         if st.button("🔄 Reset Progress"):
+            get_progress_writer().delete(get_learner_id())
             for key in list(st.session_state.keys()):
                 del st.session_state[key]
             st.rerun()
 
+    if PROFILER.enabled:
+        show_render_costs()
+
+    save_progress()
+
 if __name__ == "__main__":
     main()
 
@@ -0,0 +1,149 @@
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+
+# ---------- BACKGROUND POOL ----------
+# Expensive logic (truth tables of typed formulas, equivalence checks, proof
+# chains) runs on a small worker pool instead of the script thread, so one
+# learner's 20-variable formula does not hold up every other session's rerun.
+# The app waits a moment for each job and shows the result in the same run
+# when it is quick; otherwise it polls and reruns the page once it is done.
+#
+# Identical requests in flight share one job, whichever sessions sent them.
+# A job remembers the sessions waiting for it: when a session navigates
+# away its interest is dropped, and a job nobody waits for is cancelled if it
+# has not started yet. At most max_jobs jobs are queued or running at once.
+
+DEFAULT_WORKERS = 2
+MAX_JOBS = 64
+
+
+class PoolBusy(RuntimeError):
+    pass
+
+
+class BackgroundPool:
+    def __init__(self, workers=DEFAULT_WORKERS, mode="process", max_jobs=MAX_JOBS):
+        # mode "process" for CPU-bound work, "thread", or "inline" to run each
+        # job in the caller (no pool at all).
+        if mode == "process":
+            # Spawned rather than forked: the app process has threads running.
+            self.executor = ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("spawn"))
+        elif mode == "thread":
+            self.executor = ThreadPoolExecutor(workers, thread_name_prefix="background")
+        elif mode == "inline":
+            self.executor = None
+        else:
+            raise ValueError(f"Unknown background mode '{mode}'")
+        self.max_jobs = max_jobs
+        self.lock = threading.Lock()
+        # key -> (future, owners)
+        self.jobs = {}
+        self.stats = {"submitted": 0, "coalesced": 0, "cancelled": 0}
+
+    def submit(self, owner, key, func, *args):
+        # key names the work ("counterexample", left, right); func and args
+        # must be picklable for a process pool.
+        if self.executor is None:
+            return _run_inline(func, *args)
+        with self.lock:
+            job = self.jobs.get(key)
+            if job is not None and not job[0].cancelled():
+                job[1].add(owner)
+                self.stats["coalesced"] += 1
+                return job[0]
+            if len(self.jobs) >= self.max_jobs:
+                raise PoolBusy(f"{len(self.jobs)} background jobs already waiting")
+            future = self.executor.submit(func, *args)
+            self.jobs[key] = (future, {owner})
+            self.stats["submitted"] += 1
+        future.add_done_callback(lambda done: self._finished(key, done))
+        return future
+
+    def _finished(self, key, future):
+        with self.lock:
+            job = self.jobs.get(key)
+            if job is not None and job[0] is future:
+                del self.jobs[key]
+
+    def release(self, owner, key=None):
+        # Drops owner's interest in one job, or in all of them.
+        orphaned = []
+        with self.lock:
+            for job_key in [key] if key is not None else list(self.jobs):
+                job = self.jobs.get(job_key)
+                if job is None:
+                    continue
+                job[1].discard(owner)
+                if not job[1]:
+                    orphaned.append(job[0])
+        # Outside the lock: cancel() runs _finished, which removes the job.
+        cancelled = sum(future.cancel() for future in orphaned)
+        with self.lock:
+            self.stats["cancelled"] += cancelled
+
+    def close(self):
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+def _run_inline(func, *args):
+    future = Future()
+    try:
+        future.set_result(func(*args))
+    except Exception as e:
+        future.set_exception(e)
+    return future
+
+
+def open_background_pool(mode=None, workers=None):
+    # LOGIC_TUTOR_BACKGROUND picks "process" (default), "thread" or "inline";
+    # LOGIC_TUTOR_BACKGROUND_WORKERS the pool size.
+    mode = mode or os.environ.get("LOGIC_TUTOR_BACKGROUND", "process")
+    if workers is None:
+        workers = int(os.environ.get("LOGIC_TUTOR_BACKGROUND_WORKERS", DEFAULT_WORKERS))
+    return BackgroundPool(workers, mode)
+
+
+# ---------- TASKS ----------
+# Module-level so worker processes can import them. Arguments and results
+# are plain text, tuples and dicts.
+
+def truth_table_task(expression, variables, limit):
+    from logic_engine import TruthTable, compile_formula, count_true
+
+    outputs = {}
+    if expression:
+        compiled = compile_formula(expression)
+        variables = tuple(variables) + tuple(var for var in compiled.variables if var not in variables)
+        outputs[compiled.text] = compiled
+    table = TruthTable(variables)
+    outputs = {label: compiled.evaluate(table) for label, compiled in outputs.items()}
+    return {
+        "rows": table.num_rows,
+        "counts": {label: count_true(mask) for label, mask in outputs.items()},
+        "columns": table.to_columns(outputs, limit=limit),
+    }
+
+
+def counterexample_task(left, right):
+    # (readable, row where the two formulas differ or None). The BDD kernel
+    # handles any number of variables without building a truth table.
+    import bdd
+    from logic_engine import FormulaError, parse_formula
+
+    try:
+        return True, bdd.counterexample(parse_formula(left.strip()), parse_formula(right.strip()))
+    except FormulaError:
+        return False, None
+
+
+def proof_task(start, lines, answer):
+    # (one (ok, law or reason) per line, whether the last line is the answer).
+    from grading import grade_formula
+    from proof_checker import get_proof_checker
+
+    results = get_proof_checker().check_chain(start, lines)
+    complete = all(ok for ok, _ in results) and grade_formula(lines[-1], answer, simplified=True)[0]
+    return results, complete
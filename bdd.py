@@ -0,0 +1,217 @@
+import threading
+import weakref
+
+from logic_engine import formula_variables, make_node
+
+# ---------- BDD KERNEL ----------
+# Reduced ordered binary decision diagrams. A node is an int id into three
+# parallel lists (level, low, high); ids 0 and 1 are the FALSE and TRUE
+# terminals. The unique table hands out one id per (level, low, high), so two
+# formulas are equivalent exactly when they build the same id, and every
+# connective is one memoized if-then-else (ite). Answers for formulas with
+# dozens of variables take time proportional to the diagram, not to 2^n rows.
+#
+# One kernel per process is shared by all sessions behind a lock; node ids
+# never leave this module, so the kernel can start over once it grows past
+# MAX_NODES nodes, MAX_ITE_ENTRIES memoized ites or MAX_VARIABLES variables.
+# The built ids are keyed weakly by formula, so the kernel never keeps a
+# formula alive in the intern table.
+
+FALSE_ID = 0
+TRUE_ID = 1
+TERMINAL_LEVEL = 1 << 30
+MAX_NODES = 500_000
+MAX_ITE_ENTRIES = 1_000_000
+MAX_VARIABLES = 10_000
+
+
+class BDD:
+    def __init__(self):
+        self.levels = [TERMINAL_LEVEL, TERMINAL_LEVEL]
+        self.lows = [FALSE_ID, TRUE_ID]
+        self.highs = [FALSE_ID, TRUE_ID]
+        self.unique = {}
+        self.ite_cache = {}
+        self.built = weakref.WeakKeyDictionary()
+        self.variable_levels = {}
+        self.level_names = []
+
+    def __len__(self):
+        return len(self.levels)
+
+    def node(self, level, low, high):
+        if low == high:
+            return low
+        key = (level, low, high)
+        node = self.unique.get(key)
+        if node is None:
+            node = len(self.levels)
+            self.levels.append(level)
+            self.lows.append(low)
+            self.highs.append(high)
+            self.unique[key] = node
+        return node
+
+    def variable(self, name):
+        level = self.variable_levels.get(name)
+        if level is None:
+            # Levels follow first use; formula_variables() puts p, q, r, ... first.
+            level = self.variable_levels[name] = len(self.level_names)
+            self.level_names.append(name)
+        return self.node(level, FALSE_ID, TRUE_ID)
+
+    def _cofactors(self, node, level):
+        if self.levels[node] == level:
+            return self.lows[node], self.highs[node]
+        return node, node
+
+    def ite(self, f, g, h):
+        # if f then g else h
+        if f == TRUE_ID:
+            return g
+        if f == FALSE_ID:
+            return h
+        if g == h:
+            return g
+        if g == TRUE_ID and h == FALSE_ID:
+            return f
+        key = (f, g, h)
+        result = self.ite_cache.get(key)
+        if result is not None:
+            return result
+        level = min(self.levels[f], self.levels[g], self.levels[h])
+        f0, f1 = self._cofactors(f, level)
+        g0, g1 = self._cofactors(g, level)
+        h0, h1 = self._cofactors(h, level)
+        result = self.node(level, self.ite(f0, g0, h0), self.ite(f1, g1, h1))
+        self.ite_cache[key] = result
+        return result
+
+    def negate(self, f):
+        return self.ite(f, FALSE_ID, TRUE_ID)
+
+    def apply(self, op, f, g):
+        if op == "and":
+            return self.ite(f, g, FALSE_ID)
+        if op == "or":
+            return self.ite(f, TRUE_ID, g)
+        if op == "implies":
+            return self.ite(f, g, TRUE_ID)
+        if op == "iff":
+            return self.ite(f, g, self.negate(g))
+        if op == "xor":
+            return self.ite(f, self.negate(g), g)
+        raise ValueError(f"unknown connective {op!r}")
+
+    def build(self, formula):
+        # Formula nodes are interned, so shared subformulas are built once.
+        node = self.built.get(formula)
+        if node is not None:
+            return node
+        if formula.op == "var":
+            node = self.variable(formula.name)
+        elif formula.op == "const":
+            node = TRUE_ID if formula.name else FALSE_ID
+        elif formula.op == "not":
+            node = self.negate(self.build(formula.args[0]))
+        else:
+            left, right = formula.args
+            node = self.apply(formula.op, self.build(left), self.build(right))
+        self.built[formula] = node
+        return node
+
+    def sat_count(self, node):
+        # Satisfying assignments over every variable the kernel knows.
+        total_levels = len(self.level_names)
+        counts = {FALSE_ID: 0, TRUE_ID: 1}
+
+        def count(n):
+            # Number of assignments to levels[n]..total_levels-1 reaching TRUE.
+            if n not in counts:
+                level = self.levels[n]
+                counts[n] = sum(
+                    count(child) << (min(self.levels[child], total_levels) - level - 1)
+                    for child in (self.lows[n], self.highs[n])
+                )
+            return counts[n]
+
+        if node in (FALSE_ID, TRUE_ID):
+            return node << total_levels
+        return count(node) << self.levels[node]
+
+    def any_sat(self, node):
+        # One satisfying assignment (variables on the path only), or None.
+        if node == FALSE_ID:
+            return None
+        assignment = {}
+        while node != TRUE_ID:
+            name = self.level_names[self.levels[node]]
+            if self.lows[node] != FALSE_ID:
+                assignment[name] = False
+                node = self.lows[node]
+            else:
+                assignment[name] = True
+                node = self.highs[node]
+        return assignment
+
+
+_LOCK = threading.Lock()
+_KERNEL = BDD()
+
+
+def _kernel():
+    global _KERNEL
+    if (len(_KERNEL) > MAX_NODES or len(_KERNEL.ite_cache) > MAX_ITE_ENTRIES
+            or len(_KERNEL.level_names) > MAX_VARIABLES):
+        _KERNEL = BDD()
+    return _KERNEL
+
+
+def _build(kernel, formula):
+    for name in formula_variables(formula):
+        kernel.variable(name)
+    return kernel.build(formula)
+
+
+# ---------- QUERIES ----------
+# All take interned Formula nodes (logic_engine.parse_formula).
+
+def equivalent(left, right):
+    if left is right:
+        return True
+    with _LOCK:
+        kernel = _kernel()
+        return _build(kernel, left) == _build(kernel, right)
+
+
+def is_tautology(formula):
+    with _LOCK:
+        return _build(_kernel(), formula) == TRUE_ID
+
+
+def is_satisfiable(formula):
+    with _LOCK:
+        return _build(_kernel(), formula) != FALSE_ID
+
+
+def satisfying_assignment(formula):
+    # A full assignment of the formula's variables that makes it true, or None.
+    with _LOCK:
+        kernel = _kernel()
+        assignment = kernel.any_sat(_build(kernel, formula))
+    if assignment is None:
+        return None
+    return {name: assignment.get(name, False) for name in formula_variables(formula)}
+
+
+def counterexample(left, right):
+    # An assignment on which the two formulas differ, or None if equivalent.
+    return satisfying_assignment(make_node("xor", left, right))
+
+
+def model_count(formula):
+    # Satisfying assignments of the formula's own variables.
+    with _LOCK:
+        kernel = _kernel()
+        node = _build(kernel, formula)
+        return kernel.sat_count(node) >> (len(kernel.level_names) - len(formula.variables))
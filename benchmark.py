@@ -0,0 +1,399 @@
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+# ---------- SESSION BENCHMARK ----------
+# Drives appLu.py headlessly with Streamlit's AppTest. Every simulated session
+# walks the same learner journey (home, a Learn chapter, a quiz, the truth
+# table game, the dashboard); sessions advance one step at a time in turn, so
+# with N sessions all N are alive at once, as they would be on a server.
+# Latency is measured with tracemalloc off; peak memory comes from a second
+# pass with it on, since tracing slows every allocation down.
+
+APP_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "appLu.py")
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmarks", "baseline.json")
+DEFAULT_STARTUP_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmarks", "startup.json")
+DEFAULT_SESSIONS = (1, 50, 500)
+PERCENTILES = (50, 90, 95, 99)
+
+
+def _configure_environment():
+    # Keep the benchmark off the real progress database and attempt log.
+    os.environ.setdefault("LOGIC_TUTOR_PROGRESS_BACKEND", "memory")
+    os.environ.setdefault("LOGIC_TUTOR_ATTEMPT_LOG", "off")
+
+
+def _navigate(page):
+    def step(at, rng):
+        at.sidebar.radio(key="nav_radio").set_value(page)
+    return page, step
+
+
+def _learn_chapter(at, rng):
+    at.selectbox[0].set_value("Truth Tables")
+
+
+def _quiz_level(at, rng):
+    at.radio[0].set_value("Beginner")
+
+
+def _answer_question(index):
+    def step(at, rng):
+        from question_bank import get_question_bank
+        question_id = at.session_state["learner"].quiz_sets["beginner"][index]
+        question = get_question_bank().get(question_id)
+        # Learners get roughly two answers in three right.
+        choice = question["correct"] if rng.random() < 0.67 else rng.randrange(len(question["options"]))
+        at.radio(key=f"quiz_beginner_{question_id}").set_value(question["options"][choice])
+        at.button(key=f"check_btn_beginner_{question_id}").click()
+    return step
+
+
+def _play_truth_table(at, rng):
+    at.selectbox[0].set_value("Truth Table Challenge")
+
+
+def _submit_truth_table(at, rng):
+    for widget in at.selectbox:
+        if widget.key and widget.key.startswith("tt_ans_"):
+            widget.set_value(rng.choice(["True", "False"]))
+    at.button[0].click()
+
+
+# (page, action) pairs; the page labels the rerun the action triggers.
+JOURNEY = (
+    ("Home", None),
+    _navigate("Learn Propositional Logic"),
+    ("Learn Propositional Logic", _learn_chapter),
+    _navigate("Practice Quizzes"),
+    ("Practice Quizzes", _quiz_level),
+    ("Practice Quizzes", _answer_question(0)),
+    ("Practice Quizzes", _answer_question(1)),
+    _navigate("Logic Games & Exercises"),
+    ("Logic Games & Exercises", _play_truth_table),
+    ("Logic Games & Exercises", _submit_truth_table),
+    _navigate("Learning Progress Dashboard"),
+)
+
+
+def _percentile(sorted_values, percent):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, int(len(sorted_values) * percent / 100))
+    return sorted_values[index]
+
+
+def run_journeys(sessions, seed=0, timeout=60, trace_memory=False):
+    from streamlit.testing.v1 import AppTest
+
+    rng = random.Random(seed)
+    apps = []
+    latencies = {}
+    peaks = {}
+    if trace_memory:
+        tracemalloc.start()
+        baseline_memory = tracemalloc.get_traced_memory()[0]
+    for _ in range(sessions):
+        apps.append((AppTest.from_file(APP_PATH, default_timeout=timeout), random.Random(rng.random())))
+
+    for page, action in JOURNEY:
+        for at, session_rng in apps:
+            if action is not None:
+                action(at, session_rng)
+            if trace_memory:
+                before = tracemalloc.get_traced_memory()[0]
+                tracemalloc.reset_peak()
+            started = time.perf_counter()
+            at.run()
+            elapsed = time.perf_counter() - started
+            if at.exception:
+                raise RuntimeError(f"{page}: {at.exception[0].value}")
+            latencies.setdefault(page, []).append(elapsed)
+            if trace_memory:
+                peak = tracemalloc.get_traced_memory()[1] - before
+                peaks[page] = max(peaks.get(page, 0), peak)
+
+    result = {"pages": {}}
+    for page, values in latencies.items():
+        values.sort()
+        stats = {"reruns": len(values), "max_ms": round(values[-1] * 1000, 2)}
+        for percent in PERCENTILES:
+            stats[f"p{percent}_ms"] = round(_percentile(values, percent) * 1000, 2)
+        result["pages"][page] = stats
+    if trace_memory:
+        retained = tracemalloc.get_traced_memory()[0] - baseline_memory
+        tracemalloc.stop()
+        for page, peak in peaks.items():
+            result["pages"][page]["peak_rerun_kb"] = round(peak / 1024, 1)
+        result["retained_kb_per_session"] = round(retained / sessions / 1024, 1)
+    return result
+
+
+def run_benchmark(session_counts=DEFAULT_SESSIONS, seed=0, memory=True, log=print):
+    _configure_environment()
+    import streamlit
+    report = {
+        "environment": {
+            "python": platform.python_version(),
+            "streamlit": streamlit.__version__,
+            "platform": platform.platform(),
+        },
+        "journey_steps": len(JOURNEY),
+        "sessions": {},
+    }
+    for sessions in session_counts:
+        log(f"{sessions} session(s): latency pass")
+        result = run_journeys(sessions, seed)
+        if memory:
+            log(f"{sessions} session(s): memory pass")
+            traced = run_journeys(sessions, seed, trace_memory=True)
+            for page, stats in traced["pages"].items():
+                result["pages"][page]["peak_rerun_kb"] = stats["peak_rerun_kb"]
+            result["retained_kb_per_session"] = traced["retained_kb_per_session"]
+        report["sessions"][str(sessions)] = result
+    return report
+
+
+# ---------- STARTUP BENCHMARK ----------
+# Time-to-first-render of show_home in a fresh interpreter, the cost every new
+# worker pays. "warm" uses the current static content artifact, "cold" makes
+# the worker build it first.
+
+STARTUP_SCRIPT = """
+import json, sys, time
+started = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+imported = time.perf_counter()
+at = AppTest.from_file(sys.argv[1], default_timeout=60).run()
+rendered = time.perf_counter()
+print(json.dumps({
+    "ok": not at.exception and any("Welcome" in header.value for header in at.header),
+    "import_streamlit_ms": (imported - started) * 1000,
+    "first_render_ms": (rendered - imported) * 1000,
+    "pandas_loaded": "pandas" in sys.modules,
+    "pyarrow_loaded": "pyarrow" in sys.modules,
+}))
+"""
+
+
+def measure_startup(runs=5, cold=False):
+    samples = []
+    for _ in range(runs):
+        env = dict(os.environ, LOGIC_TUTOR_PROGRESS_BACKEND="memory", LOGIC_TUTOR_ATTEMPT_LOG="off")
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            if cold:
+                env["LOGIC_TUTOR_STATIC_CONTENT"] = os.path.join(tmp_dir, "static_content.pickle")
+            started = time.perf_counter()
+            output = subprocess.run(
+                [sys.executable, "-c", STARTUP_SCRIPT, APP_PATH],
+                env=env, capture_output=True, text=True, check=True
+            ).stdout
+            process_ms = (time.perf_counter() - started) * 1000
+        sample = json.loads(output.strip().splitlines()[-1])
+        if not sample["ok"]:
+            raise RuntimeError("show_home did not render")
+        sample["process_ms"] = process_ms
+        samples.append(sample)
+
+    result = {"runs": runs}
+    for metric in ("import_streamlit_ms", "first_render_ms", "process_ms"):
+        values = sorted(sample[metric] for sample in samples)
+        result[f"{metric[:-3]}_p50_ms"] = round(_percentile(values, 50), 1)
+        result[f"{metric[:-3]}_max_ms"] = round(values[-1], 1)
+    result["pandas_loaded"] = any(sample["pandas_loaded"] for sample in samples)
+    result["pyarrow_loaded"] = any(sample["pyarrow_loaded"] for sample in samples)
+    return result
+
+
+def run_startup_benchmark(runs=5, log=print):
+    import streamlit
+    from static_content import write_static_content
+    write_static_content()
+    report = {
+        "environment": {
+            "python": platform.python_version(),
+            "streamlit": streamlit.__version__,
+            "platform": platform.platform(),
+        },
+        "startup": {},
+    }
+    for mode in ("warm", "cold"):
+        log(f"startup ({mode}): {runs} run(s)")
+        report["startup"][mode] = measure_startup(runs, cold=mode == "cold")
+    return report
+
+
+# ---------- QUESTION BANK BENCHMARK ----------
+# The scheduler and the bank at many times the current size: the generated
+# questions are repeated under new ids up to bank_size, so every bucket
+# grows with it. Simulated learners draw quizzes and answer them, and each
+# call is timed on its own. The state sizes are those of the learners after
+# the run and of learner_state's worst case on the large bank.
+
+DEFAULT_BANK_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmarks", "bank.json")
+DEFAULT_BANK_SIZE = 20000
+
+
+def large_bank(size):
+    from question_bank import QuestionBank, get_question_bank
+    questions = get_question_bank().questions
+    return QuestionBank(dict(questions[index % len(questions)], id=index) for index in range(size))
+
+
+def _timed(samples, name, call, *args):
+    started = time.perf_counter()
+    result = call(*args)
+    samples.setdefault(name, []).append(time.perf_counter() - started)
+    return result
+
+
+def run_bank_benchmark(bank_size=DEFAULT_BANK_SIZE, learners=50, quizzes=20, seed=0, log=print):
+    _configure_environment()
+    from learner_state import LearnerState, MEMORY_BUDGET_BYTES, state_size, worst_case_state
+    from question_bank import LEVELS
+    from scheduler import AdaptiveScheduler
+
+    log(f"building a {bank_size}-question bank")
+    started = time.perf_counter()
+    bank = large_bank(bank_size)
+    build_ms = (time.perf_counter() - started) * 1000
+
+    rng = random.Random(seed)
+    samples = {}
+    sizes = []
+    log(f"{learners} learner(s), {quizzes} quiz(zes) each")
+    for _ in range(learners):
+        state = LearnerState()
+        scheduler = AdaptiveScheduler(bank, state.adaptive, random.Random(rng.random()))
+        for _ in range(quizzes):
+            level = rng.choice(LEVELS)
+            for question in _timed(samples, "draw", scheduler.draw, level, 5):
+                _timed(samples, "record", scheduler.record, question, rng.random() < 0.67)
+            question = _timed(samples, "next_question", scheduler.next_question, level)
+            _timed(samples, "record", scheduler.record, question, rng.random() < 0.67)
+            topic = rng.choice(bank.topics(level))
+            _timed(samples, "pool", bank.pool, level, topic)
+            _timed(samples, "sample", bank.sample, level, 5, rng)
+        sizes.append(state_size(state))
+
+    result = {
+        "bank_size": bank_size,
+        "learners": learners,
+        "quizzes_per_learner": quizzes,
+        "build_ms": round(build_ms, 1),
+        "calls": {},
+        "learner_state_bytes_max": max(sizes),
+        "worst_case_state_bytes": state_size(worst_case_state(bank)),
+        "memory_budget_bytes": MEMORY_BUDGET_BYTES,
+    }
+    for name, values in samples.items():
+        values.sort()
+        stats = {"calls": len(values), "max_ms": round(values[-1] * 1000, 3)}
+        for percent in (50, 95, 99):
+            stats[f"p{percent}_ms"] = round(_percentile(values, percent) * 1000, 3)
+        result["calls"][name] = stats
+    return result
+
+
+def compare(report, baseline, tolerance=0.25):
+    # Returns the (sessions, page, metric, old, new) entries that grew by more
+    # than tolerance over the baseline.
+    regressions = []
+    for sessions, result in report["sessions"].items():
+        old_result = baseline.get("sessions", {}).get(sessions)
+        if not old_result:
+            continue
+        for page, stats in result["pages"].items():
+            old_stats = old_result["pages"].get(page, {})
+            for metric in ("p50_ms", "p95_ms", "peak_rerun_kb"):
+                old, new = old_stats.get(metric), stats.get(metric)
+                if old and new is not None and new > old * (1 + tolerance):
+                    regressions.append((sessions, page, metric, old, new))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark appLu.py reruns with simulated sessions.")
+    parser.add_argument("--sessions", type=int, nargs="+", default=list(DEFAULT_SESSIONS))
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--no-memory", action="store_true", help="skip the tracemalloc pass")
+    parser.add_argument("--out", default=DEFAULT_BASELINE, help="where to write the JSON report")
+    parser.add_argument("--compare", help="baseline JSON to check the new report against")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    parser.add_argument("--startup", action="store_true",
+                        help="measure cold-start time to the first render of show_home instead")
+    parser.add_argument("--runs", type=int, default=5, help="fresh processes per startup mode")
+    parser.add_argument("--bank-size", type=int, nargs="?", const=DEFAULT_BANK_SIZE,
+                        help="time the scheduler and the question bank on a bank of this many questions instead")
+    parser.add_argument("--learners", type=int, default=50, help="simulated learners for --bank-size")
+    args = parser.parse_args(argv)
+
+    if args.bank_size:
+        report = run_bank_benchmark(args.bank_size, args.learners, seed=args.seed,
+                                    log=lambda message: print(message, file=sys.stderr))
+        out = args.out if args.out != DEFAULT_BASELINE else DEFAULT_BANK_BASELINE
+        os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+        with open(out, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"{report['bank_size']} questions, bank built in {report['build_ms']} ms")
+        for name, stats in report["calls"].items():
+            print(f"  {name:<14} p50 {stats['p50_ms']:>8} ms  p95 {stats['p95_ms']:>8} ms  max {stats['max_ms']:>8} ms")
+        print(f"  largest learner state: {report['learner_state_bytes_max']} bytes")
+        print(f"  worst-case state:      {report['worst_case_state_bytes']} bytes "
+              f"(budget {report['memory_budget_bytes']})")
+        if report["worst_case_state_bytes"] > report["memory_budget_bytes"]:
+            sys.exit(1)
+        return
+
+    if args.startup:
+        report = run_startup_benchmark(args.runs, log=lambda message: print(message, file=sys.stderr))
+        out = args.out if args.out != DEFAULT_BASELINE else DEFAULT_STARTUP_BASELINE
+        os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+        with open(out, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+            f.write("\n")
+        for mode, stats in report["startup"].items():
+            print(f"{mode:<5} first render p50 {stats['first_render_p50_ms']} ms, "
+                  f"process p50 {stats['process_p50_ms']} ms, pandas loaded: {stats['pandas_loaded']}")
+        return
+
+    # Read before the run: --out may be the same file, and the new report
+    # must be compared with the old one, not with itself.
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+
+    report = run_benchmark(args.sessions, args.seed, memory=not args.no_memory,
+                           log=lambda message: print(message, file=sys.stderr))
+    os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+    for sessions, result in report["sessions"].items():
+        print(f"\n{sessions} session(s)")
+        for page, stats in result["pages"].items():
+            memory = f"  peak {stats['peak_rerun_kb']} KB" if "peak_rerun_kb" in stats else ""
+            print(f"  {page:<30} p50 {stats['p50_ms']:>8} ms  p95 {stats['p95_ms']:>8} ms{memory}")
+        if "retained_kb_per_session" in result:
+            print(f"  retained per session: {result['retained_kb_per_session']} KB")
+
+    if baseline is not None:
+        regressions = compare(report, baseline, args.tolerance)
+        for sessions, page, metric, old, new in regressions:
+            print(f"REGRESSION {sessions} session(s) {page} {metric}: {old} -> {new}")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+import collections
+import functools
+import re
+
+# ---------- CONDITIONAL NORMALIZER ----------
+# Reads a conditional written in English or in symbols into its structure:
+# Conditional(antecedent, consequent), each side a Clause of content words
+# and a polarity (False when the clause is negated). The forms read are
+#   if P then Q / if P, Q / Q if P / Q when(ever) P    P → Q
+#   P only if Q                                        P → Q
+#   P is sufficient (enough) for Q                     P → Q
+#   Q is necessary for P                               P → Q
+#   Q unless P                                         ¬P → Q
+#   P → Q, P -> Q, P implies Q, have_license => can_drive
+# with negations (not, no, never, isn't, don't, ¬, ~). The patterns are
+# compiled once and a sentence is read with a handful of regex matches.
+#
+# Answers are graded by structure, not by string: each side of the answer is
+# matched to a part of the reference statement through a word index (content
+# words, lightly stemmed, stop words dropped), so "If it isn't hot it's not
+# summer" and "if it is not hot, then it is not summer" are the same answer,
+# and relation() names how the answer relates to the reference.
+
+Clause = collections.namedtuple("Clause", "words positive")
+Conditional = collections.namedtuple("Conditional", "antecedent consequent")
+
+RELATIONS = ("same", "converse", "inverse", "contrapositive")
+
+STOP_WORDS = frozenset(
+    "a an the it its is are was were be been being am i you your we they he she him her them "
+    "there then that this these those to by of will would shall can could should must may might "
+    "do does did have has had one someone something also".split()
+)
+NEGATIONS = frozenset(("not", "no", "never"))
+
+_CONTRACTIONS = (
+    (re.compile(r"\bcan't\b|\bcannot\b"), "can not"),
+    (re.compile(r"\bwon't\b"), "will not"),
+    (re.compile(r"n't\b"), " not"),
+    (re.compile(r"'ll\b"), " will"),
+    (re.compile(r"'re\b"), " are"),
+    (re.compile(r"'s\b"), " is"),
+)
+_ARROW = re.compile(r"->|=>|⇒|⟹|→")
+_NOT_SIGN = re.compile(r"[¬~!]")
+_NOISE = re.compile(r"[^\w\s,→]")
+_SPACES = re.compile(r"\s+")
+
+# (pattern, antecedent is negated), tried in order: "only if" before "if".
+_PATTERNS = tuple((re.compile(pattern), negated) for pattern, negated in (
+    (r"^if (?P<a>.+?),? then (?P<c>.+)$", False),
+    (r"^(?:if|when|whenever) (?P<a>[^,]+), (?P<c>.+)$", False),
+    # "if P Q" with no comma: Q starts at the last subject.
+    (r"^(?:if|when|whenever) (?P<a>.+) (?P<c>(?:it|you|we|they|he|she|i|there) .+)$", False),
+    (r"^(?:if|when|whenever) (?P<a>.+) (?P<c>(?:the|a|an) .+)$", False),
+    (r"^(?P<a>.+?),? only if (?P<c>.+)$", False),
+    (r"^(?P<c>.+?),? (?:if|when|whenever|provided that|given that) (?P<a>.+)$", False),
+    (r"^(?P<a>.+?) (?:is|are) (?:a )?(?:sufficient|enough)(?: condition)? for (?P<c>.+)$", False),
+    (r"^(?P<c>.+?) (?:is|are) (?:a )?necessary(?: condition)? for (?P<a>.+)$", False),
+    (r"^unless (?P<a>[^,]+), (?P<c>.+)$", True),
+    (r"^(?P<c>.+?),? unless (?P<a>.+)$", True),
+    (r"^(?P<a>.+?) (?:→|implies) (?P<c>.+)$", False),
+))
+
+
+def normalize(text):
+    text = text.lower().replace("’", "'").replace("_", " ")
+    for pattern, replacement in _CONTRACTIONS:
+        text = pattern.sub(replacement, text)
+    text = _ARROW.sub(" → ", text)
+    text = _NOT_SIGN.sub(" not ", text)
+    text = _NOISE.sub(" ", text)
+    return _SPACES.sub(" ", text).strip(" ,")
+
+
+def _stem(word):
+    if word.endswith(("ies", "ied")) and len(word) > 4:
+        word = word[:-3] + "y"
+    else:
+        for suffix in ("ing", "ed", "es", "s"):
+            if word.endswith(suffix) and len(word) - len(suffix) >= 3 and not word.endswith("ss"):
+                word = word[:-len(suffix)]
+                break
+    return word[:-1] if word.endswith("e") and len(word) > 3 else word
+
+
+def read_clause(text, positive=True):
+    # Clause, or None when nothing but stop words is left.
+    words = set()
+    for token in text.replace(",", " ").split():
+        if token in NEGATIONS:
+            positive = not positive
+        elif token not in STOP_WORDS:
+            words.add(_stem(token))
+    return Clause(frozenset(words), positive) if words else None
+
+
+@functools.lru_cache(maxsize=4096)
+def read_conditional(text):
+    # Conditional, or None when the text is not a conditional this reads.
+    text = normalize(text)
+    for pattern, negated in _PATTERNS:
+        match = pattern.match(text)
+        if match:
+            antecedent = read_clause(match.group("a"), not negated)
+            consequent = read_clause(match.group("c"))
+            if antecedent and consequent:
+                return Conditional(antecedent, consequent)
+    return None
+
+
+class PartIndex:
+    # word -> part (0 for the reference's antecedent, 1 for its consequent).
+    # Words found in both parts say nothing and are left out. Clauses of
+    # other wordings of the reference (the English sentence behind a
+    # formula) add their words to the part they match.
+    def __init__(self, reference, *others):
+        self.parts = (set(reference.antecedent.words), set(reference.consequent.words))
+        self._build()
+        for clause in [clause for other in others for clause in other]:
+            part = self.part_of(clause)
+            if part is not None:
+                self.parts[part].update(clause.words)
+        self._build()
+
+    def _build(self):
+        self.index = {}
+        for part, words in enumerate(self.parts):
+            for word in words:
+                self.index[word] = part if self.index.get(word, part) == part else None
+        self.sizes = [max(1, sum(self.index[word] == part for word in words))
+                      for part, words in enumerate(self.parts)]
+
+    def part_of(self, clause):
+        # The part whose words the clause uses most (at least half of
+        # them), or None when neither or both fit.
+        hits = [0, 0]
+        for word in clause.words:
+            part = self.index.get(word)
+            if part is not None:
+                hits[part] += 1
+        scores = [hits[0] / self.sizes[0], hits[1] / self.sizes[1]]
+        if scores[0] == scores[1] or max(scores) < 0.5:
+            return None
+        return 0 if scores[0] > scores[1] else 1
+
+
+@functools.lru_cache(maxsize=1024)
+def part_index(reference, *others):
+    # PartIndex for a reference text, or None when it is not a conditional.
+    conditional = read_conditional(reference)
+    if conditional is None:
+        return None
+    return PartIndex(conditional, *filter(None, map(read_conditional, others)))
+
+
+def relation(answer, reference, *others):
+    # How answer relates to reference: one of RELATIONS, "other" (the right
+    # parts with the wrong negations), "unmatched" (parts not recognised) or
+    # "unreadable" (not a conditional). others are other wordings of the
+    # reference whose words also identify its parts.
+    index = part_index(reference, *others)
+    conditional = read_conditional(answer)
+    if conditional is None or index is None:
+        return "unreadable"
+    parts = (index.part_of(conditional.antecedent), index.part_of(conditional.consequent))
+    if None in parts or parts[0] == parts[1]:
+        return "unmatched"
+    expected = read_conditional(reference)
+    if parts == (0, 1):
+        first, second = expected
+    else:
+        second, first = expected
+    kept = (conditional.antecedent.positive == first.positive, conditional.consequent.positive == second.positive)
+    if kept == (True, True):
+        return "same" if parts == (0, 1) else "converse"
+    if kept == (False, False):
+        return "inverse" if parts == (0, 1) else "contrapositive"
+    return "other"
@@ -0,0 +1,26 @@
+from content_packs import current_pack
+from logic_engine import compile_formula
+
+# ---------- LEARN CONTENT REGISTRY ----------
+# Learn, quiz and game content comes from the content packs (content_packs.py,
+# content_packs/*.json). Each UPPERCASE name here reads the matching section
+# of the current pack version, so an edited pack shows up on the next rerun
+# without a deploy. Sections are frozen and shared by every session: dicts are
+# read-only mappings and lists are tuples.
+
+
+def __getattr__(name):
+    if name.isupper():
+        try:
+            return current_pack().sections[name.lower()]
+        except KeyError:
+            pass
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def connective_table(formula_text):
+    # Connective tables list T..T first, the way textbooks print them. They are
+    # built into the precompiled static content (static_content.py), not at import.
+    compiled = compile_formula(formula_text)
+    table, outputs = compiled.truth_table(true_first=True)
+    return table.to_columns({compiled.text: outputs})
@@ -0,0 +1,349 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from types import MappingProxyType
+
+import bdd
+from conditionals import relation
+from logic_engine import FormulaError, compile_formula, format_formula, parse_formula
+from question_bank import BASE_POINTS, LEVELS
+
+# ---------- CONTENT PACKS ----------
+# Learn, quiz and game content lives in JSON content packs rather than in
+# code. The core pack ships in content_packs/; instructors can add packs in
+# further directories (LOGIC_TUTOR_CONTENT_PACKS, separated by os.pathsep)
+# without a code deploy. Packs are validated once per version and shared by
+# every session; the version is a hash of the pack files, and a change to any
+# of them is picked up without restarting (checked at most every
+# RELOAD_CHECK_SECONDS, by file stat first). A pack that fails validation is
+# reported and the previous version keeps serving. Validation includes the
+# logic itself: every equivalence law and worked step is proven with the BDD
+# kernel, so a mistyped law never reaches a learner.
+#
+# Pack format:
+#   {"pack": "<name>", "sections": {<section>: ...}, "questions": [...]}
+# List sections from later packs extend the core ones and mapping sections
+# update them; CORE_ONLY sections shape the app itself and only the core
+# pack may define them.
+
+CORE_PACK_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "content_packs")
+RELOAD_CHECK_SECONDS = 2.0
+
+logger = logging.getLogger(__name__)
+
+
+class ContentPackError(ValueError):
+    pass
+
+
+def _freeze(value):
+    # Packs are shared by all sessions: dicts become read-only mappings and lists tuples.
+    if isinstance(value, dict):
+        return MappingProxyType({key: _freeze(item) for key, item in value.items()})
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+
+# ----- validation -----
+# A spec is a type, a [spec] list of any length, a (spec, ...) fixed-length
+# array or a {key: spec} object whose keys are all required.
+
+TEXT_PAIR = (str, str)
+
+SECTION_SPECS = {
+    "learn_chapters": [str],
+    "proposition_examples": [(str, bool, str)],
+    "connective_choices": [str],
+    "connective_formulas": {},
+    "and_practice_cases": [(str, bool)],
+    "translations": [{"expression": str, "logical_form": str, "explanation": str}],
+    "related_conditionals": [TEXT_PAIR],
+    "equivalences": [TEXT_PAIR],
+    "practice_problems": [{"problem": str, "start": str, "steps": [str], "answer": str}],
+    "learning_objectives": [TEXT_PAIR],
+    "resources": [TEXT_PAIR],
+    "simplification_feedback": {},
+    "proof_feedback": {},
+    "conditional_feedback": {},
+    "truth_table_expressions": [str],
+    "logic_puzzles": [{"text": str, "options": [str], "answer": str, "success": str, "retry": str}],
+    "match_items": [TEXT_PAIR],
+    "match_choices": [str],
+    "transformations": [{"original": str, "type": str, "target": str, "hint": str}],
+    "conditionals": [(str, str, str, str)],
+}
+MAPPING_SECTIONS = {"connective_formulas", "simplification_feedback", "proof_feedback",
+                    "conditional_feedback"}
+CORE_ONLY = {"learn_chapters", "connective_choices", "connective_formulas", "learning_objectives",
+             "match_choices"}
+QUESTION_SPEC = {"level": str, "topic": str, "question": str, "options": [str], "correct": int,
+                 "explanation": str}
+TRANSFORMATION_TYPES = ("converse", "inverse", "contrapositive")
+
+
+def _check(value, spec, where):
+    if isinstance(spec, type):
+        # bool is an int subclass; keep true/false out of int fields.
+        if not isinstance(value, spec) or (spec is int and isinstance(value, bool)):
+            raise ContentPackError(f"{where}: expected {spec.__name__}, got {type(value).__name__}")
+    elif isinstance(spec, list):
+        if not isinstance(value, list):
+            raise ContentPackError(f"{where}: expected a list")
+        for index, item in enumerate(value):
+            _check(item, spec[0], f"{where}[{index}]")
+    elif isinstance(spec, tuple):
+        if not isinstance(value, list) or len(value) != len(spec):
+            raise ContentPackError(f"{where}: expected a list of {len(spec)} items")
+        for index, (item, item_spec) in enumerate(zip(value, spec)):
+            _check(item, item_spec, f"{where}[{index}]")
+    elif isinstance(spec, dict):
+        if not isinstance(value, dict):
+            raise ContentPackError(f"{where}: expected an object")
+        for key, item_spec in spec.items():
+            if key not in value:
+                raise ContentPackError(f"{where}: missing '{key}'")
+            _check(value[key], item_spec, f"{where}.{key}")
+        if not spec:
+            for key, item in value.items():
+                _check(item, str, f"{where}.{key}")
+
+
+def _check_formula(text, where):
+    try:
+        compile_formula(text)
+    except FormulaError as e:
+        raise ContentPackError(f"{where}: {e}") from None
+
+
+def _check_equivalences(text, where):
+    # "A ≡ B ≡ C" must be a chain of true equivalences; the BDD kernel checks
+    # each link and reports an assignment that breaks a wrong one.
+    try:
+        sides = [parse_formula(side.strip()) for side in text.split("≡")]
+    except FormulaError as e:
+        raise ContentPackError(f"{where}: {e}") from None
+    for left, right in zip(sides, sides[1:]):
+        row = bdd.counterexample(left, right)
+        if row is not None:
+            values = ", ".join(f"{name}={'T' if value else 'F'}" for name, value in row.items())
+            raise ContentPackError(f"{where}: {format_formula(left)} and {format_formula(right)} "
+                                   f"differ when {values}")
+
+
+def _validate_question(question, where):
+    _check(question, QUESTION_SPEC, where)
+    if question["level"] not in LEVELS:
+        raise ContentPackError(f"{where}.level: must be one of {', '.join(LEVELS)}")
+    options = question["options"]
+    if len(options) < 2 or len(set(options)) != len(options):
+        raise ContentPackError(f"{where}.options: need at least two distinct options")
+    if not 0 <= question["correct"] < len(options):
+        raise ContentPackError(f"{where}.correct: not an index into options")
+    difficulty = question.get("difficulty", 2)
+    if difficulty not in (1, 2, 3):
+        raise ContentPackError(f"{where}.difficulty: must be 1, 2 or 3")
+    for key in ("hint", "points", "error_feedback"):
+        if key in question:
+            _check(question[key], {"hint": str, "points": int, "error_feedback": {}}[key], f"{where}.{key}")
+    for option in question.get("error_feedback", {}):
+        if option not in options:
+            raise ContentPackError(f"{where}.error_feedback: '{option}' is not an option")
+
+
+def _validate_sections(sections, where):
+    for name, value in sections.items():
+        spec = SECTION_SPECS.get(name)
+        if spec is None:
+            raise ContentPackError(f"{where}.{name}: unknown section")
+        _check(value, spec, f"{where}.{name}")
+    for index, text in enumerate(sections.get("truth_table_expressions", ())):
+        _check_formula(text, f"{where}.truth_table_expressions[{index}]")
+    for key, text in sections.get("connective_formulas", {}).items():
+        _check_formula(text, f"{where}.connective_formulas.{key}")
+    for index, (name, laws) in enumerate(sections.get("equivalences", ())):
+        for line in laws.splitlines():
+            _check_equivalences(line, f"{where}.equivalences[{index}]")
+    for index, problem in enumerate(sections.get("practice_problems", ())):
+        _check_equivalences(f"{problem['start']} ≡ {problem['answer']}", f"{where}.practice_problems[{index}]")
+        for step in problem["steps"]:
+            # "Apply De Morgan's Law: ¬(p ∧ ¬q) ≡ ¬p ∨ ¬¬q"
+            _check_equivalences(step.rpartition(":")[2], f"{where}.practice_problems[{index}].steps")
+    for index, puzzle in enumerate(sections.get("logic_puzzles", ())):
+        if puzzle["answer"] not in puzzle["options"]:
+            raise ContentPackError(f"{where}.logic_puzzles[{index}].answer: not one of the options")
+    for index, item in enumerate(sections.get("transformations", ())):
+        if item["type"] not in TRANSFORMATION_TYPES:
+            raise ContentPackError(f"{where}.transformations[{index}].type: "
+                                   f"must be one of {', '.join(TRANSFORMATION_TYPES)}")
+        # Answers are graded by structure, so the target must read as its type.
+        found = relation(item["target"], item["original"])
+        if found != item["type"]:
+            raise ContentPackError(f"{where}.transformations[{index}].target: reads as '{found}', "
+                                   f"not the {item['type']}")
+    for index, item in enumerate(sections.get("translations", ())):
+        found = relation(item["logical_form"], item["expression"])
+        if found != "same":
+            raise ContentPackError(f"{where}.translations[{index}].logical_form: reads as '{found}', "
+                                   f"not the expression")
+
+
+def _merge(packs):
+    sections = {}
+    questions = []
+    for index, (where, pack) in enumerate(packs):
+        for name, value in pack.get("sections", {}).items():
+            if name in CORE_ONLY and index:
+                raise ContentPackError(f"{where}.{name}: only the core pack may define this section")
+            if name in MAPPING_SECTIONS:
+                sections.setdefault(name, {}).update(value)
+            else:
+                sections.setdefault(name, []).extend(value)
+        questions.extend(pack.get("questions", ()))
+    missing = sorted(set(SECTION_SPECS) - set(sections))
+    if missing:
+        raise ContentPackError(f"missing sections: {', '.join(missing)}")
+    match_choices = set(sections["match_choices"])
+    for index, (text, symbol) in enumerate(sections["match_items"]):
+        if symbol not in match_choices:
+            raise ContentPackError(f"match_items[{index}]: '{symbol}' is not in match_choices")
+    return sections, questions
+
+
+def _normalize_question(question):
+    # Pack questions get the same shape as generated ones (see question_bank._question).
+    level = question["level"]
+    difficulty = question.get("difficulty", 2)
+    return {
+        "level": level,
+        "topic": question["topic"],
+        "difficulty": difficulty,
+        "question": question["question"],
+        "options": list(question["options"]),
+        "correct": question["correct"],
+        "hint": question.get("hint", ""),
+        "explanation": question["explanation"],
+        "points": question.get("points", BASE_POINTS[level] + 5 * (difficulty - 1)),
+        "error_feedback": dict(question.get("error_feedback", {})),
+    }
+
+
+class ContentPack:
+    def __init__(self, version, names, sections, questions, parts=()):
+        self.version = version
+        self.names = names
+        self.sections = _freeze(sections)
+        # Plain dicts: the question bank indexes and numbers them.
+        self.questions = [_normalize_question(question) for question in questions]
+        # (conditionals, questions) each pack adds, in load order, core first:
+        # the question bank numbers each pack's questions after the packs
+        # before it (see question_bank.generate_questions).
+        self.parts = tuple(
+            (tuple(tuple(conditional) for conditional in conditionals),
+             [_normalize_question(question) for question in pack_questions])
+            for conditionals, pack_questions in parts
+        )
+
+
+def pack_dirs():
+    extra = os.environ.get("LOGIC_TUTOR_CONTENT_PACKS", "")
+    return [CORE_PACK_DIR] + [path for path in extra.split(os.pathsep) if path]
+
+
+def pack_files():
+    files = []
+    for directory in pack_dirs():
+        if os.path.isdir(directory):
+            files.extend(
+                os.path.join(directory, name) for name in sorted(os.listdir(directory))
+                if name.endswith(".json")
+            )
+    return files
+
+
+def _fingerprint(files):
+    stats = []
+    for path in files:
+        try:
+            info = os.stat(path)
+        except OSError:
+            info = None
+        stats.append((path, info and info.st_mtime_ns, info and info.st_size))
+    return tuple(stats)
+
+
+def load_packs(files=None):
+    files = pack_files() if files is None else files
+    if not files:
+        raise ContentPackError(f"no content packs found in {CORE_PACK_DIR}")
+    digest = hashlib.sha256()
+    packs = []
+    for path in files:
+        with open(path, "rb") as f:
+            data = f.read()
+        digest.update(os.path.basename(path).encode() + b"\0" + data)
+        where = os.path.basename(path)
+        try:
+            pack = json.loads(data)
+        except ValueError as e:
+            raise ContentPackError(f"{where}: not valid JSON ({e})") from None
+        _check(pack, {"pack": str}, where)
+        _validate_sections(pack.get("sections", {}), where)
+        for index, question in enumerate(pack.get("questions", [])):
+            _validate_question(question, f"{where}.questions[{index}]")
+        packs.append((where, pack))
+    sections, questions = _merge(packs)
+    parts = [(pack.get("sections", {}).get("conditionals", ()), pack.get("questions", ())) for _, pack in packs]
+    return ContentPack(digest.hexdigest()[:16], tuple(pack["pack"] for _, pack in packs), sections, questions,
+                       parts)
+
+
+class _PackCache:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.pack = None
+        self.fingerprint = None
+        self.checked = 0.0
+
+    def current(self):
+        now = time.monotonic()
+        if self.pack is not None and now - self.checked < RELOAD_CHECK_SECONDS:
+            return self.pack
+        with self.lock:
+            if self.pack is not None and now - self.checked < RELOAD_CHECK_SECONDS:
+                return self.pack
+            self.checked = now
+            files = pack_files()
+            fingerprint = _fingerprint(files)
+            if fingerprint == self.fingerprint:
+                return self.pack
+            try:
+                pack = load_packs(files)
+            except (ContentPackError, OSError) as e:
+                if self.pack is None:
+                    raise
+                logger.error("Content packs not reloaded, still serving %s: %s", self.pack.version, e)
+                pack = self.pack
+            self.fingerprint = fingerprint
+            self.pack = pack
+            return pack
+
+
+_CACHE = _PackCache()
+
+
+def current_pack():
+    return _CACHE.current()
+
+
+if __name__ == "__main__":
+    # Validates the packs the app would load, e.g. before shipping a new one.
+    try:
+        pack = load_packs()
+    except ContentPackError as e:
+        raise SystemExit(f"Invalid content pack: {e}")
+    print(f"Content packs {', '.join(pack.names)} are valid (version {pack.version}, "
+          f"{len(pack.questions)} extra questions)")
@@ -0,0 +1,95 @@
+import functools
+
+# ---------- FEEDBACK INDEX ----------
+# Every piece of answer feedback, precomputed once per content pack version
+# into lookup tables that are built into the static content artifact
+# (static_content.py) and shared by all sessions:
+#   quiz       (question id, chosen option) -> misconception text or None,
+#              one entry for every distractor of every question
+#   puzzle     (puzzle index, chosen option) -> (correct, message)
+#   match      (item index, chosen symbol) -> message for a wrong choice
+#   transform  round index -> message for a wrong answer
+# plus the markdown of each question's hint and explanation, so a render is
+# a dict lookup instead of string building. Learner error counts are keyed by
+# the question's integer id ("quiz:17"), not by a prefix of its text, which
+# several generated questions share.
+
+
+def error_key(question_id):
+    return f"quiz:{question_id}"
+
+
+def build_feedback_tables(questions, sections):
+    quiz = {}
+    hints = {}
+    explanations = {}
+    labels = {}
+    for question in questions:
+        question_id = question["id"]
+        correct = question["options"][question["correct"]]
+        error_feedback = question.get("error_feedback", {})
+        for option in question["options"]:
+            if option != correct:
+                quiz[(question_id, option)] = error_feedback.get(option)
+        hints[question_id] = f"**Hint:** {question['hint']}"
+        explanations[question_id] = (
+            f"**Question:** {question['question']}\n\n"
+            f"**Correct Answer:** {correct}\n\n"
+            f"**Explanation:** {question['explanation']}"
+        )
+        labels[error_key(question_id)] = (
+            f"{question['level'].title()} · {question['topic'].replace('_', ' ')}: {question['question']}"
+        )
+    puzzle = {}
+    for index, item in enumerate(sections["logic_puzzles"]):
+        for option in item["options"]:
+            correct = option == item["answer"]
+            puzzle[(index, option)] = (correct, item["success"] if correct else item["retry"])
+    match = {}
+    for index, (text, symbol) in enumerate(sections["match_items"]):
+        for choice in sections["match_choices"]:
+            if choice != symbol:
+                match[(index, choice)] = f"The right symbol is {symbol}"
+    transform = {
+        index: f"Expected: {item['target']}" for index, item in enumerate(sections["transformations"])
+    }
+    return {
+        "quiz": quiz, "hints": hints, "explanations": explanations, "labels": labels,
+        "puzzle": puzzle, "match": match, "transform": transform,
+    }
+
+
+class FeedbackIndex:
+    def __init__(self, tables):
+        self.tables = tables
+        self.quiz = tables["quiz"]
+        self.hints = tables["hints"]
+        self.explanations = tables["explanations"]
+        self.labels = tables["labels"]
+
+    def quiz_feedback(self, question_id, chosen):
+        return self.quiz.get((question_id, chosen))
+
+    def puzzle_feedback(self, index, chosen):
+        return self.tables["puzzle"].get((index, chosen), (False, None))
+
+    def match_feedback(self, index, chosen):
+        return self.tables["match"].get((index, chosen))
+
+    def transform_feedback(self, index):
+        return self.tables["transform"][index]
+
+    def error_label(self, key):
+        # Keys saved before error keys were question ids read "error_<level>_<text>".
+        return self.labels.get(key) or key.replace("error_", "")
+
+
+@functools.lru_cache(maxsize=4)
+def _feedback_index(version):
+    from static_content import load_static_content
+    return FeedbackIndex(load_static_content(version)["feedback"])
+
+
+def get_feedback_index():
+    from content_packs import current_pack
+    return _feedback_index(current_pack().version)
@@ -0,0 +1,322 @@
+import argparse
+import collections
+import csv
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import content
+from conditionals import relation
+from feedback import error_key, get_feedback_index
+from logic_engine import FormulaError, compile_formula, grade_formula_answer
+from puzzle_generator import DIFFICULTIES, get_puzzle_pool
+from question_bank import get_question_bank
+from result_cache import canonical_formula, get_cache
+
+# ---------- GRADING ----------
+# Grading rules for every exercise, with no Streamlit in sight: the app calls
+# these from its pages and the batch grader below calls them for exported
+# submissions, so both give the same verdicts, points and error categories.
+# Items are named the way the attempt log names them ("quiz:17",
+# "truth_table:p ∧ q", "match:2", ...). Formula verdicts and truth tables
+# come from the shared result cache (result_cache.py).
+
+PROPOSITION_POINTS = 2
+TRUTH_TABLE_POINTS = 20
+PUZZLE_POINTS = 10
+MATCH_POINTS = 5
+TRANSFORM_POINTS = 15
+
+
+def _result(item, level, topic, correct, points=0, error_category=None, feedback=None, **extra):
+    return {
+        "item": item,
+        "level": level,
+        "topic": topic,
+        "correct": correct,
+        "points": points if correct else 0,
+        "error_category": error_category,
+        "feedback": feedback,
+        **extra,
+    }
+
+
+def grade_quiz(question, chosen):
+    correct = chosen == question["options"][question["correct"]]
+    error_category = None if correct else get_feedback_index().quiz_feedback(question["id"], chosen)
+    return _result(
+        f"quiz:{question['id']}", question["level"], question["topic"], correct, question["points"],
+        error_category, error_category, error_key=None if correct else error_key(question["id"])
+    )
+
+
+def grade_proposition(index, answer):
+    # answer is "Yes" or "No": is the example a proposition?
+    example, is_proposition, explanation = content.PROPOSITION_EXAMPLES[index]
+    return _result(f"proposition:{index}", "learn", "propositional_basics",
+                   (answer == "Yes") == is_proposition, PROPOSITION_POINTS,
+                   feedback=explanation)
+
+
+def _truth_table_answers(text):
+    table, outputs = compile_formula(text).truth_table(true_first=True)
+    expected = ["True" if value else "False" for value in table.column_values(outputs)]
+    return text, table.variables, table.rows(), expected
+
+
+def truth_table_answers(expression):
+    # (formula text, variables, rows, expected "True"/"False" per row), rows T..T first.
+    text = canonical_formula(expression)
+    return get_cache("truth_tables").get_or_compute(("answers", text), _truth_table_answers, text)
+
+
+def grade_truth_table(expression, answers):
+    # answers: one "True"/"False" per row, rows listed T..T first.
+    text, variables, table_rows, expected = truth_table_answers(expression)
+    rows = [answer == value for answer, value in zip(answers, expected)]
+    rows.extend([False] * (len(expected) - len(rows)))
+    return _result(
+        f"truth_table:{text}", "game", "truth_tables", all(rows), TRUTH_TABLE_POINTS,
+        rows=rows, expected=expected
+    )
+
+
+def grade_puzzle(index, answer):
+    puzzle = content.LOGIC_PUZZLES[index]
+    correct, message = get_feedback_index().puzzle_feedback(index, answer)
+    return _result(f"puzzle:{index}", "game", "puzzle", correct, PUZZLE_POINTS,
+                   feedback=message or puzzle["retry"])
+
+
+def grade_generated_puzzle(difficulty, index, answer):
+    puzzle = get_puzzle_pool()[difficulty][index]
+    correct = answer == puzzle["answer"]
+    return _result(f"puzzle:{difficulty}/{index}", "game", puzzle["kind"], correct, puzzle["points"],
+                   feedback=puzzle["success"] if correct else puzzle["feedback"].get(answer))
+
+
+def grade_match(index, choice):
+    text, symbol = content.MATCH_ITEMS[index]
+    return _result(f"match:{index}", "game", "connectives", choice == symbol, MATCH_POINTS,
+                   feedback=get_feedback_index().match_feedback(index, choice))
+
+
+def grade_transformation(index, answer):
+    # By structure (conditionals.py): any wording that reads as the asked-for
+    # transformation of the original counts, not only the target sentence.
+    item = content.TRANSFORMATIONS[index]
+    found = relation(answer, item["original"])
+    correct = found == item["type"]
+    feedback = None
+    if not correct:
+        feedback = f"{content.CONDITIONAL_FEEDBACK[found]} {get_feedback_index().transform_feedback(index)}"
+    return _result(f"transform:{index}", "game", item["type"], correct, TRANSFORM_POINTS,
+                   error_category=None if correct else found, feedback=feedback)
+
+
+def grade_translation(index, answer):
+    # The logical form, its contrapositive or the conditional in words are
+    # right; other formulas are compared with the logical form by equivalence.
+    item = content.TRANSLATIONS[index]
+    found = relation(answer, item["logical_form"], item["expression"])
+    correct = found in ("same", "contrapositive")
+    if not correct and found in ("unreadable", "unmatched"):
+        correct = grade_formula(answer.lower(), item["logical_form"].lower())[0]
+    return _result(f"translation:{index}", "learn", "conditionals", correct,
+                   error_category=None if correct else found,
+                   feedback=None if correct else content.CONDITIONAL_FEEDBACK[found])
+
+
+def grade_formula(answer, reference, simplified=False):
+    # (correct, reason); unreadable answers are wrong rather than an error.
+    try:
+        key = (canonical_formula(answer), canonical_formula(reference), simplified)
+    except FormulaError:
+        return False, "unreadable"
+    return get_cache("verdicts").get_or_compute(key, grade_formula_answer, *key)
+
+
+def grade_practice(index, answer):
+    problem = content.PRACTICE_PROBLEMS[index]
+    correct, reason = grade_formula(answer, problem["answer"], simplified=True)
+    return _result(f"practice:{index}", "learn", "equivalences", correct,
+                   error_category=None if correct else reason,
+                   feedback=content.SIMPLIFICATION_FEEDBACK.get(reason))
+
+
+def grade_proof(index, lines):
+    from proof_checker import get_proof_checker
+    problem = content.PRACTICE_PROBLEMS[index]
+    steps = get_proof_checker().check_chain(problem["start"], lines)
+    reason = next((reason for ok, reason in steps if not ok), None)
+    if reason is None and not (lines and grade_formula(lines[-1], problem["answer"], simplified=True)[0]):
+        reason = "incomplete"
+    return _result(f"proof:{index}", "learn", "equivalences", reason is None, error_category=reason,
+                   feedback=content.PROOF_FEEDBACK.get(reason), steps=steps)
+
+
+def _index(key):
+    # Python would read "-1" as the last item; exports never mean that.
+    index = int(key)
+    if index < 0:
+        raise IndexError(f"item index {index} out of range")
+    return index
+
+
+def grade_submission(item, answer):
+    # Grades one exported answer. Truth tables take comma-separated row
+    # values, proofs one formula per line; everything else the answer text.
+    kind, _, key = item.partition(":")
+    if kind == "quiz":
+        question = get_question_bank().get(int(key))
+        if question is None:
+            raise ValueError(f"unknown question {key}")
+        return grade_quiz(question, answer)
+    if kind == "truth_table":
+        expression = content.TRUTH_TABLE_EXPRESSIONS[int(key)] if key.isdigit() else key
+        return grade_truth_table(expression, [value.strip() for value in answer.split(",")])
+    if kind == "proof":
+        return grade_proof(_index(key), [line.strip() for line in answer.splitlines() if line.strip()])
+    if kind == "puzzle" and "/" in key:
+        difficulty, _, index = key.partition("/")
+        if difficulty not in DIFFICULTIES:
+            raise ValueError(f"unknown puzzle difficulty '{difficulty}'")
+        return grade_generated_puzzle(difficulty, _index(index), answer)
+    graders = {
+        "puzzle": grade_puzzle, "match": grade_match,
+        "transform": grade_transformation, "practice": grade_practice,
+        "translation": grade_translation, "proposition": grade_proposition,
+    }
+    if kind not in graders:
+        raise ValueError(f"unknown item kind '{kind}'")
+    return graders[kind](_index(key), answer)
+
+
+# ---------- BATCH GRADING ----------
+# Streams submissions from CSV or JSON lines (columns/keys "item" and
+# "answer"; any others, such as a learner or submission id, are copied to the
+# output), grades chunks in a process pool and writes results in input order.
+# Only a bounded number of chunks is in flight, so memory does not grow with
+# the size of the export.
+
+CHUNK_SIZE = 500
+OUTPUT_FIELDS = ("item", "correct", "points", "error_category", "feedback", "error")
+
+
+def read_submissions(path):
+    with open(path, newline="", encoding="utf-8") as f:
+        if path.endswith(".csv"):
+            yield from csv.DictReader(f)
+        else:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+
+def grade_record(record):
+    # Bad rows are reported in the output rather than stopping the batch.
+    row = dict(record)
+    try:
+        result = grade_submission(str(record.get("item") or ""), str(record.get("answer") or ""))
+    except (ValueError, IndexError, RecursionError) as e:
+        # The parser limits nesting; an answer that still recurses too deep
+        # is one bad row, not the end of the batch.
+        if isinstance(e, RecursionError):
+            error = "answer is nested too deeply"
+        else:
+            error = "no such item" if isinstance(e, IndexError) else str(e)
+        row.update(correct=False, points=0, error_category=None, feedback=None, error=error)
+        return row
+    row.update({field: result[field] for field in OUTPUT_FIELDS[1:-1]}, error=None)
+    return row
+
+
+def grade_chunk(records):
+    return [grade_record(record) for record in records]
+
+
+def _chunks(records, size):
+    chunk = []
+    for record in records:
+        chunk.append(record)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def grade_records(records, workers=None, chunk_size=CHUNK_SIZE):
+    # Yields graded rows in input order. workers=1 grades in this process.
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        for chunk in _chunks(records, chunk_size):
+            yield from grade_chunk(chunk)
+        return
+    with ProcessPoolExecutor(workers) as executor:
+        pending = collections.deque()
+        for chunk in _chunks(records, chunk_size):
+            pending.append(executor.submit(grade_chunk, chunk))
+            if len(pending) >= workers * 2:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+
+class _Writer:
+    def __init__(self, f, csv_output):
+        self.f = f
+        self.csv_output = csv_output
+        self.writer = None
+
+    def write(self, row):
+        if not self.csv_output:
+            self.f.write(json.dumps(row, ensure_ascii=False) + "\n")
+            return
+        if self.writer is None:
+            fields = [name for name in row if name not in OUTPUT_FIELDS] + list(OUTPUT_FIELDS)
+            self.writer = csv.DictWriter(self.f, fields, extrasaction="ignore")
+            self.writer.writeheader()
+        self.writer.writerow(row)
+
+
+def grade_file(in_path, out_path, workers=None, learner_field="learner"):
+    # Grades in_path into out_path (CSV if it ends in .csv, else JSON lines).
+    # Returns a summary with each learner's total score.
+    summary = {"submissions": 0, "correct": 0, "invalid": 0, "scores": {}}
+    with open(out_path, "w", newline="", encoding="utf-8") as f:
+        writer = _Writer(f, out_path.endswith(".csv"))
+        for row in grade_records(read_submissions(in_path), workers):
+            writer.write(row)
+            summary["submissions"] += 1
+            summary["correct"] += bool(row["correct"])
+            summary["invalid"] += row["error"] is not None
+            learner = row.get(learner_field)
+            if learner is not None:
+                summary["scores"][learner] = summary["scores"].get(learner, 0) + row["points"]
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Grade exported submissions (CSV or JSON lines).")
+    parser.add_argument("submissions", help="file with 'item' and 'answer' columns")
+    parser.add_argument("--out", help="graded rows; default <submissions>.graded.jsonl")
+    parser.add_argument("--workers", type=int, help="grading processes (default: one per CPU)")
+    parser.add_argument("--learner-field", default="learner", help="column that identifies the learner")
+    parser.add_argument("--scores", help="also write per-learner total scores to this CSV")
+    args = parser.parse_args(argv)
+
+    out_path = args.out or os.path.splitext(args.submissions)[0] + ".graded.jsonl"
+    summary = grade_file(args.submissions, out_path, args.workers, args.learner_field)
+    if args.scores:
+        with open(args.scores, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow([args.learner_field, "score"])
+            writer.writerows(sorted(summary["scores"].items()))
+    print(f"Graded {summary['submissions']} submissions into {out_path}: {summary['correct']} correct, "
+          f"{summary['invalid']} invalid, {len(summary['scores'])} learners", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
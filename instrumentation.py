@@ -0,0 +1,191 @@
+import functools
+import json
+import os
+import threading
+import time
+import tracemalloc
+from collections import deque
+
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+# ---------- RENDER INSTRUMENTATION ----------
+# Opt-in cost accounting for page and sub-view functions. Set
+# LOGIC_TUTOR_PROFILE=1 and every function decorated with @profiled records
+# its wall time, allocations (tracemalloc) and the widgets it created on each
+# rerun. Records go into a process-wide ring buffer, so memory stays bounded
+# however long the server runs. When disabled the decorator is a plain call.
+#
+# tracemalloc counts every thread's allocations and has one peak for the
+# whole process, so memory is only recorded for a view that rendered while
+# no other session's rerun was in progress; otherwise its allocated and
+# peak bytes are None (unavailable) rather than another session's figures.
+
+DEFAULT_CAPACITY = 5000
+
+
+def _widget_count():
+    ctx = get_script_run_ctx(suppress_warning=True)
+    if ctx is None:
+        return 0
+    # Newer Streamlit keeps the per-run widget ids on ctx.shared.
+    widget_ids = getattr(getattr(ctx, "shared", ctx), "widget_ids_this_run", None)
+    if widget_ids is None:
+        return 0
+    return len(widget_ids.snapshot() if hasattr(widget_ids, "snapshot") else widget_ids)
+
+
+class RenderProfiler:
+    def __init__(self, enabled=False, capacity=DEFAULT_CAPACITY, trace_memory=True):
+        self.enabled = enabled
+        self.trace_memory = trace_memory
+        self.records = deque(maxlen=capacity)
+        self.lock = threading.Lock()
+        # Each session renders on its own script thread, so nesting is tracked per thread.
+        self.local = threading.local()
+        self.runs = 0
+        # Reruns in progress, and a count bumped whenever one starts while
+        # another is running: a view's memory is only its own if it started
+        # alone and the count did not move before it ended.
+        self.active = 0
+        self.overlaps = 0
+
+    def _start_tracing(self):
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def _stack(self):
+        stack = getattr(self.local, "stack", None)
+        if stack is None:
+            stack = self.local.stack = []
+        return stack
+
+    def enter(self, view):
+        self._start_tracing()
+        stack = self._stack()
+        with self.lock:
+            if not stack:
+                self.runs += 1
+                self.local.run = self.runs
+                self.active += 1
+                if self.active > 1:
+                    self.overlaps += 1
+            alone = self.active == 1
+            overlaps = self.overlaps
+        frame = {
+            "view": view,
+            "started": time.perf_counter(),
+            "widgets": _widget_count(),
+            "memory": 0,
+            "peak": 0,
+            "alone": alone,
+            "overlaps": overlaps,
+        }
+        if alone and tracemalloc.is_tracing():
+            frame["memory"] = tracemalloc.get_traced_memory()[0]
+            if stack:
+                # Fold the parent's peak so far into it before the child resets it.
+                parent = stack[-1]
+                parent["peak"] = max(parent["peak"], tracemalloc.get_traced_memory()[1])
+            tracemalloc.reset_peak()
+        stack.append(frame)
+
+    def exit(self):
+        stack = self._stack()
+        frame = stack.pop()
+        seconds = time.perf_counter() - frame["started"]
+        allocated = peak = None
+        with self.lock:
+            alone = frame["alone"] and frame["overlaps"] == self.overlaps
+            if not stack:
+                self.active -= 1
+        if alone and tracemalloc.is_tracing():
+            current, traced_peak = tracemalloc.get_traced_memory()
+            frame["peak"] = max(frame["peak"], traced_peak)
+            allocated = current - frame["memory"]
+            peak = frame["peak"] - frame["memory"]
+            if stack:
+                stack[-1]["peak"] = max(stack[-1]["peak"], frame["peak"])
+        record = {
+            "ts": time.time(),
+            "run": self.local.run,
+            "view": frame["view"],
+            "parent": stack[-1]["view"] if stack else None,
+            "depth": len(stack),
+            "seconds": seconds,
+            "allocated_bytes": allocated,
+            "peak_bytes": peak,
+            "widgets": _widget_count() - frame["widgets"],
+        }
+        with self.lock:
+            self.records.append(record)
+
+    def view(self, func):
+        name = func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not self.enabled:
+                return func(*args, **kwargs)
+            self.enter(name)
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.exit()
+        return wrapper
+
+    def snapshot(self):
+        with self.lock:
+            return list(self.records)
+
+    def clear(self):
+        with self.lock:
+            self.records.clear()
+
+    def summary(self):
+        # Per-view cost over the buffered reruns, most expensive (p95) first.
+        by_view = {}
+        for record in self.snapshot():
+            by_view.setdefault(record["view"], []).append(record)
+        rows = []
+        for view, records in by_view.items():
+            seconds = sorted(record["seconds"] for record in records)
+            count = len(records)
+            # Memory only from the reruns that had the process to themselves.
+            measured = [record for record in records if record["allocated_bytes"] is not None]
+            rows.append({
+                "view": view,
+                "calls": count,
+                "p50_ms": seconds[count // 2] * 1000,
+                "p95_ms": seconds[min(count - 1, int(count * 0.95))] * 1000,
+                "max_ms": seconds[-1] * 1000,
+                "mean_alloc_kb": (sum(record["allocated_bytes"] for record in measured) / len(measured) / 1024
+                                  if measured else None),
+                "max_peak_kb": max(record["peak_bytes"] for record in measured) / 1024 if measured else None,
+                "mean_widgets": sum(record["widgets"] for record in records) / count,
+            })
+        rows.sort(key=lambda row: -row["p95_ms"])
+        return rows
+
+    def export_jsonl(self, path=None):
+        text = "".join(json.dumps(record) + "\n" for record in self.snapshot())
+        if path:
+            with open(path, "a", encoding="utf-8") as f:
+                f.write(text)
+        return text
+
+
+def profiler_from_env():
+    # LOGIC_TUTOR_PROFILE=1 turns recording on; LOGIC_TUTOR_PROFILE_CAPACITY
+    # bounds the ring buffer and LOGIC_TUTOR_PROFILE_MEMORY=0 skips tracemalloc,
+    # which slows every allocation while it is tracing.
+    return RenderProfiler(
+        enabled=os.environ.get("LOGIC_TUTOR_PROFILE", "0") not in ("", "0", "off"),
+        capacity=int(os.environ.get("LOGIC_TUTOR_PROFILE_CAPACITY", DEFAULT_CAPACITY)),
+        trace_memory=os.environ.get("LOGIC_TUTOR_PROFILE_MEMORY", "1") not in ("0", "off"),
+    )
+
+
+# One profiler per process: Streamlit re-executes the app script on every
+# rerun, but imported modules (and so this buffer) are shared by all sessions.
+PROFILER = profiler_from_env()
+profiled = PROFILER.view
@@ -0,0 +1,440 @@
+import bisect
+import sys
+from array import array
+
+from puzzle_generator import DIFFICULTIES as PUZZLE_DIFFICULTIES
+from question_bank import LEVELS
+from scheduler import export_scheduler_state, load_scheduler_state, new_scheduler_state
+
+# ---------- LEARNER STATE ----------
+# Everything a session knows about its learner lives in one LearnerState
+# instead of loose session_state keys. Flags are bits of a Python int,
+# counters are unsigned arrays indexed by fixed name tuples, and the error
+# tracker is capped. Per-question flags (hints, awards, completed items) are
+# sorted id arrays, 4 bytes per item the learner touched, so they grow with
+# what the learner did and not with the size of the bank.
+
+GAMES = ("truth_table", "puzzle", "matching", "generated_puzzle")
+LEARNING_TOPICS = ("propositional_basics", "connectives", "truth_tables", "conditionals", "converse_inverse")
+GAME_COUNTERS = (
+    "truth_table_round", "truth_table_score", "match_score",
+    "transform_round", "transform_score", "transform_hints",
+    "puzzle_easy", "puzzle_medium", "puzzle_hard"
+)
+# Everything that awards points, each with its own award attempts.
+ACTIVITIES = tuple(f"quiz:{level}" for level in LEVELS) + (
+    "adaptive", "truth_table", "puzzle", "match", "transform", "propositions"
+) + tuple(f"puzzle:{difficulty}" for difficulty in PUZZLE_DIFFICULTIES)
+# The activities whose items make up each game, for completion.
+GAME_ACTIVITIES = {
+    "truth_table": ("truth_table",),
+    "puzzle": ("puzzle", "transform"),
+    "matching": ("match",),
+    "generated_puzzle": tuple(f"puzzle:{difficulty}" for difficulty in PUZZLE_DIFFICULTIES),
+}
+MAX_TRACKED_ERRORS = 50
+PUZZLE_DONE = 1
+
+# Upper bound on state_size() of one session's LearnerState. report_memory()
+# measures a learner who has used every feature, answered, hinted and scored
+# WORST_CASE_QUESTIONS questions spread over the bank (all of a smaller bank)
+# and filled the error tracker: 36640 bytes with the current 216-question
+# bank and 39576 bytes with 20,000 questions, where per-question bitsets and
+# a box per question id took 148 KB for the same learner.
+MEMORY_BUDGET_BYTES = 48 * 1024
+WORST_CASE_QUESTIONS = 250
+
+_LEVEL_INDEX = {level: index for index, level in enumerate(LEVELS)}
+_GAME_INDEX = {game: index for index, game in enumerate(GAMES)}
+_TOPIC_BIT = {topic: 1 << index for index, topic in enumerate(LEARNING_TOPICS)}
+_PUZZLE_COUNTER = {difficulty: GAME_COUNTERS.index(f"puzzle_{difficulty}") for difficulty in PUZZLE_DIFFICULTIES}
+
+
+class _Counter:
+    # Named view of one slot of LearnerState.counters.
+
+    def __init__(self, index):
+        self.index = index
+
+    def __get__(self, state, owner=None):
+        if state is None:
+            return self
+        return state.counters[self.index]
+
+    def __set__(self, state, value):
+        state.counters[self.index] = value
+
+
+class LearnerState:
+    __slots__ = (
+        "score", "quiz_counts", "game_counts", "topics", "errors", "adaptive",
+        "hints", "solved", "flags", "counters", "quiz_sets", "adaptive_current",
+        "attempts", "awarded", "completed"
+    )
+
+    truth_table_round = _Counter(0)
+    truth_table_score = _Counter(1)
+    match_score = _Counter(2)
+    transform_round = _Counter(3)
+    transform_score = _Counter(4)
+    transform_hints = _Counter(5)
+
+    def __init__(self, adaptive=None):
+        self.score = 0
+        self.quiz_counts = array("I", bytes(4 * len(LEVELS)))
+        self.game_counts = array("I", bytes(4 * len(GAMES)))
+        self.topics = 0
+        self.errors = {}
+        self.adaptive = adaptive if adaptive is not None else new_scheduler_state()
+        self.hints = _ids()
+        self.solved = 0
+        self.flags = 0
+        self.counters = array("I", bytes(4 * len(GAME_COUNTERS)))
+        self.quiz_sets = {}
+        self.adaptive_current = None
+        self.attempts = {}
+        self.awarded = {}
+        self.completed = {}
+
+    # ----- progress -----
+
+    def quiz_count(self, level):
+        return self.quiz_counts[_LEVEL_INDEX[level]]
+
+    def record_quiz(self, level, points):
+        self.score += points
+        self.quiz_counts[_LEVEL_INDEX[level]] += 1
+
+    def record_game(self, game, points):
+        self.score += points
+        self.game_counts[_GAME_INDEX[game]] += 1
+
+    def quiz_progress(self):
+        return dict(zip(LEVELS, self.quiz_counts))
+
+    def game_progress(self):
+        return dict(zip(GAMES, self.game_counts))
+
+    def topic_done(self, topic):
+        return bool(self.topics & _TOPIC_BIT[topic])
+
+    def complete_topic(self, topic):
+        # True only the first time, so callers can count completions.
+        if self.topics & _TOPIC_BIT[topic]:
+            return False
+        self.topics |= _TOPIC_BIT[topic]
+        return True
+
+    def learning_path(self):
+        return {topic: bool(self.topics & bit) for topic, bit in _TOPIC_BIT.items()}
+
+    def record_error(self, key):
+        # Returns (count, evicted key). At the cap a new pattern replaces the
+        # least frequent one, so only one-off slips are forgotten.
+        evicted = None
+        if key not in self.errors and len(self.errors) >= MAX_TRACKED_ERRORS:
+            evicted = min(self.errors, key=self.errors.get)
+            del self.errors[evicted]
+        count = self.errors.get(key, 0) + 1
+        self.errors[key] = count
+        return count, evicted
+
+    # ----- per-session flags -----
+
+    def hint_shown(self, question_id):
+        return _has_id(self.hints, question_id)
+
+    def show_hint(self, question_id):
+        _add_id(self.hints, question_id)
+
+    def is_solved(self, index):
+        return bool(self.solved >> index & 1)
+
+    def solve_once(self, index):
+        # Marks proposition example index as solved; True if it was not yet.
+        if self.solved >> index & 1:
+            return False
+        self.solved |= 1 << index
+        return True
+
+    @property
+    def puzzle_done(self):
+        return bool(self.flags & PUZZLE_DONE)
+
+    @puzzle_done.setter
+    def puzzle_done(self, done):
+        self.flags = self.flags | PUZZLE_DONE if done else self.flags & ~PUZZLE_DONE
+
+    # ----- awards -----
+    # An activity ("quiz:beginner", "match", ...) scores each of its items at
+    # most once per attempt; awarded holds the indices of the items scored in
+    # the current attempt. See scoring.py.
+
+    def attempt(self, activity):
+        return self.attempts.get(activity, 0)
+
+    def claim(self, activity, index):
+        # True only the first time item index scores in this attempt.
+        awarded = self.awarded.get(activity)
+        if awarded is None:
+            awarded = self.awarded[activity] = _ids()
+        return _add_id(awarded, index)
+
+    def first_check(self, activity, index):
+        # True only for the first answer checked on item index in this
+        # attempt, the one outcome the review scheduler learns from.
+        return self.claim(f"checked:{activity}", index)
+
+    def next_attempt(self, activity):
+        # Starting over (new quiz questions, Play Again) lets items score again.
+        self.attempts[activity] = self.attempts.get(activity, 0) + 1
+        self.awarded.pop(activity, None)
+        self.awarded.pop(f"checked:{activity}", None)
+
+    # ----- completion -----
+    # Lasting counterpart of awarded: every item ever scored, so
+    # completion counts distinct items, however often the learner starts
+    # over. Quizzes are keyed by level ("quiz:beginner") and numbered by
+    # question id, so a question answered in a quiz or in Adaptive Practice
+    # counts once; games by activity and item index.
+
+    def complete(self, key, index):
+        # True only the first time item index of key scores.
+        completed = self.completed.get(key)
+        if completed is None:
+            completed = self.completed[key] = _ids()
+        return _add_id(completed, index)
+
+    def _completed_count(self, key):
+        return len(self.completed.get(key, ()))
+
+    def quiz_completed(self):
+        return {level: self._completed_count(f"quiz:{level}") for level in LEVELS}
+
+    def games_completed(self):
+        return {game: sum(map(self._completed_count, activities)) for game, activities in GAME_ACTIVITIES.items()}
+
+    def puzzle_position(self, difficulty):
+        # How many generated puzzles of this difficulty the learner has moved past.
+        return self.counters[_PUZZLE_COUNTER[difficulty]]
+
+    def next_puzzle(self, difficulty):
+        self.counters[_PUZZLE_COUNTER[difficulty]] += 1
+
+    def reset_transform_game(self):
+        self.transform_round = self.transform_score = self.transform_hints = 0
+
+    # ----- serialization -----
+
+    def to_dict(self):
+        # Lasting progress and game state; hints, drawn quizzes and award
+        # attempts stay in the session.
+        return {
+            "v": 1,
+            "score": self.score,
+            "quiz_counts": self.quiz_counts.tolist(),
+            "game_counts": self.game_counts.tolist(),
+            "topics": self.topics,
+            "errors": self.errors,
+            "flags": self.flags,
+            "counters": self.counters.tolist(),
+            "completed": {key: ids.tolist() for key, ids in self.completed.items()},
+            "adaptive": export_scheduler_state(self.adaptive),
+        }
+
+    @classmethod
+    def from_dict(cls, document):
+        state = cls()
+        state.load_progress(document)
+        return state
+
+    def load_progress(self, document):
+        # Replaces the persisted fields, keeping session-only ones; None
+        # (progress deleted elsewhere) resets them.
+        document = _upgrade(document) if document else LearnerState().to_dict()
+        self.score = document["score"]
+        self.quiz_counts = _counts(document["quiz_counts"], len(LEVELS))
+        self.game_counts = _counts(document["game_counts"], len(GAMES))
+        self.topics = document["topics"]
+        self.errors = dict(document["errors"])
+        self.flags = document.get("flags", 0)
+        self.counters = _counts(document.get("counters", ()), len(GAME_COUNTERS))
+        self.completed = {key: _ids(ids) for key, ids in document.get("completed", {}).items()}
+        self.adaptive = load_scheduler_state(document.get("adaptive"))
+
+
+def _ids(values=()):
+    return array("I", sorted(set(values)))
+
+
+def _has_id(ids, value):
+    index = bisect.bisect_left(ids, value)
+    return index < len(ids) and ids[index] == value
+
+
+def _add_id(ids, value):
+    # True if value was not in ids yet.
+    index = bisect.bisect_left(ids, value)
+    if index < len(ids) and ids[index] == value:
+        return False
+    ids.insert(index, value)
+    return True
+
+
+def _counts(values, size):
+    counts = array("I", values[:size])
+    counts.extend(bytes(size - len(counts)))
+    return counts
+
+
+def _upgrade(document):
+    if "v" in document:
+        return document
+    # Progress saved before LearnerState existed: loose per-key dicts.
+    topics = 0
+    for topic, done in document.get("learning_path", {}).items():
+        if done and topic in _TOPIC_BIT:
+            topics |= _TOPIC_BIT[topic]
+    errors = sorted(document.get("error_tracking", {}).items(), key=lambda entry: -entry[1])
+    quiz_progress = document.get("quiz_progress", {})
+    game_progress = document.get("game_progress", {})
+    return {
+        "v": 1,
+        "score": document.get("score", 0),
+        "quiz_counts": [quiz_progress.get(level, 0) for level in LEVELS],
+        "game_counts": [game_progress.get(game, 0) for game in GAMES],
+        "topics": topics,
+        "errors": dict(errors[:MAX_TRACKED_ERRORS]),
+        "adaptive": document.get("adaptive"),
+    }
+
+
+# ---------- CONCURRENT UPDATES ----------
+# Two tabs (or two workers) of one learner each save whole documents. The
+# store never lets one overwrite the other: when the stored copy is no longer
+# the one a tab started from (base), merge_progress folds that tab's changes
+# into it. Counts and the score merge as deltas, so points earned in both
+# tabs all count; flags, topics and completed items are or-ed; game rounds
+# and the scheduler state take whichever side changed them, the newer write
+# winning a tie.
+
+def merge_progress(latest, base, mine):
+    latest, mine = _upgrade(latest), _upgrade(mine)
+    base = _upgrade(base) if base else LearnerState().to_dict()
+    merged = dict(mine)
+    merged["score"] = latest["score"] + mine["score"] - base["score"]
+    for key, size in (("quiz_counts", len(LEVELS)), ("game_counts", len(GAMES))):
+        merged[key] = [
+            max(0, ours + theirs - before) for ours, theirs, before in zip(
+                _counts(mine[key], size), _counts(latest[key], size), _counts(base[key], size)
+            )
+        ]
+    errors = {}
+    for key in latest["errors"].keys() | mine["errors"].keys():
+        count = latest["errors"].get(key, 0) + mine["errors"].get(key, 0) - base["errors"].get(key, 0)
+        if count > 0:
+            errors[key] = count
+    merged["errors"] = dict(sorted(errors.items(), key=lambda entry: -entry[1])[:MAX_TRACKED_ERRORS])
+    merged["topics"] = latest["topics"] | mine["topics"]
+    merged["flags"] = latest.get("flags", 0) | mine.get("flags", 0)
+    completed = dict(latest.get("completed", {}))
+    for key, ids in mine.get("completed", {}).items():
+        completed[key] = sorted(set(completed.get(key, ())) | set(ids))
+    merged["completed"] = completed
+    size = len(GAME_COUNTERS)
+    merged["counters"] = [
+        ours if ours != before else theirs for ours, theirs, before in zip(
+            _counts(mine.get("counters", ()), size), _counts(latest.get("counters", ()), size),
+            _counts(base.get("counters", ()), size)
+        )
+    ]
+    if mine.get("adaptive") == base.get("adaptive"):
+        merged["adaptive"] = latest.get("adaptive")
+    return merged
+
+
+# ---------- MEMORY BUDGET ----------
+
+def state_size(value, seen=None):
+    # Deep size in bytes, following containers and slots but counting
+    # shared objects (interned strings, small ints) only once.
+    seen = set() if seen is None else seen
+    if id(value) in seen:
+        return 0
+    seen.add(id(value))
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(state_size(key, seen) + state_size(item, seen) for key, item in value.items())
+    elif isinstance(value, (list, tuple, set)):
+        size += sum(state_size(item, seen) for item in value)
+    elif isinstance(value, LearnerState):
+        size += sum(state_size(getattr(value, name), seen) for name in LearnerState.__slots__)
+    return size
+
+
+def worst_case_state(bank=None, answered=WORST_CASE_QUESTIONS):
+    # A learner who has done everything: answered, hinted and scored every
+    # question (at most `answered` of them, spread over the whole bank, so a
+    # larger bank measures the same learner), every counter non-zero and the
+    # error tracker full.
+    import random
+
+    from feedback import error_key
+    from puzzle_generator import get_puzzle_pool
+    from question_bank import get_question_bank
+    from scheduler import AdaptiveScheduler
+
+    bank = bank or get_question_bank()
+    questions = bank.questions[::max(1, len(bank) // answered)][:answered]
+    state = LearnerState()
+    scheduler = AdaptiveScheduler(bank, state.adaptive, random.Random(0))
+    for question in questions:
+        scheduler.record(question, False)
+        scheduler.next_question(question["level"])
+        state.show_hint(question["id"])
+        state.record_quiz(question["level"], question["points"])
+        for activity in (f"quiz:{question['level']}", "adaptive"):
+            state.claim(activity, question["id"])
+            state.first_check(activity, question["id"])
+        state.complete(f"quiz:{question['level']}", question["id"])
+        state.record_error(error_key(question["id"]))
+    for level in LEVELS:
+        state.quiz_sets[level] = tuple(question["id"] for question in bank.pool(level)[:5])
+    for index, game in enumerate(GAMES):
+        state.record_game(game, 10)
+    for topic in LEARNING_TOPICS:
+        state.complete_topic(topic)
+    for index in range(len(GAME_COUNTERS)):
+        state.counters[index] = 1000
+    state.solved = (1 << 32) - 1
+    state.puzzle_done = True
+    state.adaptive_current = questions[-1]["id"]
+    # No game has more items than a difficulty of the generated puzzle pool.
+    game_items = max(map(len, get_puzzle_pool().values()))
+    for activity in ACTIVITIES:
+        state.attempts[activity] = 1000
+        if not activity.startswith("quiz:") and activity != "adaptive":
+            for index in range(game_items):
+                state.claim(activity, index)
+                state.first_check(activity, index)
+    for activities in GAME_ACTIVITIES.values():
+        for activity in activities:
+            for index in range(game_items):
+                state.complete(activity, index)
+    return state
+
+
+def report_memory():
+    import json
+
+    state = worst_case_state()
+    size = state_size(state)
+    document = json.dumps(state.to_dict(), separators=(",", ":"))
+    print(f"empty state:      {state_size(LearnerState())} bytes")
+    print(f"worst-case state: {size} bytes (budget {MEMORY_BUDGET_BYTES})")
+    print(f"serialized:       {len(document)} bytes")
+    return size <= MEMORY_BUDGET_BYTES
+
+
+if __name__ == "__main__":
+    sys.exit(0 if report_memory() else 1)
@@ -0,0 +1,437 @@
+import functools
+import weakref
+
+# ---------- TRUTH TABLE ENGINE ----------
+# Every column of a truth table is stored as one Python int used as a bitset:
+# bit i holds the value of row i. Connectives then work on whole columns at
+# once (&, |, ^), so a 20-variable table (1,048,576 rows) is a handful of
+# big-int operations instead of a million Python-level row evaluations.
+
+MAX_VARIABLES = 20
+VARIABLE_NAMES = ("p", "q", "r", "s", "t", "u", "w", "x", "y", "z",
+                  "a", "b", "c", "d", "e", "g", "h", "j", "k", "m")
+
+
+def full_mask(num_vars):
+    return (1 << (1 << num_vars)) - 1
+
+
+@functools.lru_cache(maxsize=None)
+def variable_column(index, num_vars):
+    # Row i gives variable `index` the value of bit (num_vars - 1 - index) of i,
+    # i.e. the first variable changes slowest, exactly like a hand-drawn table.
+    half = 1 << (num_vars - 1 - index)
+    block = ((1 << half) - 1) << half
+    width = half * 2
+    rows = 1 << num_vars
+    # Double the pattern until it covers every row: log2(rows) shifts.
+    while width < rows:
+        block |= block << width
+        width *= 2
+    return block
+
+
+def count_true(mask):
+    return bin(mask).count("1")
+
+
+class TruthTable:
+    __slots__ = ("variables", "num_rows", "full", "columns", "true_first")
+
+    def __init__(self, variables, true_first=False):
+        variables = tuple(variables)
+        if not 0 < len(variables) <= MAX_VARIABLES:
+            raise FormulaError(f"Truth tables support 1 to {MAX_VARIABLES} variables")
+        num_vars = len(variables)
+        self.variables = variables
+        self.num_rows = 1 << num_vars
+        self.full = full_mask(num_vars)
+        self.true_first = true_first
+        self.columns = {}
+        for i, var in enumerate(variables):
+            column = variable_column(i, num_vars)
+            # Flipping every column turns the F..F-first order into T..T-first.
+            self.columns[var] = self.full ^ column if true_first else column
+
+    def evaluate(self, func):
+        # func receives one bitmask per variable plus the all-ones mask, which
+        # it needs for negation: ¬p is written `full & ~p` (or `full ^ p`).
+        args = [self.columns[var] for var in self.variables]
+        return func(*args, self.full) & self.full
+
+    def column_values(self, mask, limit=None):
+        rows = self.num_rows if limit is None else min(limit, self.num_rows)
+        bits = format(mask & ((1 << rows) - 1), f"0{rows}b")[::-1]
+        return [bit == "1" for bit in bits]
+
+    def rows(self, limit=None):
+        columns = [self.column_values(self.columns[var], limit) for var in self.variables]
+        return list(zip(*columns))
+
+    def to_columns(self, outputs=None, limit=None):
+        data = {var: self.column_values(self.columns[var], limit) for var in self.variables}
+        for label, mask in (outputs or {}).items():
+            data[label] = self.column_values(mask, limit)
+        return data
+
+
+# ---------- FORMULA PARSER ----------
+# Parsing, formatting, compiling and the BDD kernel all recurse on the
+# formula's shape, so typed formulas are limited in length and depth and go
+# over the limits as a FormulaError like any other unreadable text.
+# Formulas are parsed into interned AST nodes: structurally equal subformulas
+# are the same object, so identity comparison is safe and caches can key on
+# nodes. The intern table holds nodes weakly: a formula nobody refers to any
+# more (no cache, no session) is freed instead of living as long as the
+# process.
+
+class FormulaError(ValueError):
+    pass
+
+
+class Formula:
+    __slots__ = ("op", "args", "name", "variables", "depth", "__weakref__")
+
+    def __repr__(self):
+        return f"Formula({format_formula(self)!r})"
+
+
+_NODES = weakref.WeakValueDictionary()
+
+
+def make_node(op, *args, name=None):
+    key = (op, name, args)
+    node = _NODES.get(key)
+    if node is None:
+        node = Formula()
+        node.op = op
+        node.args = args
+        node.name = name
+        if op == "var":
+            node.variables = frozenset((name,))
+        else:
+            node.variables = frozenset().union(*(arg.variables for arg in args))
+        node.depth = 1 + max((arg.depth for arg in args), default=0)
+        node = _NODES.setdefault(key, node)
+    return node
+
+
+def var(name):
+    return make_node("var", name=name)
+
+
+TRUE = make_node("const", name=True)
+FALSE = make_node("const", name=False)
+
+SYMBOLS = {
+    "not": "¬", "and": "∧", "or": "∨",
+    "implies": "→", "iff": "↔", "xor": "⊕",
+}
+
+# Longest aliases first so that "<->" is not read as "<" followed by "->".
+_OPERATOR_ALIASES = sorted([
+    ("¬", "not"), ("~", "not"), ("!", "not"),
+    ("∧", "and"), ("&&", "and"), ("&", "and"), ("/\\", "and"), ("^", "and"),
+    ("∨", "or"), ("||", "or"), ("|", "or"), ("\\/", "or"),
+    ("→", "implies"), ("->", "implies"), ("=>", "implies"), ("⇒", "implies"),
+    ("↔", "iff"), ("<->", "iff"), ("<=>", "iff"), ("⇔", "iff"), ("≡", "iff"),
+    ("⊕", "xor"), ("(+)", "xor"),
+    ("(", "("), (")", ")"),
+], key=lambda alias: -len(alias[0]))
+
+_WORD_ALIASES = {
+    "not": "not", "and": "and", "or": "or", "implies": "implies",
+    "iff": "iff", "xor": "xor",
+    "true": TRUE, "false": FALSE, "t": TRUE, "f": FALSE,
+}
+_CONSTANT_SYMBOLS = {"⊤": TRUE, "⊥": FALSE, "1": TRUE, "0": FALSE}
+
+
+def _tokenize(text):
+    tokens = []
+    i = 0
+    while i < len(text):
+        ch = text[i]
+        if ch.isspace():
+            i += 1
+            continue
+        if ch in _CONSTANT_SYMBOLS:
+            tokens.append(_CONSTANT_SYMBOLS[ch])
+            i += 1
+            continue
+        if ch.isalpha() or ch == "_":
+            start = i
+            while i < len(text) and (text[i].isalnum() or text[i] == "_"):
+                i += 1
+            word = text[start:i]
+            # Lowercase words are variables unless they are keywords; the
+            # single letters T and F are the constants used in the Learn section.
+            if word.lower() in _WORD_ALIASES and (len(word) > 1 or word.isupper()):
+                tokens.append(_WORD_ALIASES[word.lower()])
+            else:
+                tokens.append(var(word))
+            continue
+        for alias, op in _OPERATOR_ALIASES:
+            if text.startswith(alias, i):
+                tokens.append(op)
+                i += len(alias)
+                break
+        else:
+            raise FormulaError(f"Unexpected symbol '{ch}'")
+    return tokens
+
+
+# Binding strength, weakest first: ↔, →, ⊕, ∨, ∧, then ¬.
+_BINARY_LEVELS = ("iff", "implies", "xor", "or", "and")
+
+
+MAX_FORMULA_TOKENS = 400
+MAX_FORMULA_DEPTH = 64
+
+
+class _Parser:
+    def __init__(self, tokens):
+        self.tokens = tokens
+        self.pos = 0
+        self.nesting = 0
+
+    def peek(self):
+        return self.tokens[self.pos] if self.pos < len(self.tokens) else None
+
+    def take(self):
+        token = self.peek()
+        self.pos += 1
+        return token
+
+    def parse(self):
+        if not self.tokens:
+            raise FormulaError("Empty formula")
+        if len(self.tokens) > MAX_FORMULA_TOKENS:
+            raise FormulaError(f"Formula is too long (at most {MAX_FORMULA_TOKENS} symbols)")
+        node = self.binary(0)
+        if self.peek() is not None:
+            raise FormulaError("Unexpected input after the end of the formula")
+        if node.depth > MAX_FORMULA_DEPTH:
+            raise FormulaError(f"Formula is nested too deeply (at most {MAX_FORMULA_DEPTH} levels)")
+        return node
+
+    def nest(self):
+        # Brackets, negations and → chains recurse; bound them before Python does.
+        self.nesting += 1
+        if self.nesting > MAX_FORMULA_DEPTH:
+            raise FormulaError(f"Formula is nested too deeply (at most {MAX_FORMULA_DEPTH} levels)")
+
+    def binary(self, level):
+        if level == len(_BINARY_LEVELS):
+            return self.unary()
+        op = _BINARY_LEVELS[level]
+        left = self.binary(level + 1)
+        if op == "implies":
+            # → groups to the right: p → q → r is p → (q → r).
+            if self.peek() == op:
+                self.take()
+                self.nest()
+                right = self.binary(level)
+                self.nesting -= 1
+                return make_node(op, left, right)
+            return left
+        while self.peek() == op:
+            self.take()
+            left = make_node(op, left, self.binary(level + 1))
+        return left
+
+    def unary(self):
+        token = self.take()
+        if token == "not":
+            self.nest()
+            node = make_node("not", self.unary())
+            self.nesting -= 1
+            return node
+        if token == "(":
+            self.nest()
+            node = self.binary(0)
+            if self.take() != ")":
+                raise FormulaError("Missing closing parenthesis")
+            self.nesting -= 1
+            return node
+        if isinstance(token, Formula):
+            return token
+        if token is None:
+            raise FormulaError("Formula ends too early")
+        raise FormulaError(f"Unexpected '{SYMBOLS.get(token, token)}'")
+
+
+@functools.lru_cache(maxsize=4096)
+def parse_formula(text):
+    return _Parser(_tokenize(text)).parse()
+
+
+def _variable_order(name):
+    if name in VARIABLE_NAMES:
+        return (0, VARIABLE_NAMES.index(name))
+    return (1, 0)
+
+
+def format_formula(node):
+    if node.op == "var":
+        return node.name
+    if node.op == "const":
+        return "T" if node.name else "F"
+    if node.op == "not":
+        return "¬" + _format_operand(node.args[0], None)
+    left, right = node.args
+    # → groups to the right, every other connective to the left.
+    left_same = node.op if node.op != "implies" else None
+    right_same = node.op if node.op == "implies" else None
+    return (f"{_format_operand(left, left_same)} {SYMBOLS[node.op]} "
+            f"{_format_operand(right, right_same)}")
+
+
+def _format_operand(node, same_op):
+    # Mixed connectives are always bracketed, as in "p ∨ (q ∧ r)", even where
+    # precedence would allow dropping them: it is how the Learn section writes them.
+    text = format_formula(node)
+    if len(node.args) == 2 and node.op != same_op:
+        return f"({text})"
+    return text
+
+
+# ---------- FORMULA COMPILER ----------
+# A formula is compiled once into a Python function over column bitmasks.
+# Because nodes are interned, a shared subformula becomes a single local
+# variable in the generated code and is evaluated once per call.
+
+_BITWISE = {
+    "and": "{0} & {1}",
+    "or": "{0} | {1}",
+    "xor": "{0} ^ {1}",
+    "implies": "(full ^ {0}) | {1}",
+    "iff": "full ^ {0} ^ {1}",
+}
+
+
+class CompiledFormula:
+    __slots__ = ("formula", "text", "variables", "func", "source")
+
+    def __init__(self, formula, variables, func, source):
+        self.formula = formula
+        self.text = format_formula(formula)
+        self.variables = variables
+        self.func = func
+        self.source = source
+
+    def evaluate(self, table):
+        args = [table.columns[name] for name in self.variables]
+        return self.func(*args, table.full) & table.full
+
+    def evaluate_row(self, assignment):
+        # A single row is just a one-bit column.
+        args = [1 if assignment[name] else 0 for name in self.variables]
+        return bool(self.func(*args, 1) & 1)
+
+    def truth_table(self, variables=None, true_first=False):
+        table = TruthTable(variables or self.variables, true_first=true_first)
+        return table, self.evaluate(table)
+
+
+def _generate_source(formula, variables):
+    params = {name: f"v{i}" for i, name in enumerate(variables)}
+    lines = []
+    names = {}
+
+    def emit(node):
+        if node in names:
+            return names[node]
+        if node.op == "var":
+            names[node] = params[node.name]
+        elif node.op == "const":
+            names[node] = "full" if node.name else "0"
+        else:
+            operands = [emit(arg) for arg in node.args]
+            if node.op == "not":
+                expr = f"full ^ {operands[0]}"
+            else:
+                expr = _BITWISE[node.op].format(*operands)
+            names[node] = f"t{len(lines)}"
+            lines.append(f"    {names[node]} = {expr}")
+        return names[node]
+
+    result = emit(formula)
+    signature = ", ".join([*params.values(), "full"])
+    return "\n".join([f"def _formula({signature}):", *lines, f"    return {result}"])
+
+
+def formula_variables(formula):
+    # Table order: p, q, r, ... first, then any other names in order of appearance.
+    seen = {}
+    stack = [formula]
+    while stack:
+        node = stack.pop()
+        if node.op == "var":
+            seen.setdefault(node.name, len(seen))
+        else:
+            stack.extend(reversed(node.args))
+    return tuple(sorted(seen, key=lambda name: (*_variable_order(name), seen[name])))
+
+
+@functools.lru_cache(maxsize=4096)
+def compile_node(formula):
+    variables = formula_variables(formula)
+    source = _generate_source(formula, variables)
+    namespace = {}
+    exec(compile(source, "<formula>", "exec"), namespace)
+    return CompiledFormula(formula, variables, namespace["_formula"], source)
+
+
+@functools.lru_cache(maxsize=4096)
+def compile_formula(text):
+    return compile_node(parse_formula(text))
+
+
+# ---------- EQUIVALENCE CHECKING ----------
+# Two formulas are equivalent when they produce the same output column over
+# the union of their variables. Past MAX_VARIABLES the columns would not fit
+# in memory, and the BDD kernel (bdd.py) decides instead. Verdicts are
+# cached by grading.grade_formula in the shared result cache, keyed by the
+# canonical text of both formulas.
+
+def equivalent(left, right):
+    if left is right:
+        return True
+    variables = formula_variables(make_node("and", left, right))
+    if not variables:
+        # Constants only: one row, and no table to build.
+        return compile_node(left).evaluate_row({}) == compile_node(right).evaluate_row({})
+    if len(variables) > MAX_VARIABLES:
+        import bdd
+        return bdd.equivalent(left, right)
+    table = TruthTable(variables)
+    return compile_node(left).evaluate(table) == compile_node(right).evaluate(table)
+
+
+@functools.lru_cache(maxsize=4096)
+def formula_size(formula):
+    return 1 + sum(formula_size(arg) for arg in formula.args)
+
+
+@functools.lru_cache(maxsize=4096)
+def formula_connectives(formula):
+    ops = frozenset((formula.op,)) if formula.args else frozenset()
+    return ops.union(*(formula_connectives(arg) for arg in formula.args))
+
+
+def grade_formula_answer(answer, reference, simplified=False):
+    # Returns (correct, reason). With simplified=True the answer must also
+    # avoid connectives the reference does not use and be no longer than it,
+    # so restating the original expression does not count as simplifying it.
+    # Unreadable answers raise FormulaError.
+    answer_node = parse_formula(answer)
+    reference_node = parse_formula(reference)
+    if not equivalent(answer_node, reference_node):
+        return False, "not_equivalent"
+    if simplified:
+        if not formula_connectives(answer_node) <= formula_connectives(reference_node):
+            return False, "extra_connectives"
+        if formula_size(answer_node) > formula_size(reference_node):
+            return False, "not_simplified"
+    return True, "equivalent"
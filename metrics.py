@@ -0,0 +1,112 @@
+import heapq
+
+# ---------- LEARNER METRICS ----------
+# Dashboard numbers are maintained as scoring events happen instead of being
+# recomputed from the raw progress dicts on every render. Completion ratios
+# count each item at most once, against denominators taken from the content.
+
+
+class ErrorHeap:
+    # Frequency-ordered error patterns. Every increment pushes a fresh
+    # (-count, key) entry; older entries for the same key are skipped when
+    # read and dropped whenever the heap grows past twice the live keys.
+
+    def __init__(self, counts=None):
+        self.counts = dict(counts or {})
+        self.heap = [(-count, key) for key, count in self.counts.items()]
+        heapq.heapify(self.heap)
+
+    def increment(self, key, count=None):
+        count = self.counts.get(key, 0) + 1 if count is None else count
+        self.counts[key] = count
+        heapq.heappush(self.heap, (-count, key))
+        if len(self.heap) > 2 * len(self.counts) + 16:
+            self.heap = [(-count, key) for key, count in self.counts.items()]
+            heapq.heapify(self.heap)
+
+    def remove(self, key):
+        # Its heap entries no longer match a live count and are skipped.
+        self.counts.pop(key, None)
+
+    def top(self, n, min_count=1):
+        found = []
+        popped = []
+        while self.heap and len(found) < n:
+            entry = heapq.heappop(self.heap)
+            popped.append(entry)
+            count, key = -entry[0], entry[1]
+            if self.counts.get(key) != count:
+                continue
+            if count < min_count:
+                break
+            found.append((key, count))
+        for entry in popped:
+            heapq.heappush(self.heap, entry)
+        return found
+
+
+class LearnerMetrics:
+    def __init__(self, quiz_totals, game_totals, topic_total):
+        self.quiz_totals = dict(quiz_totals)
+        self.game_totals = dict(game_totals)
+        self.topic_total = topic_total
+        self.quiz_total = sum(self.quiz_totals.values())
+        self.game_total = sum(self.game_totals.values())
+        self.quiz_counts = dict.fromkeys(self.quiz_totals, 0)
+        self.game_counts = dict.fromkeys(self.game_totals, 0)
+        self.quiz_done = 0
+        self.game_done = 0
+        self.topics_done = 0
+        self.errors = ErrorHeap()
+
+    @classmethod
+    def from_progress(cls, quiz_totals, game_totals, quiz_completed, game_completed,
+                      error_tracking, learning_path):
+        # Rebuilt once per session from saved progress; updated incrementally
+        # after that. The completed counts are distinct items per level and
+        # game (LearnerState.quiz_completed, games_completed), and callers
+        # record an item only the first time it is completed.
+        metrics = cls(quiz_totals, game_totals, len(learning_path))
+        for level, count in quiz_completed.items():
+            metrics.quiz_counts[level] = count
+            metrics.quiz_done += min(count, metrics.quiz_totals.get(level, 0))
+        for game, count in game_completed.items():
+            metrics.game_counts[game] = count
+            metrics.game_done += min(count, metrics.game_totals.get(game, 0))
+        metrics.errors = ErrorHeap(error_tracking)
+        metrics.topics_done = sum(1 for done in learning_path.values() if done)
+        return metrics
+
+    def record_quiz(self, level):
+        self.quiz_counts[level] = self.quiz_counts.get(level, 0) + 1
+        if self.quiz_counts[level] <= self.quiz_totals.get(level, 0):
+            self.quiz_done += 1
+
+    def record_game(self, game):
+        self.game_counts[game] = self.game_counts.get(game, 0) + 1
+        if self.game_counts[game] <= self.game_totals.get(game, 0):
+            self.game_done += 1
+
+    def record_error(self, key, count=None):
+        self.errors.increment(key, count)
+
+    def forget_error(self, key):
+        self.errors.remove(key)
+
+    def record_topic(self):
+        self.topics_done += 1
+
+    @property
+    def quiz_completion(self):
+        return self.quiz_done / self.quiz_total if self.quiz_total else 0.0
+
+    @property
+    def game_completion(self):
+        return self.game_done / self.game_total if self.game_total else 0.0
+
+    @property
+    def topic_completion(self):
+        return self.topics_done / self.topic_total if self.topic_total else 0.0
+
+    def top_errors(self, n=5, min_count=2):
+        return self.errors.top(n, min_count)
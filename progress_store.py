@@ -0,0 +1,325 @@
+import atexit
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+# ---------- PROGRESS STORE ----------
+# Learner progress outlives the Streamlit session: it is loaded when a
+# session starts and written behind in batches, so a rerun never waits on disk.
+# Stores keep each learner's state as one JSON document.
+#
+# Several app processes can share one SQLite file (WAL mode allows concurrent
+# readers and one writer at a time). Every save carries the document the
+# session started from; if the stored copy has moved on since, another tab
+# or worker wrote in between and the store merges the two under its write
+# lock instead of letting the later save overwrite the earlier one.
+#
+# Next to the documents, stores keep each learner's score events (see
+# scoring.py): an append-only table keyed by (learner, session, item,
+# attempt) that ignores a key it already holds, written in the same
+# transaction as the documents of the same flush.
+
+DEFAULT_DB_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "progress.db")
+
+logger = logging.getLogger(__name__)
+
+
+def dump_document(document):
+    # sort_keys makes equal states serialize, and so compare, equal.
+    return json.dumps(document, sort_keys=True, separators=(",", ":"))
+
+
+def _resolve(stored, base, document, merge):
+    if merge is None or stored is None or stored == base:
+        return document
+    return dump_document(merge(json.loads(stored), json.loads(base) if base else None, json.loads(document)))
+
+
+class ProgressStore:
+    def load(self, learner_id):
+        text = self.load_text(learner_id)
+        return json.loads(text) if text else None
+
+    def load_text(self, learner_id):
+        raise NotImplementedError
+
+    def save_many(self, updates, merge=None, events=()):
+        # updates maps learner_id -> (base document, new document); events
+        # are ScoreEvent tuples.
+        raise NotImplementedError
+
+    def load_events(self, learner_id):
+        raise NotImplementedError
+
+    def delete(self, learner_id):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class MemoryProgressStore(ProgressStore):
+    def __init__(self):
+        self.states = {}
+        # learner_id -> {(session, item, attempt): event}, in append order.
+        self.events = {}
+        self.lock = threading.Lock()
+
+    def load_text(self, learner_id):
+        with self.lock:
+            return self.states.get(learner_id)
+
+    def save_many(self, updates, merge=None, events=()):
+        with self.lock:
+            for learner_id, (base, document) in updates.items():
+                self.states[learner_id] = _resolve(self.states.get(learner_id), base, document, merge)
+            for event in events:
+                self.events.setdefault(event[0], {}).setdefault(event[1:4], event)
+
+    def load_events(self, learner_id):
+        with self.lock:
+            return list(self.events.get(learner_id, {}).values())
+
+    def delete(self, learner_id):
+        with self.lock:
+            self.states.pop(learner_id, None)
+            self.events.pop(learner_id, None)
+
+
+class SQLiteProgressStore(ProgressStore):
+    def __init__(self, path=DEFAULT_DB_PATH):
+        self.path = path
+        self.lock = threading.Lock()
+        # One connection shared by all session threads, serialized by the lock.
+        # Other worker processes may hold the write lock; wait rather than fail.
+        self.conn = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS progress ("
+            " learner_id TEXT PRIMARY KEY,"
+            " state TEXT NOT NULL,"
+            " updated_at REAL NOT NULL)"
+        )
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS score_events ("
+            " learner_id TEXT NOT NULL,"
+            " session_id TEXT NOT NULL,"
+            " item TEXT NOT NULL,"
+            " attempt INTEGER NOT NULL,"
+            " kind TEXT NOT NULL,"
+            " counter TEXT NOT NULL,"
+            " points INTEGER NOT NULL,"
+            " created_at REAL NOT NULL,"
+            " PRIMARY KEY (learner_id, session_id, item, attempt))"
+        )
+
+    def load_text(self, learner_id):
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT state FROM progress WHERE learner_id = ?", (learner_id,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def save_many(self, updates, merge=None, events=()):
+        if not updates and not events:
+            return
+        now = time.time()
+        with self.lock:
+            # IMMEDIATE takes the write lock up front, so no other process can
+            # change a row between reading it for the merge and writing it.
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                stored = {}
+                learner_ids = list(updates)
+                for start in range(0, len(learner_ids), 500):
+                    chunk = learner_ids[start:start + 500]
+                    stored.update(self.conn.execute(
+                        f"SELECT learner_id, state FROM progress WHERE learner_id IN ({','.join('?' * len(chunk))})",
+                        chunk
+                    ).fetchall())
+                rows = [
+                    (learner_id, _resolve(stored.get(learner_id), base, document, merge), now)
+                    for learner_id, (base, document) in updates.items()
+                ]
+                self.conn.executemany(
+                    "INSERT INTO progress (learner_id, state, updated_at) VALUES (?, ?, ?) "
+                    "ON CONFLICT(learner_id) DO UPDATE SET "
+                    "state = excluded.state, updated_at = excluded.updated_at",
+                    rows
+                )
+                # A key already in the table is a replayed award: ignored.
+                self.conn.executemany(
+                    "INSERT OR IGNORE INTO score_events VALUES (?, ?, ?, ?, ?, ?, ?, ?)", events
+                )
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+            self.conn.execute("COMMIT")
+
+    def load_events(self, learner_id):
+        with self.lock:
+            return self.conn.execute(
+                "SELECT * FROM score_events WHERE learner_id = ? ORDER BY rowid", (learner_id,)
+            ).fetchall()
+
+    def delete(self, learner_id):
+        with self.lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            self.conn.execute("DELETE FROM progress WHERE learner_id = ?", (learner_id,))
+            self.conn.execute("DELETE FROM score_events WHERE learner_id = ?", (learner_id,))
+            self.conn.execute("COMMIT")
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+
+BACKENDS = {
+    "sqlite": SQLiteProgressStore,
+    "memory": MemoryProgressStore,
+}
+
+
+# ---------- WRITE-BEHIND ----------
+
+class WriteBehindWriter:
+    # Keeps only the latest state per learner and flushes them together,
+    # either every flush_interval seconds or as soon as max_pending learners
+    # are waiting. Loads see pending writes, so a reconnect to this process
+    # never reads stale data; with several workers keep flush_interval short.
+    # Score events queue alongside and go out in the same batch.
+
+    def __init__(self, store, flush_interval=5.0, max_pending=200, merge=None):
+        self.store = store
+        self.merge = merge
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.pending = {}
+        self.pending_events = []
+        # The batch being written, still visible to latest() until it is stored.
+        self.in_flight = {}
+        self.lock = threading.Lock()
+        # Held while a batch is being written so a delete cannot be undone by
+        # a flush that picked up the learner's state just before it.
+        self.flush_lock = threading.Lock()
+        self.wake = threading.Event()
+        self.stopped = False
+        self.thread = threading.Thread(target=self._run, name="progress-writer", daemon=True)
+        self.thread.start()
+        atexit.register(self.close)
+
+    def latest(self, learner_id):
+        # The newest document text, pending or stored, or None.
+        with self.lock:
+            entry = self.pending.get(learner_id) or self.in_flight.get(learner_id)
+        if entry is not None:
+            return entry[1]
+        return self.store.load_text(learner_id)
+
+    def load(self, learner_id):
+        text = self.latest(learner_id)
+        return json.loads(text) if text else None
+
+    def put(self, learner_id, document, base=None):
+        # base is the document this session last loaded or saved. Two tabs in
+        # this process can both have a write pending; they merge here, and the
+        # pending entry keeps the older base for the merge with the store.
+        with self.lock:
+            entry = self.pending.get(learner_id)
+            if entry is not None:
+                document = _resolve(entry[1], base, document, self.merge)
+                base = entry[0]
+            self.pending[learner_id] = (base, document)
+            full = len(self.pending) >= self.max_pending
+        if full:
+            self.wake.set()
+
+    def append_event(self, event):
+        with self.lock:
+            self.pending_events.append(event)
+            full = len(self.pending_events) >= self.max_pending
+        if full:
+            self.wake.set()
+
+    def delete(self, learner_id):
+        with self.flush_lock:
+            with self.lock:
+                self.pending.pop(learner_id, None)
+                self.pending_events = [event for event in self.pending_events if event[0] != learner_id]
+            self.store.delete(learner_id)
+
+    def flush(self):
+        with self.flush_lock:
+            with self.lock:
+                batch, self.pending = self.pending, {}
+                events, self.pending_events = self.pending_events, []
+                self.in_flight = batch
+            try:
+                if batch or events:
+                    self.store.save_many(batch, self.merge, events)
+            except Exception:
+                self._requeue(batch, events)
+                raise
+            finally:
+                with self.lock:
+                    self.in_flight = {}
+
+    def _requeue(self, batch, events):
+        # A failed batch goes back in front of what was put since, as if it
+        # had never left: a newer entry for the same learner keeps its
+        # document, merged over the failed one, and the failed entry's base.
+        with self.lock:
+            for learner_id, (base, document) in batch.items():
+                entry = self.pending.get(learner_id)
+                if entry is not None:
+                    document = _resolve(document, entry[0], entry[1], self.merge)
+                self.pending[learner_id] = (base, document)
+            self.pending_events = events + self.pending_events
+
+    def _run(self):
+        # A failed save is logged and retried with the next flush; the
+        # thread keeps running.
+        while not self.stopped:
+            self.wake.wait(self.flush_interval)
+            self.wake.clear()
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Saving progress failed; retrying at the next flush")
+
+    def close(self):
+        if self.stopped:
+            return
+        self.stopped = True
+        self.wake.set()
+        self.thread.join(timeout=self.flush_interval)
+        try:
+            self.flush()
+        finally:
+            self.store.close()
+
+
+def open_progress_writer(backend=None, path=None, flush_interval=None, merge=None):
+    # LOGIC_TUTOR_PROGRESS_BACKEND picks the store ("sqlite" or "memory"),
+    # LOGIC_TUTOR_PROGRESS_DB its location for SQLite; point every worker at
+    # the same file to share progress between them.
+    backend = backend or os.environ.get("LOGIC_TUTOR_PROGRESS_BACKEND", "sqlite")
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown progress backend '{backend}'")
+    if backend == "sqlite":
+        store = SQLiteProgressStore(path or os.environ.get("LOGIC_TUTOR_PROGRESS_DB", DEFAULT_DB_PATH))
+    else:
+        store = BACKENDS[backend]()
+    if flush_interval is None:
+        flush_interval = float(os.environ.get("LOGIC_TUTOR_PROGRESS_FLUSH_SECONDS", "5"))
+    return WriteBehindWriter(store, flush_interval=flush_interval, merge=merge)
+
+
+def serialize_progress(learner):
+    # Serialized on the render thread so the writer never sees state that a
+    # later rerun is still mutating.
+    return dump_document(learner.to_dict())
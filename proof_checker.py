@@ -0,0 +1,155 @@
+import functools
+
+from logic_engine import FormulaError, equivalent, parse_formula
+
+# ---------- EQUIVALENCE PROOF CHECKER ----------
+# Checks a chain of rewrites one step at a time. Every line of the Logical
+# Equivalences chapter ("p ∨ (q ∧ r) ≡ (p ∨ q) ∧ (p ∨ r)") becomes a rewrite
+# rule in both directions, with the law's variables as pattern variables. A
+# step is valid when exactly one rule, applied at one subformula, turns the
+# previous formula into the new one.
+#
+# Formulas are interned (hash-consed) nodes, so a rewritten subformula can be
+# compared with the student's by identity. Outside the rewritten subformula
+# both sides are the same, so only the nodes on the path down to the first
+# difference are tried, and pattern matches are memoized per (rule, subformula).
+
+MAX_CACHE_ENTRIES = 100_000
+
+
+def _match(pattern, term, binding):
+    if pattern.op == "var":
+        bound = binding.get(pattern.name)
+        if bound is None:
+            binding[pattern.name] = term
+            return True
+        return bound is term
+    if pattern.op != term.op or pattern.name != term.name:
+        return False
+    return all(_match(sub_pattern, sub_term, binding) for sub_pattern, sub_term in zip(pattern.args, term.args))
+
+
+def _produces(pattern, binding, term):
+    # Whether the pattern instantiates to term. Checked in place rather than by
+    # building the instance, which would intern new nodes on every try. A
+    # variable only on this side ("T ≡ p ∨ T") may stand for anything.
+    if pattern.op == "var":
+        bound = binding.get(pattern.name)
+        if bound is None:
+            binding[pattern.name] = term
+            return True
+        return bound is term
+    if pattern.op != term.op or pattern.name != term.name:
+        return False
+    return all(_produces(sub_pattern, binding, sub_term) for sub_pattern, sub_term in zip(pattern.args, term.args))
+
+
+def laws_from_equivalences(equivalences):
+    # (law name, left pattern, right pattern) for both directions of every line.
+    rules = []
+    seen = set()
+    for name, laws in equivalences:
+        for line in laws.splitlines():
+            sides = [parse_formula(side.strip()) for side in line.split("≡")]
+            for left, right in zip(sides, sides[1:]):
+                for rule in ((name, left, right), (name, right, left)):
+                    if rule[1:] not in seen:
+                        seen.add(rule[1:])
+                        rules.append(rule)
+    return tuple(rules)
+
+
+class ProofChecker:
+    def __init__(self, rules):
+        self.rules = rules
+        # Indexed by the connectives at the top of both sides; None stands for
+        # a bare pattern variable, which can match or produce anything.
+        self.by_ops = {}
+        for index, (name, left, right) in enumerate(rules):
+            key = (None if left.op == "var" else left.op, None if right.op == "var" else right.op)
+            self.by_ops.setdefault(key, []).append(index)
+        # _produces only adds bindings for variables that the left side lacks.
+        self.copy_binding = [bool(right.variables - left.variables) for name, left, right in rules]
+        self.matches = {}
+        self.justified = {}
+
+    def match(self, index, term):
+        # Pattern variable bindings of the rule's left side on term, or None.
+        key = (index, term)
+        if key not in self.matches:
+            if len(self.matches) >= MAX_CACHE_ENTRIES:
+                self.matches.clear()
+            binding = {}
+            self.matches[key] = binding if _match(self.rules[index][1], term, binding) else None
+        return self.matches[key]
+
+    def _law_at(self, before, after):
+        for key in ((before.op, after.op), (before.op, None), (None, after.op), (None, None)):
+            for index in self.by_ops.get(key, ()):
+                binding = self.match(index, before)
+                if binding is None:
+                    continue
+                if self.copy_binding[index]:
+                    binding = dict(binding)
+                if _produces(self.rules[index][2], binding, after):
+                    return self.rules[index][0]
+        return None
+
+    def justify(self, before, after):
+        # Name of the law that rewrites before into after in one step, or None.
+        key = (before, after)
+        if key in self.justified:
+            return self.justified[key]
+        if len(self.justified) >= MAX_CACHE_ENTRIES:
+            self.justified.clear()
+        law = None
+        while law is None and before is not after:
+            law = self._law_at(before, after)
+            if law is not None or before.op != after.op or before.name != after.name:
+                break
+            # Same connective: the rewrite is inside the one argument that changed.
+            changed = [pair for pair in zip(before.args, after.args) if pair[0] is not pair[1]]
+            if len(changed) != 1:
+                break
+            before, after = changed[0]
+        self.justified[key] = law
+        return law
+
+    def check_step(self, before_text, after_text):
+        # Returns (ok, law name or reason).
+        try:
+            before = parse_formula(before_text.strip())
+            after = parse_formula(after_text.strip())
+        except FormulaError:
+            return False, "unreadable"
+        if before is after:
+            return False, "unchanged"
+        law = self.justify(before, after)
+        if law is not None:
+            return True, law
+        if equivalent(before, after):
+            return False, "several_steps"
+        return False, "not_equivalent"
+
+    def check_chain(self, start, steps):
+        # One (ok, law or reason) per step; each step starts from the last valid one.
+        results = []
+        current = start
+        for step in steps:
+            result = self.check_step(current, step)
+            results.append(result)
+            if result[0]:
+                current = step
+        return results
+
+
+@functools.lru_cache(maxsize=4)
+def _proof_checker(version):
+    import content
+    return ProofChecker(laws_from_equivalences(content.EQUIVALENCES))
+
+
+def get_proof_checker():
+    # One checker, and so one set of memo tables, per content pack version.
+    from content_packs import current_pack
+    return _proof_checker(current_pack().version)
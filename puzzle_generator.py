@@ -0,0 +1,267 @@
+import functools
+import random
+
+import bdd
+from logic_engine import compile_node, make_node, var
+
+# ---------- PUZZLE GENERATOR ----------
+# Knights-and-knaves and syllogism puzzles for the Logic Puzzle game,
+# generated ahead of time into the static content artifact and graded by
+# difficulty. Every candidate is encoded as a formula and kept only if it has
+# exactly one answer, which the BDD kernel (bdd.py) decides exactly:
+#   knights and knaves  each speaker is a knight exactly when their statement
+#                       is true; the conjunction must have a single model
+#   syllogisms          exactly one of the answer options must follow from
+#                       the premises (premises ∧ ¬option unsatisfiable)
+# Serving a puzzle is an index into the pool; nothing is solved while a
+# page renders.
+
+DIFFICULTIES = ("easy", "medium", "hard")
+POOL_SIZE = 40
+GENERATOR_SEED = 2024
+MAX_TRIES = 200
+POINTS = {"easy": 10, "medium": 15, "hard": 20}
+
+PEOPLE = ("Ava", "Ben", "Cleo", "Dev")
+SPEAKERS = {"easy": 2, "medium": 3, "hard": 4}
+CHAIN_LENGTH = {"easy": 2, "medium": 3, "hard": 4}
+OPTION_COUNT = 4
+
+# (clause, negated clause) pairs for syllogisms.
+ATOMS = (
+    ("it rains", "it does not rain"),
+    ("the match is cancelled", "the match is not cancelled"),
+    ("the alarm rings", "the alarm does not ring"),
+    ("Sam wakes up", "Sam does not wake up"),
+    ("Sam makes coffee", "Sam does not make coffee"),
+    ("the lights are on", "the lights are off"),
+    ("the door is locked", "the door is unlocked"),
+    ("the dog barks", "the dog is quiet"),
+    ("the bus is late", "the bus is on time"),
+    ("Mia misses class", "Mia does not miss class"),
+    ("the store is open", "the store is closed"),
+    ("the road is icy", "the road is clear"),
+)
+NOTHING_FOLLOWS = "Nothing can be concluded."
+
+
+def _not(formula):
+    return make_node("not", formula)
+
+
+def _and(*formulas):
+    result = formulas[0]
+    for formula in formulas[1:]:
+        result = make_node("and", result, formula)
+    return result
+
+
+def _or(*formulas):
+    result = formulas[0]
+    for formula in formulas[1:]:
+        result = make_node("or", result, formula)
+    return result
+
+
+def _sentence(clause):
+    return clause[0].upper() + clause[1:] + "."
+
+
+# ---------- KNIGHTS AND KNAVES ----------
+
+def _statements(speaker, others, difficulty):
+    # (text, formula) candidates for what speaker can say.
+    me = var(speaker)
+    options = []
+    for other in others:
+        them = var(other)
+        options += [
+            (f"{other} is a knight.", them),
+            (f"{other} is a knave.", _not(them)),
+            (f"{other} and I are both knaves.", _and(_not(me), _not(them))),
+            (f"{other} and I are the same kind.", make_node("iff", me, them)),
+            (f"At least one of {other} and me is a knave.", make_node("or", _not(me), _not(them))),
+        ]
+    if difficulty != "easy":
+        for first in others:
+            for second in others:
+                if first < second:
+                    options.append((f"Exactly one of {first} and {second} is a knight.",
+                                    make_node("xor", var(first), var(second))))
+                if first != second:
+                    options.append((f"If {first} is a knight, then {second} is a knave.",
+                                    make_node("implies", var(first), _not(var(second)))))
+    if difficulty == "hard":
+        everyone = [var(name) for name in (speaker, *others)]
+        options.append(("All of us are knaves.", _and(*[_not(person) for person in everyone])))
+        options.append(("At least two of us are knights.", _or(*[
+            _and(first, second) for i, first in enumerate(everyone) for second in everyone[i + 1:]
+        ])))
+    return options
+
+
+def _describe(people, assignment):
+    return ", ".join(f"{name} is a {'knight' if assignment[name] else 'knave'}" for name in people) + "."
+
+
+def knights_and_knaves(rng, difficulty):
+    people = PEOPLE[:SPEAKERS[difficulty]]
+    said = []
+    for speaker in people:
+        others = [name for name in people if name != speaker]
+        said.append((speaker, *rng.choice(_statements(speaker, others, difficulty))))
+    rules = _and(*[make_node("iff", var(speaker), formula) for speaker, _, formula in said])
+    if bdd.model_count(rules) != 1:
+        return None
+    solution = bdd.satisfying_assignment(rules)
+
+    assignments = [
+        {name: bool(bits >> (len(people) - 1 - i) & 1) for i, name in enumerate(people)}
+        for bits in range(1 << len(people))
+    ]
+    wrong = [assignment for assignment in assignments if assignment != solution]
+    options = [solution] + rng.sample(wrong, min(OPTION_COUNT - 1, len(wrong)))
+    rng.shuffle(options)
+
+    feedback = {}
+    for assignment in options:
+        if assignment == solution:
+            continue
+        # Name the first speaker whose statement does not fit their kind.
+        for speaker, text, formula in said:
+            if compile_node(formula).evaluate_row(assignment) != assignment[speaker]:
+                kind = "knight" if assignment[speaker] else "knave"
+                truth = "false" if assignment[speaker] else "true"
+                feedback[_describe(people, assignment)] = (
+                    f"Then {speaker} would be a {kind} whose statement \"{text}\" is {truth}."
+                )
+                break
+    lines = [f"**{speaker}** says: \"{text}\"" for speaker, text, _ in said]
+    return {
+        "kind": "knights_and_knaves",
+        "text": ("On this island knights always tell the truth and knaves always lie.\n\n"
+                 + "\n\n".join(lines) + "\n\nWho is a knight and who is a knave?"),
+        "options": [_describe(people, assignment) for assignment in options],
+        "answer": _describe(people, solution),
+        "feedback": feedback,
+    }
+
+
+# ---------- SYLLOGISMS ----------
+# A chain of conditionals plus one fact. Depending on the fact the far end
+# of the chain follows (modus ponens or tollens), or, for the two classic
+# fallacies, nothing does.
+
+def _conditional(rng, antecedent, consequent):
+    template = rng.choice((
+        "If {a}, then {c}.",
+        "{C} whenever {a}.",
+        "{A} only if {c}.",
+    ))
+    return template.format(a=antecedent, c=consequent, A=antecedent[0].upper() + antecedent[1:],
+                           C=consequent[0].upper() + consequent[1:])
+
+
+def syllogism(rng, difficulty):
+    length = CHAIN_LENGTH[difficulty]
+    picked = rng.sample(range(len(ATOMS)), length + 1)
+    atoms, outside = picked[:-1], picked[-1]
+
+    def claim(position, positive):
+        # (sentence, formula) about a chain atom, or the unrelated one for None.
+        index = outside if position is None else atoms[position]
+        formula = var(f"a{index}")
+        return _sentence(ATOMS[index][0 if positive else 1]), formula if positive else _not(formula)
+
+    premises = [
+        (_conditional(rng, ATOMS[a][0], ATOMS[b][0]), make_node("implies", var(f"a{a}"), var(f"a{b}")))
+        for a, b in zip(atoms, atoms[1:])
+    ]
+    middle = length > 2
+    tempting = {}
+    mode = rng.choice(("ponens", "tollens") if difficulty == "easy" else ("ponens", "tollens", "fallacy"))
+    if mode == "ponens":
+        fact, answer = claim(0, True), claim(-1, True)
+        distractors = [claim(-1, False), claim(None, True), claim(None, False)] + [claim(1, False)] * middle
+    elif mode == "tollens":
+        fact, answer = claim(-1, False), claim(0, False)
+        distractors = [claim(0, True), claim(None, True), claim(None, False)] + [claim(1, True)] * middle
+    else:
+        answer = None
+        if rng.random() < 0.5:
+            fact = claim(-1, True)
+            distractors = [claim(0, True), claim(0, False), claim(None, True)]
+            tempting[distractors[0][0]] = "That is affirming the consequent: the last step can be true for other reasons."
+        else:
+            fact = claim(0, False)
+            distractors = [claim(-1, False), claim(-1, True), claim(None, True)]
+            tempting[distractors[0][0]] = "That is denying the antecedent: the chain says nothing once its start is false."
+    premises.append(fact)
+    if difficulty != "easy":
+        rng.shuffle(premises)
+
+    options = ([answer] if answer else []) + rng.sample(distractors, OPTION_COUNT - 1 - bool(answer))
+    answer_text = answer[0] if answer else NOTHING_FOLLOWS
+    rules = _and(*[formula for _, formula in premises])
+    if not bdd.is_satisfiable(rules):
+        return None
+    feedback = {}
+    for text, formula in options:
+        follows = not bdd.is_satisfiable(_and(rules, _not(formula)))
+        if follows != (text == answer_text):
+            return None
+        if text != answer_text:
+            feedback[text] = tempting.get(text) or (
+                "That contradicts the premises." if not bdd.is_satisfiable(_and(rules, formula))
+                else "That could be true, but the premises do not force it."
+            )
+    if answer:
+        feedback[NOTHING_FOLLOWS] = "Something does follow: chain the premises together."
+    texts = [text for text, _ in options] + [NOTHING_FOLLOWS]
+    rng.shuffle(texts)
+    return {
+        "kind": "syllogism",
+        "text": "\n".join(f"- {text}" for text, _ in premises) + "\n\nWhat follows?",
+        "options": texts,
+        "answer": answer_text,
+        "feedback": feedback,
+    }
+
+
+# ---------- POOL ----------
+
+def generate_puzzle_pool(seed=GENERATOR_SEED, size=POOL_SIZE):
+    # {difficulty: [puzzle, ...]}, both kinds mixed. Easy knights-and-knaves
+    # puzzles run out first (two speakers say few different things), so
+    # the easy pool holds more syllogisms. Each puzzle carries its own
+    # success and per-option feedback.
+    rng = random.Random(seed)
+    pool = {}
+    for difficulty in DIFFICULTIES:
+        puzzles = []
+        seen = set()
+        generators = (knights_and_knaves, syllogism)
+        for _ in range(size * MAX_TRIES):
+            if len(puzzles) >= size:
+                break
+            puzzle = rng.choice(generators)(rng, difficulty)
+            if puzzle is None or puzzle["text"] in seen:
+                continue
+            seen.add(puzzle["text"])
+            puzzle["difficulty"] = difficulty
+            puzzle["points"] = POINTS[difficulty]
+            puzzle["success"] = f"Correct! {puzzle['answer']}"
+            puzzles.append(puzzle)
+        pool[difficulty] = puzzles
+    return pool
+
+
+@functools.lru_cache(maxsize=4)
+def _puzzle_pool(version):
+    from static_content import load_static_content
+    return load_static_content(version)["puzzles"]
+
+
+def get_puzzle_pool():
+    from content_packs import current_pack
+    return _puzzle_pool(current_pack().version)
@@ -0,0 +1,408 @@
+import functools
+import itertools
+import random
+
+from logic_engine import compile_node, equivalent, format_formula, make_node, var
+
+# ---------- QUESTION GENERATOR ----------
+# Quiz questions are generated from templates once per process and indexed by
+# (level, topic, difficulty). Each question is a dict in the same shape the
+# quiz pages have always used, plus "id", "level", "topic" and "difficulty".
+
+LEVELS = ("beginner", "intermediate", "advanced")
+BASE_POINTS = {"beginner": 10, "intermediate": 20, "advanced": 30}
+GENERATOR_SEED = 2024
+
+CONNECTIVE_NAMES = {
+    "not": "NOT", "and": "AND", "or": "OR",
+    "implies": "IMPLIES", "iff": "IF AND ONLY IF", "xor": "XOR",
+}
+CONNECTIVE_SYMBOLS = {
+    "not": "¬", "and": "∧", "or": "∨", "implies": "→", "iff": "↔", "xor": "⊕",
+}
+CONNECTIVE_TITLES = {
+    "not": "NOT (negation)", "and": "AND (conjunction)", "or": "OR (disjunction)",
+    "implies": "IMPLIES (conditional)", "iff": "IF AND ONLY IF (biconditional)",
+    "xor": "XOR (exclusive or)",
+}
+CONNECTIVE_RULES = {
+    "not": "NOT flips the truth value of its operand.",
+    "and": "AND is only true when both operands are true.",
+    "or": "OR is true when at least one operand is true.",
+    "implies": "IMPLIES is false only when the first part is true and the second is false.",
+    "iff": "IF AND ONLY IF is true when both sides have the same truth value.",
+    "xor": "XOR is true when exactly one operand is true.",
+}
+# How hard students find each connective: NOT/AND/OR are intuitive, XOR and
+# the biconditional take practice, and the vacuous truth of → trips most people.
+CONNECTIVE_DIFFICULTY = {"not": 1, "and": 1, "or": 1, "iff": 2, "xor": 2, "implies": 3}
+BINARY_CONNECTIVES = ("and", "or", "implies", "iff", "xor")
+
+VALUE_OPTIONS = ["TRUE", "FALSE", "Cannot determine", "Both TRUE and FALSE"]
+
+RELATED_FORMS = {
+    "converse": ("q → p", "Simply reverse the order without negating."),
+    "inverse": ("¬p → ¬q", "Negate both parts but keep the same order."),
+    "contrapositive": ("¬q → ¬p", "Contrapositive: negate both parts and reverse them."),
+}
+RELATED_FORM_DIFFICULTY = {"converse": 1, "inverse": 2, "contrapositive": 2}
+
+
+def _value(flag):
+    return "TRUE" if flag else "FALSE"
+
+
+def _question(level, topic, difficulty, question, options, correct, hint, explanation,
+              error_feedback):
+    return {
+        "level": level,
+        "topic": topic,
+        "difficulty": difficulty,
+        "question": question,
+        "options": options,
+        "correct": correct,
+        "hint": hint,
+        "explanation": explanation,
+        "points": BASE_POINTS[level] + 5 * (difficulty - 1),
+        "error_feedback": error_feedback,
+    }
+
+
+def _shuffled(rng, correct_option, distractors):
+    options = [correct_option, *distractors]
+    rng.shuffle(options)
+    return options, options.index(correct_option)
+
+
+def _value_feedback(op, correct):
+    return {
+        _value(not correct): f"Remember: {CONNECTIVE_RULES[op]}",
+        "Cannot determine": "With specific truth values, we can always determine the result",
+        "Both TRUE and FALSE": "A proposition cannot be both true and false simultaneously",
+    }
+
+
+def generate_literal_evaluation():
+    for op in ("not", *BINARY_CONNECTIVES):
+        if op == "not":
+            cases = [(value,) for value in (True, False)]
+        else:
+            cases = list(itertools.product((True, False), repeat=2))
+        formula = make_node(op, *[var(name) for name in "pq"[:len(cases[0])]])
+        compiled = compile_node(formula)
+        for values in cases:
+            result = compiled.evaluate_row(dict(zip(compiled.variables, values)))
+            if op == "not":
+                expression = f"NOT {_value(values[0])}"
+            else:
+                expression = f"{_value(values[0])} {CONNECTIVE_NAMES[op]} {_value(values[1])}"
+            yield _question(
+                "beginner", "connective_evaluation", CONNECTIVE_DIFFICULTY[op],
+                f"What is the result of {expression}?",
+                list(VALUE_OPTIONS), VALUE_OPTIONS.index(_value(result)),
+                CONNECTIVE_RULES[op],
+                f"{CONNECTIVE_RULES[op]} So {expression} is {_value(result)}.",
+                _value_feedback(op, result),
+            )
+
+
+def generate_symbol_identification(rng):
+    for op, symbol in CONNECTIVE_SYMBOLS.items():
+        others = [other for other in CONNECTIVE_SYMBOLS if other != op]
+        distractors = rng.sample(others, 3)
+        options, correct = _shuffled(rng, symbol, [CONNECTIVE_SYMBOLS[d] for d in distractors])
+        yield _question(
+            "beginner", "symbols", 1,
+            f"Which connective represents logical {CONNECTIVE_NAMES[op]}?",
+            options, correct,
+            f"{CONNECTIVE_NAMES[op]} is represented by the {symbol} symbol.",
+            f"{symbol} is the symbol for {CONNECTIVE_TITLES[op]}.",
+            {
+                CONNECTIVE_SYMBOLS[d]: f"That's the symbol for {CONNECTIVE_TITLES[d]}, "
+                                       f"not {CONNECTIVE_NAMES[op]}"
+                for d in distractors
+            },
+        )
+
+
+def _two_variable_formulas():
+    literals = {
+        "p": [var("p"), make_node("not", var("p"))],
+        "q": [var("q"), make_node("not", var("q"))],
+    }
+    for op in BINARY_CONNECTIVES:
+        for left, right in itertools.product(literals["p"], literals["q"]):
+            yield op, make_node(op, left, right)
+
+
+def _formula_difficulty(op, formula):
+    # Intermediate formulas get harder with the connective and every negation.
+    negations = format_formula(formula).count("¬")
+    return min(3, max(1, CONNECTIVE_DIFFICULTY[op] - 1) + negations)
+
+
+def generate_assignment_evaluation():
+    for op, formula in _two_variable_formulas():
+        compiled = compile_node(formula)
+        text = compiled.text
+        difficulty = _formula_difficulty(op, formula)
+        for values in itertools.product((True, False), repeat=2):
+            assignment = dict(zip(compiled.variables, values))
+            result = compiled.evaluate_row(assignment)
+            given = " and ".join(f"{name} is {_value(value)}" for name, value in assignment.items())
+            yield _question(
+                "intermediate", "connective_evaluation", difficulty,
+                f"If {given}, what is the value of {text}?",
+                list(VALUE_OPTIONS), VALUE_OPTIONS.index(_value(result)),
+                f"Work out each negation first, then apply {CONNECTIVE_NAMES[op]}.",
+                f"With {given}, {text} evaluates to {_value(result)}. {CONNECTIVE_RULES[op]}",
+                _value_feedback(op, result),
+            )
+
+
+def _assignment_text(assignment):
+    return ", ".join(f"{name} is {_value(value)}" for name, value in assignment.items())
+
+
+def generate_truth_conditions(rng):
+    # "If X is FALSE, what must be true?" only has one answer when exactly one
+    # row of the table gives X that value.
+    for op, formula in _two_variable_formulas():
+        compiled = compile_node(formula)
+        rows = [dict(zip(compiled.variables, values))
+                for values in itertools.product((True, False), repeat=2)]
+        for target in (True, False):
+            matching = [row for row in rows if compiled.evaluate_row(row) == target]
+            if len(matching) != 1:
+                continue
+            answer = matching[0]
+            others = [row for row in rows if row is not answer]
+            feedback = {
+                _assignment_text(row): f"When {_assignment_text(row)}, {compiled.text} is "
+                                       f"{_value(not target)}"
+                for row in others
+            }
+            options, correct = _shuffled(rng, _assignment_text(answer), list(feedback))
+            yield _question(
+                "intermediate", "truth_conditions",
+                _formula_difficulty(op, formula),
+                f"If {compiled.text} is {_value(target)}, what must be true?",
+                options, correct,
+                f"{compiled.text} is {_value(target)} in only one row of its truth table.",
+                f"{CONNECTIVE_RULES[op]} The only row where {compiled.text} is "
+                f"{_value(target)} is {_assignment_text(answer)}.",
+                feedback,
+            )
+
+
+def _related_sentences(conditional):
+    p, not_p, q, not_q = conditional
+    return {
+        "original": f"If {p}, then {q}",
+        "converse": f"If {q}, then {p}",
+        "inverse": f"If {not_p}, then {not_q}",
+        "contrapositive": f"If {not_q}, then {not_p}",
+        "biconditional": f"{p[0].upper()}{p[1:]} if and only if {q}",
+        "contradiction": f"If {p}, then {not_q}",
+    }
+
+
+def generate_related_conditionals(rng, conditionals):
+    # conditionals: (antecedent, negated antecedent, consequent, negated consequent)
+    for conditional in conditionals:
+        sentences = _related_sentences(conditional)
+        original = sentences["original"]
+        for form, (pattern, hint) in RELATED_FORMS.items():
+            feedback = {
+                sentences[other]: f"That's the {other}, not the {form}"
+                for other in ("converse", "inverse", "contrapositive", "biconditional")
+                if other != form
+            }
+            options, correct = _shuffled(rng, sentences[form], list(feedback))
+            yield _question(
+                "intermediate", "related_conditionals", RELATED_FORM_DIFFICULTY[form],
+                f"What is the {form} of '{original}'?",
+                options, correct, hint,
+                f"Original: p → q where p='{conditional[0]}', q='{conditional[2]}'. "
+                f"{form.title()}: {pattern} = '{sentences[form]}'.",
+                feedback,
+            )
+
+        feedback = {
+            sentences["converse"]: "That's the converse, which may not be true",
+            sentences["inverse"]: "That's the inverse, which may not be true",
+            sentences["contradiction"]: "That contradicts the original statement",
+        }
+        options, correct = _shuffled(rng, sentences["contrapositive"], list(feedback))
+        yield _question(
+            "advanced", "related_conditionals", 3,
+            f"If '{original}' is true, which of these must also be true?",
+            options, correct,
+            "Think about the contrapositive.",
+            f"Let p='{conditional[0]}', q='{conditional[2]}'. Original: p → q. The "
+            f"contrapositive ¬q → ¬p is equivalent, so it must also be true: "
+            f"'{sentences['contrapositive']}'.",
+            feedback,
+        )
+
+
+def _negate(literal):
+    return literal.args[0] if literal.op == "not" else make_node("not", literal)
+
+
+def generate_de_morgan(rng):
+    names = ("p", "q", "r", "s")
+    flipped = {"and": "or", "or": "and"}
+    for left_name, right_name in itertools.combinations(names, 2):
+        for left_negated, right_negated in itertools.product((False, True), repeat=2):
+            left = make_node("not", var(left_name)) if left_negated else var(left_name)
+            right = make_node("not", var(right_name)) if right_negated else var(right_name)
+            for op in ("and", "or"):
+                inner = make_node(op, left, right)
+                formula = make_node("not", inner)
+                answer = make_node(flipped[op], _negate(left), _negate(right))
+                candidates = {
+                    make_node(op, _negate(left), _negate(right)):
+                        f"The connective must flip: ¬ over {CONNECTIVE_SYMBOLS[op]} becomes "
+                        f"{CONNECTIVE_SYMBOLS[flipped[op]]}",
+                    make_node(flipped[op], left, right):
+                        "Each part must be negated as well",
+                    make_node(flipped[op], _negate(left), right):
+                        "Both parts must be negated, not just the first",
+                    inner: "That's the original expression without negation",
+                }
+                distractors = {
+                    format_formula(node): message for node, message in candidates.items()
+                    if not equivalent(node, formula)
+                }
+                distractors = dict(list(distractors.items())[:3])
+                options, correct = _shuffled(rng, format_formula(answer), list(distractors))
+                difficulty = 1 + left_negated + right_negated
+                yield _question(
+                    "advanced", "de_morgan", difficulty,
+                    f"Which expression is logically equivalent to {format_formula(formula)}?",
+                    options, correct,
+                    "This is one of De Morgan's Laws.",
+                    f"De Morgan's Law: {format_formula(formula)} ≡ "
+                    f"{format_formula(make_node(flipped[op], make_node('not', left), make_node('not', right)))}"
+                    f" ≡ {format_formula(answer)}. The negation distributes and flips "
+                    f"{CONNECTIVE_NAMES[op]} to {CONNECTIVE_NAMES[flipped[op]]}.",
+                    distractors,
+                )
+
+
+def generate_questions(parts, seed=GENERATOR_SEED):
+    # parts: (conditionals, questions) from each content pack in load order,
+    # core first (ContentPack.parts). Question ids are positions, so each
+    # pack's questions are numbered after everything the packs before it
+    # add: the built-in sets come from the core pack alone, with their own
+    # seeded rng, and a pack's edits never renumber (and so never reset the
+    # history of) a question of the core or of an earlier pack. Each added
+    # conditional shuffles its options with its own rng, so editing one
+    # leaves the others' questions as they were.
+    (core_conditionals, core_questions), *packs = parts
+    rng = random.Random(seed)
+    generators = [
+        generate_literal_evaluation(),
+        generate_symbol_identification(rng),
+        generate_assignment_evaluation(),
+        generate_truth_conditions(rng),
+        generate_related_conditionals(rng, core_conditionals),
+        generate_de_morgan(rng),
+        (dict(question) for question in core_questions),
+    ]
+    for conditionals, pack_questions in packs:
+        generators.extend(
+            generate_related_conditionals(random.Random(f"{seed}:{'|'.join(conditional)}"), [conditional])
+            for conditional in conditionals
+        )
+        generators.append(dict(question) for question in pack_questions)
+    questions = []
+    for question in itertools.chain(*generators):
+        question["id"] = len(questions)
+        questions.append(question)
+    return questions
+
+
+# ---------- QUESTION BANK ----------
+
+class QuestionBank:
+    # Every lookup the quiz pages and the scheduler make is one dict access:
+    # questions are indexed by level, by (level, topic), by (level,
+    # difficulty) and by (level, topic, difficulty), so no call scans the bank.
+    def __init__(self, questions):
+        self.questions = tuple(questions)
+        self.by_level = {level: [] for level in LEVELS}
+        self.by_topic = {}
+        self.by_difficulty = {}
+        self.by_key = {}
+        self.keys_by_topic = {}
+        self.topics_by_level = {level: [] for level in LEVELS}
+        for question in self.questions:
+            level, topic, difficulty = key = (question["level"], question["topic"], question["difficulty"])
+            self.by_level[level].append(question)
+            if (level, topic) not in self.by_topic:
+                self.by_topic[(level, topic)] = []
+                self.topics_by_level.setdefault(level, []).append(topic)
+            self.by_topic[(level, topic)].append(question)
+            self.by_difficulty.setdefault((level, difficulty), []).append(question)
+            if key not in self.by_key:
+                self.by_key[key] = []
+                self.keys_by_topic.setdefault(key[:2], []).append(key)
+            self.by_key[key].append(question)
+        for topics in self.topics_by_level.values():
+            topics.sort()
+
+    def __len__(self):
+        return len(self.questions)
+
+    def get(self, question_id):
+        # None for ids saved against a content pack version that had more questions.
+        if 0 <= question_id < len(self.questions):
+            return self.questions[question_id]
+        return None
+
+    def pool(self, level, topic=None, difficulty=None):
+        if topic is None and difficulty is None:
+            return self.by_level.get(level, [])
+        if difficulty is None:
+            return self.by_topic.get((level, topic), [])
+        if topic is None:
+            return self.by_difficulty.get((level, difficulty), [])
+        return self.by_key.get((level, topic, difficulty), [])
+
+    def topics(self, level):
+        return list(self.topics_by_level.get(level, ()))
+
+    def random_question(self, level, topic, difficulty, rng=random):
+        return rng.choice(self.by_key[(level, topic, difficulty)])
+
+    def sample(self, level, count, rng=random):
+        # Draw one question per topic in turn so a short quiz mixes templates.
+        topics = self.topics(level)
+        rng.shuffle(topics)
+        chosen = []
+        seen = set()
+        attempts = 0
+        while len(chosen) < count and attempts < count * 10:
+            topic = topics[attempts % len(topics)]
+            attempts += 1
+            key = rng.choice(self.keys_by_topic[(level, topic)])
+            question = self.random_question(*key, rng=rng)
+            if question["id"] not in seen:
+                seen.add(question["id"])
+                chosen.append(question)
+        return chosen
+
+
+def get_question_bank():
+    # Questions come from the precompiled static content when it is current;
+    # one bank is built per content pack version.
+    from content_packs import current_pack
+    return _question_bank(current_pack().version)
+
+
+@functools.lru_cache(maxsize=4)
+def _question_bank(version):
+    from static_content import load_static_content
+    return QuestionBank(load_static_content(version)["questions"])
@@ -0,0 +1,176 @@
+import functools
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from logic_engine import FormulaError, format_formula, parse_formula
+
+# ---------- RESULT CACHE ----------
+# Results of logic work (answer verdicts, truth tables, equivalence checks,
+# proof chains), shared by every session of the process. Keys hold canonical
+# formula text, so "p & q", "p∧q" and "(p ∧ q)" are the same entry and a
+# cohort typing the same answer has it graded once.
+#
+# Each named cache is an LRU of at most maxsize entries that also drops
+# entries older than its TTL, and counts hits, misses, evictions and
+# expirations. With LOGIC_TUTOR_RESULT_CACHE_DB set, entries are also kept in
+# that SQLite file, so a restarted worker (or another one on the same host)
+# starts warm. Values must be picklable.
+
+DEFAULT_TTL_SECONDS = 3600
+CACHE_SIZES = {
+    "verdicts": 65536,
+    "truth_tables": 256,
+    "counterexamples": 4096,
+    "proofs": 4096,
+}
+MISSING = object()
+
+
+@functools.lru_cache(maxsize=65536)
+def canonical_formula(text):
+    # Raises FormulaError for unreadable text.
+    return format_formula(parse_formula(text.strip()))
+
+
+def canonical_or_text(text):
+    try:
+        return canonical_formula(text)
+    except FormulaError:
+        return text.strip()
+
+
+class DiskTier:
+    def __init__(self, path):
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS results ("
+            " cache TEXT NOT NULL,"
+            " key TEXT NOT NULL,"
+            " value BLOB NOT NULL,"
+            " expires_at REAL NOT NULL,"
+            " PRIMARY KEY (cache, key))"
+        )
+        self.conn.execute("DELETE FROM results WHERE expires_at <= ?", (time.time(),))
+
+    def get(self, cache, key):
+        # (expires_at, value) or None.
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT expires_at, value FROM results WHERE cache = ? AND key = ? AND expires_at > ?",
+                (cache, repr(key), time.time())
+            ).fetchone()
+        return (row[0], pickle.loads(row[1])) if row else None
+
+    def put(self, cache, key, value, expires_at):
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?)",
+                (cache, repr(key), pickle.dumps(value, pickle.HIGHEST_PROTOCOL), expires_at)
+            )
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+
+class ResultCache:
+    def __init__(self, name, maxsize, ttl=DEFAULT_TTL_SECONDS, disk=None):
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.disk = disk
+        self.lock = threading.Lock()
+        # key -> (expires_at, value), least recently used first.
+        self.entries = OrderedDict()
+        self.hits = self.misses = self.evictions = self.expirations = self.disk_hits = 0
+
+    def get(self, key):
+        # The cached value, or MISSING.
+        now = time.time()
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                if entry[0] > now:
+                    self.entries.move_to_end(key)
+                    self.hits += 1
+                    return entry[1]
+                del self.entries[key]
+                self.expirations += 1
+        entry = self.disk.get(self.name, key) if self.disk is not None else None
+        with self.lock:
+            if entry is None:
+                self.misses += 1
+                return MISSING
+            self.hits += 1
+            self.disk_hits += 1
+            self._store(key, entry)
+        return entry[1]
+
+    def put(self, key, value):
+        expires_at = time.time() + self.ttl
+        with self.lock:
+            self._store(key, (expires_at, value))
+        if self.disk is not None:
+            self.disk.put(self.name, key, value, expires_at)
+
+    def _store(self, key, entry):
+        self.entries[key] = entry
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def get_or_compute(self, key, func, *args):
+        value = self.get(key)
+        if value is MISSING:
+            value = func(*args)
+            self.put(key, value)
+        return value
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def stats(self):
+        with self.lock:
+            return {
+                "cache": self.name, "entries": len(self.entries), "hits": self.hits,
+                "misses": self.misses, "evictions": self.evictions,
+                "expirations": self.expirations, "disk_hits": self.disk_hits,
+            }
+
+
+_CACHES = {}
+_CACHES_LOCK = threading.Lock()
+_DISK = []
+
+
+def _disk_tier():
+    # Opened once per process, on the first cache that needs it.
+    if not _DISK:
+        path = os.environ.get("LOGIC_TUTOR_RESULT_CACHE_DB")
+        _DISK.append(DiskTier(path) if path else None)
+    return _DISK[0]
+
+
+def get_cache(name):
+    # LOGIC_TUTOR_RESULT_CACHE_TTL sets the TTL in seconds for every cache.
+    with _CACHES_LOCK:
+        cache = _CACHES.get(name)
+        if cache is None:
+            ttl = float(os.environ.get("LOGIC_TUTOR_RESULT_CACHE_TTL", DEFAULT_TTL_SECONDS))
+            cache = _CACHES[name] = ResultCache(name, CACHE_SIZES[name], ttl, _disk_tier())
+        return cache
+
+
+def cache_stats():
+    with _CACHES_LOCK:
+        caches = list(_CACHES.values())
+    return [cache.stats() for cache in caches]
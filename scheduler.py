@@ -0,0 +1,287 @@
+import bisect
+import heapq
+import math
+import random
+from array import array
+
+# ---------- ADAPTIVE SCHEDULER ----------
+# Picks each learner's next question from their own history:
+#   * every (level, topic) has an Elo-style ability estimate, nudged after
+#     each answer towards how surprising the outcome was;
+#   * answered questions go on a per-level review heap keyed by the step at
+#     which they are due again (Leitner boxes: a miss resets the box, each
+#     correct answer pushes the next review further away until it retires);
+#   * new questions come from the weakest topic, at the difficulty whose
+#     predicted success rate is closest to TARGET_SUCCESS.
+# Selection pops heaps and walks per-bucket cursors, so it never scans the
+# bank. State is a dict kept small for per-session memory: Leitner boxes are
+# packed ints in an array parallel to the sorted ids of the questions that
+# have one, so they grow with the questions answered and not with the bank;
+# review entries are packed ints, and export/load_scheduler_state convert it
+# to and from JSON.
+
+TARGET_SUCCESS = 0.7
+LEARNING_RATE = 0.4
+EXPLORATION = 0.2
+REVIEW_GAPS = (2, 5, 12, 30)
+LEVEL_OFFSET = {"beginner": -1.0, "intermediate": 0.0, "advanced": 1.0}
+# Box entries pack (due step << BOX_BITS) | box, 0 meaning no pending review;
+# review heap entries pack (due step << ID_BITS) | question id.
+BOX_BITS = 3
+ID_BITS = 20
+ID_MASK = (1 << ID_BITS) - 1
+
+
+def new_scheduler_state():
+    return {
+        "step": 0,
+        "ability": {},
+        "reviews": {},
+        "box_ids": array("I"),
+        "boxes": array("I"),
+        "cursors": {},
+    }
+
+
+def export_scheduler_state(state):
+    document = dict(state)
+    document["box_ids"] = state["box_ids"].tolist()
+    document["boxes"] = state["boxes"].tolist()
+    return document
+
+
+def load_scheduler_state(document):
+    state = new_scheduler_state()
+    if not document:
+        return state
+    state.update(document)
+    boxes = document.get("boxes", [])
+    state["box_ids"], state["boxes"] = array("I"), array("I")
+    if isinstance(boxes, dict):
+        # Saved before boxes were packed: {"id": [box, due]} and [due, id] heap entries.
+        for question_id, (box, due) in boxes.items():
+            _set_box(state, int(question_id), due << BOX_BITS | box)
+        state["reviews"] = {
+            level: sorted(due << ID_BITS | question_id for due, question_id in heap)
+            for level, heap in document.get("reviews", {}).items()
+        }
+    elif "box_ids" not in document:
+        # Saved as one packed entry per question id, 0 for none.
+        for question_id, packed in enumerate(boxes):
+            if packed:
+                _set_box(state, question_id, packed)
+    else:
+        state["box_ids"], state["boxes"] = array("I", document["box_ids"]), array("I", boxes)
+    return state
+
+
+def _box(state, question_id):
+    ids = state["box_ids"]
+    index = bisect.bisect_left(ids, question_id)
+    if index < len(ids) and ids[index] == question_id:
+        return state["boxes"][index]
+    return 0
+
+
+def _set_box(state, question_id, packed):
+    # packed 0 removes the question's box.
+    ids, boxes = state["box_ids"], state["boxes"]
+    index = bisect.bisect_left(ids, question_id)
+    if index < len(ids) and ids[index] == question_id:
+        if packed:
+            boxes[index] = packed
+        else:
+            del ids[index], boxes[index]
+    elif packed:
+        ids.insert(index, question_id)
+        boxes.insert(index, packed)
+
+
+def _sigmoid(x):
+    return 1.0 / (1.0 + math.exp(-x))
+
+
+def item_difficulty(question):
+    return LEVEL_OFFSET.get(question["level"], 0.0) + 0.5 * (question["difficulty"] - 2)
+
+
+def _topic_key(level, topic):
+    return f"{level}/{topic}"
+
+
+class AdaptiveScheduler:
+    def __init__(self, bank, state=None, rng=None):
+        self.bank = bank
+        self.state = state if state is not None else new_scheduler_state()
+        self.rng = rng or random.Random()
+
+    # ----- estimates -----
+
+    def ability(self, level, topic):
+        return self.state["ability"].get(_topic_key(level, topic), 0.0)
+
+    def predicted_success(self, question):
+        return _sigmoid(self.ability(question["level"], question["topic"]) - item_difficulty(question))
+
+    def mastery(self, level, topic):
+        # Chance of answering a medium question of the topic at this level.
+        return _sigmoid(self.ability(level, topic) - LEVEL_OFFSET.get(level, 0.0))
+
+    # ----- updates -----
+
+    def record(self, question, correct):
+        state = self.state
+        state["step"] += 1
+        key = _topic_key(question["level"], question["topic"])
+        expected = self.predicted_success(question)
+        state["ability"][key] = self.ability(question["level"], question["topic"]) + \
+            LEARNING_RATE * ((1.0 if correct else 0.0) - expected)
+
+        question_id = question["id"]
+        packed = _box(state, question_id)
+        box = (packed & ((1 << BOX_BITS) - 1)) + 1 if correct else 0
+        if box >= len(REVIEW_GAPS):
+            _set_box(state, question_id, 0)
+            return
+        due = state["step"] + REVIEW_GAPS[box]
+        # Heap entries whose due step no longer matches the box have been
+        # superseded by a later answer and are dropped when reached.
+        _set_box(state, question_id, due << BOX_BITS | box)
+        heapq.heappush(state["reviews"].setdefault(question["level"], []), due << ID_BITS | question_id)
+
+    def _is_current(self, entry):
+        packed = _box(self.state, entry & ID_MASK)
+        return packed != 0 and packed >> BOX_BITS == entry >> ID_BITS
+
+    # ----- selection -----
+
+    def _due_review(self, level, exclude):
+        # A due review stays on the heap until it is answered again.
+        heap = self.state["reviews"].get(level)
+        kept = []
+        found = None
+        while heap and heap[0] >> ID_BITS <= self.state["step"]:
+            entry = heapq.heappop(heap)
+            if not self._is_current(entry):
+                continue
+            question = self.bank.get(entry & ID_MASK)
+            if question is None:
+                # Dropped by a content pack update.
+                continue
+            kept.append(entry)
+            if entry & ID_MASK not in exclude:
+                found = question
+                break
+        for entry in kept:
+            heapq.heappush(heap, entry)
+        return found
+
+    def _weakest_topic(self, level):
+        topics = self.bank.topics(level)
+        if not topics:
+            return None
+        if self.rng.random() < EXPLORATION:
+            return self.rng.choice(topics)
+        return min(topics, key=lambda topic: self.ability(level, topic))
+
+    def _bucket_order(self, level, topic):
+        # Difficulties nearest the target success rate first.
+        ability = self.ability(level, topic)
+        target = ability - math.log(TARGET_SUCCESS / (1 - TARGET_SUCCESS))
+        keys = self.bank.keys_by_topic.get((level, topic), [])
+        return sorted(keys, key=lambda key: abs(
+            LEVEL_OFFSET.get(level, 0.0) + 0.5 * (key[2] - 2) - target
+        ))
+
+    def _next_in_bucket(self, key, exclude):
+        # Walks the bucket in a per-learner pseudo-random order (offset plus a
+        # stride coprime with its size), so each question is new until the
+        # bucket is exhausted, without keeping a set of seen ids.
+        questions = self.bank.by_key[key]
+        size = len(questions)
+        cursor_key = "|".join(map(str, key))
+        cursor = self.state["cursors"].get(cursor_key)
+        if cursor is None or cursor[2] != size:
+            stride = 1
+            if size > 2:
+                stride = self.rng.randrange(1, size)
+                while math.gcd(stride, size) != 1:
+                    stride = self.rng.randrange(1, size)
+            cursor = [self.rng.randrange(size), stride, size, 0]
+            self.state["cursors"][cursor_key] = cursor
+        if cursor[3] >= size:
+            return None
+        for _ in range(min(size - cursor[3], len(exclude) + 1)):
+            question = questions[(cursor[0] + cursor[3] * cursor[1]) % size]
+            cursor[3] += 1
+            if question["id"] not in exclude:
+                return question
+            if cursor[3] >= size:
+                break
+        return None
+
+    def _new_question(self, level, exclude, topic=None):
+        topic = topic or self._weakest_topic(level)
+        if topic is None:
+            return None
+        topics = [topic] + [other for other in self.bank.topics(level) if other != topic]
+        for candidate in topics:
+            for key in self._bucket_order(level, candidate):
+                question = self._next_in_bucket(key, exclude)
+                if question is not None:
+                    return question
+        # Everything has been seen once: start new passes over the buckets.
+        for key in list(self.state["cursors"]):
+            if key.startswith(f"{level}|"):
+                del self.state["cursors"][key]
+        for key in self._bucket_order(level, topic):
+            question = self._next_in_bucket(key, exclude)
+            if question is not None:
+                return question
+        return None
+
+    def next_question(self, level, exclude=()):
+        exclude = set(exclude)
+        return self._due_review(level, exclude) or self._new_question(level, exclude)
+
+    def draw(self, level, count):
+        # A whole quiz at once: due reviews first, then new questions taking
+        # the topics in turn, weakest first, so one quiz mixes topics.
+        topics = sorted(self.bank.topics(level), key=lambda topic: self.ability(level, topic))
+        chosen = []
+        exclude = set()
+        for index in range(count):
+            question = self._due_review(level, exclude)
+            if question is None and topics:
+                question = self._new_question(level, exclude, topics[index % len(topics)])
+            if question is None:
+                break
+            chosen.append(question)
+            exclude.add(question["id"])
+        return chosen
+
+    def recommended_level(self, promote_at=0.75):
+        # The first level whose practised topics are not yet mastered.
+        for level in LEVEL_OFFSET:
+            topics = self.bank.topics(level)
+            if not topics:
+                continue
+            average = sum(self.mastery(level, topic) for topic in topics) / len(topics)
+            if average < promote_at:
+                return level
+        return level
+
+    def due_reviews(self, level):
+        return sum(
+            1 for entry in self.state["reviews"].get(level, [])
+            if entry >> ID_BITS <= self.state["step"] and self._is_current(entry)
+        )
+
+    def weakest_topics(self, count=3, threshold=0.6):
+        scored = [
+            (self.mastery(level, topic), level, topic)
+            for level in LEVEL_OFFSET
+            for topic in self.bank.topics(level)
+            if _topic_key(level, topic) in self.state["ability"]
+        ]
+        return [entry for entry in heapq.nsmallest(count, scored) if entry[0] < threshold]
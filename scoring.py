@@ -0,0 +1,93 @@
+import argparse
+import collections
+import os
+import sys
+import time
+
+from learner_state import LearnerState
+
+# ---------- SCORE EVENTS ----------
+# Points are never added where an answer is checked. A correct answer becomes
+# a ScoreEvent whose idempotency key is (session, item, attempt): the attempt
+# is a per-session counter of the activity that moves on when the learner
+# starts over (new quiz questions, Play Again, a new truth table cycle), so
+# pressing "Check" again on an item that already scored, or a rerun that
+# replays the click, produces the same key and is dropped. Accepted events
+# are folded into the learner's totals one at a time, and appended to the
+# progress store's score_events table, which ignores keys it already has.
+# Replaying that table rebuilds the totals, so any learner's score can be
+# audited against the events behind it.
+
+ScoreEvent = collections.namedtuple(
+    "ScoreEvent", "learner_id session_id item attempt kind counter points created_at"
+)
+
+
+def score_event(learner_id, session_id, item, attempt, kind, counter, points):
+    # kind is "quiz" (counter: the level), "game" (counter: the game) or
+    # "proposition" (counter: the proposition example's index).
+    return ScoreEvent(learner_id, session_id, item, attempt, kind, counter, points, time.time())
+
+
+def apply_event(state, event):
+    # One step of the fold: O(1) whatever the length of the stream.
+    if event.kind == "quiz":
+        state.record_quiz(event.counter, event.points)
+    elif event.kind == "proposition":
+        state.solve_once(int(event.counter))
+        state.score += event.points
+    else:
+        state.record_game(event.counter, event.points)
+
+
+def replay(events, state=None):
+    # Folds events into state (a fresh LearnerState by default), skipping
+    # repeated keys, so a stream with duplicates still counts each award once.
+    state = state if state is not None else LearnerState()
+    seen = set()
+    for event in events:
+        event = ScoreEvent(*event)
+        key = event[:4]
+        if key not in seen:
+            seen.add(key)
+            apply_event(state, event)
+    return state
+
+
+def audit(store, learner_id):
+    # Stored totals next to the ones replayed from the learner's events.
+    # Points earned before events were recorded appear only in the stored ones.
+    document = store.load(learner_id)
+    stored = LearnerState.from_dict(document) if document else LearnerState()
+    events = store.load_events(learner_id)
+    replayed = replay(events)
+    return {
+        "learner": learner_id,
+        "events": len(events),
+        "stored": {"score": stored.score, "quizzes": stored.quiz_progress(), "games": stored.game_progress()},
+        "replayed": {"score": replayed.score, "quizzes": replayed.quiz_progress(), "games": replayed.game_progress()},
+    }
+
+
+def main(argv=None):
+    from progress_store import DEFAULT_DB_PATH, SQLiteProgressStore
+
+    parser = argparse.ArgumentParser(description="Replay learners' score events and compare with their saved totals.")
+    parser.add_argument("learners", nargs="+", help="learner ids (the ?learner= parameter)")
+    parser.add_argument("--db", default=os.environ.get("LOGIC_TUTOR_PROGRESS_DB", DEFAULT_DB_PATH))
+    args = parser.parse_args(argv)
+
+    store = SQLiteProgressStore(args.db)
+    mismatched = 0
+    for learner_id in args.learners:
+        report = audit(store, learner_id)
+        same = report["stored"] == report["replayed"]
+        mismatched += not same
+        print(f"{learner_id}: {report['events']} events, stored score {report['stored']['score']}, "
+              f"replayed {report['replayed']['score']}{'' if same else '  MISMATCH'}")
+    store.close()
+    sys.exit(1 if mismatched else 0)
+
+
+if __name__ == "__main__":
+    main()
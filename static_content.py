@@ -0,0 +1,108 @@
+import functools
+import hashlib
+import os
+import pickle
+
+import content
+from content_packs import current_pack
+from feedback import build_feedback_tables
+from puzzle_generator import generate_puzzle_pool
+from question_bank import generate_questions
+
+# ---------- PRECOMPILED STATIC CONTENT ----------
+# Everything derived from the content at startup (the generated question bank,
+# the rendered Learn tables, the feedback index and the logic puzzle pool) is
+# built once into a pickle next to the code.
+# Workers load it instead of rebuilding; it is rebuilt automatically whenever
+# one of the source files it was derived from, or the content pack version,
+# changes. Run this module during deployment to build it ahead of the first
+# worker start.
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_ARTIFACT_PATH = os.path.join(HERE, "static_content.pickle")
+SOURCES = ("content.py", "content_packs.py", "feedback.py", "question_bank.py", "logic_engine.py",
+           "bdd.py", "puzzle_generator.py", "static_content.py")
+ARTIFACT_VERSION = 1
+
+
+def source_hash(version):
+    digest = hashlib.sha256(f"{ARTIFACT_VERSION}:{version}".encode())
+    for name in SOURCES:
+        with open(os.path.join(HERE, name), "rb") as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+def markdown_table(columns):
+    # Small tables render as markdown, which needs no pandas.
+    headers = [str(header).replace("|", "\\|") for header in columns]
+    lines = [
+        "| " + " | ".join(headers) + " |",
+        "|" + "---|" * len(headers),
+    ]
+    for row in zip(*columns.values()):
+        lines.append("| " + " | ".join(str(value) for value in row) + " |")
+    return "\n".join(lines)
+
+
+def build_static_content():
+    pack = current_pack()
+    questions = generate_questions(pack.parts)
+    return {
+        "sources": source_hash(pack.version),
+        "version": pack.version,
+        "questions": questions,
+        "feedback": build_feedback_tables(questions, pack.sections),
+        "learn_tables": {
+            key: markdown_table(content.connective_table(formula_text))
+            for key, formula_text in content.CONNECTIVE_FORMULAS.items()
+        },
+        "puzzles": generate_puzzle_pool(),
+    }
+
+
+def _artifact_path():
+    # LOGIC_TUTOR_STATIC_CONTENT moves the artifact; "off" always builds in memory.
+    return os.environ.get("LOGIC_TUTOR_STATIC_CONTENT", DEFAULT_ARTIFACT_PATH)
+
+
+def write_static_content(path=None):
+    path = path or _artifact_path()
+    data = build_static_content()
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        pickle.dump(data, f, protocol=pickle.HIGHEST_PROTOCOL)
+    # Workers starting together may race to build it; the rename is atomic.
+    os.replace(tmp_path, path)
+    return data
+
+
+def load_static_content(version=None):
+    return _load_static_content(version or current_pack().version)
+
+
+@functools.lru_cache(maxsize=4)
+def _load_static_content(version):
+    # One entry per content pack version, so a pack edit rebuilds once.
+    path = _artifact_path()
+    if path == "off":
+        return build_static_content()
+    expected = source_hash(version)
+    try:
+        with open(path, "rb") as f:
+            data = pickle.load(f)
+        if data.get("sources") == expected:
+            return data
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError):
+        pass
+    try:
+        return write_static_content(path)
+    except OSError:
+        # Read-only deployments still work, just without the saved artifact.
+        return build_static_content()
+
+
+if __name__ == "__main__":
+    data = write_static_content()
+    print(f"Wrote {_artifact_path()}: {len(data['questions'])} questions, "
+          f"{len(data['learn_tables'])} tables, {sum(map(len, data['puzzles'].values()))} puzzles")
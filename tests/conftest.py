@@ -0,0 +1,7 @@
+import os
+import sys
+
+# The app's modules live at the repository root, next to appLu.py.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("LOGIC_TUTOR_PROGRESS_BACKEND", "memory")
+os.environ.setdefault("LOGIC_TUTOR_ATTEMPT_LOG", "off")
@@ -0,0 +1,107 @@
+import os
+import time
+
+import pytest
+
+from analytics import AttemptLog, iter_batches, sealed_segments
+
+
+class BrokenWriter:
+    # Writes part of a batch, then fails, like a disk filling up mid-write.
+    def __init__(self, writer, sink):
+        self.writer = writer
+        self.sink = sink
+
+    def write_batch(self, batch):
+        self.sink.write(b"\xff\xff\xff\xff partial batch")
+        raise OSError("No space left on device")
+
+    def close(self):
+        self.writer.close()
+
+
+@pytest.fixture
+def log(tmp_path):
+    # No background flushes: the tests call flush() themselves.
+    log = AttemptLog(str(tmp_path), flush_interval=3600)
+    yield log
+    log.close()
+
+
+def append(log, *items):
+    for item in items:
+        log.append("ana", item, "beginner", "symbols", "A", True)
+
+
+def fail(batch):
+    raise OSError("disk I/O error")
+
+
+def logged_items(log):
+    # Segments sealed within one second have no set order.
+    log.close()
+    return sorted(
+        item for name in sealed_segments(log.log_dir)
+        for batch in iter_batches(os.path.join(log.log_dir, name))
+        for item in batch.column("item").to_pylist()
+    )
+
+
+def test_failed_write_is_kept_and_retried(log, monkeypatch):
+    append(log, "quiz:1", "quiz:2")
+    write = log._write
+    monkeypatch.setattr(log, "_write", fail)
+    with pytest.raises(OSError):
+        log.flush()
+    append(log, "quiz:3")
+    monkeypatch.setattr(log, "_write", write)
+    log.flush()
+    assert logged_items(log) == ["quiz:1", "quiz:2", "quiz:3"]
+
+
+def test_broken_segment_keeps_its_whole_batches(log):
+    append(log, "quiz:1")
+    log.flush()
+    segment = log.segment
+    segment["writer"] = BrokenWriter(segment["writer"], segment["sink"])
+    append(log, "quiz:2")
+    with pytest.raises(OSError):
+        log.flush()
+    assert log.segment is None and log.buffered == 1
+    log.flush()
+    assert logged_items(log) == ["quiz:1", "quiz:2"]
+
+
+def test_buffer_is_bounded_while_writes_fail(tmp_path, monkeypatch):
+    log = AttemptLog(str(tmp_path), flush_interval=3600, max_buffered=3)
+    try:
+        monkeypatch.setattr(log, "_write", fail)
+        append(log, "quiz:1", "quiz:2", "quiz:3", "quiz:4", "quiz:5")
+        with pytest.raises(OSError):
+            log.flush()
+        assert log.buffered == 3 and log.buffer["item"] == ["quiz:3", "quiz:4", "quiz:5"]
+    finally:
+        monkeypatch.undo()
+        log.close()
+
+
+def test_writer_thread_survives_failed_writes(tmp_path, monkeypatch):
+    log = AttemptLog(str(tmp_path), flush_interval=0.01)
+    write = log._write
+    failures = []
+
+    def flaky(batch):
+        if len(failures) < 3:
+            failures.append(batch)
+            raise OSError("disk I/O error")
+        write(batch)
+
+    monkeypatch.setattr(log, "_write", flaky)
+    append(log, "quiz:1")
+    for _ in range(500):
+        if log.segment is not None:
+            break
+        time.sleep(0.01)
+    assert log.thread.is_alive()
+    assert logged_items(log) == ["quiz:1"]
+
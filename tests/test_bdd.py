@@ -0,0 +1,127 @@
+import gc
+import random
+
+import pytest
+
+import bdd
+from logic_engine import TRUE, FALSE, TruthTable, compile_node, count_true, make_node, parse_formula, var
+
+VARIABLES = ("p", "q", "r", "s")
+BINARY = ("and", "or", "implies", "iff", "xor")
+
+
+def random_formula(rng, depth):
+    if depth == 0 or rng.random() < 0.2:
+        return rng.choice([var(name) for name in VARIABLES] + [TRUE, FALSE])
+    if rng.random() < 0.25:
+        return make_node("not", random_formula(rng, depth - 1))
+    return make_node(rng.choice(BINARY), random_formula(rng, depth - 1), random_formula(rng, depth - 1))
+
+
+def table_values(formula, variables):
+    # The formula's truth table column over variables (the reference answer).
+    table = TruthTable(variables)
+    return compile_node(formula).evaluate(table), table
+
+
+def random_pairs(count, seed=17):
+    rng = random.Random(seed)
+    for _ in range(count):
+        left = random_formula(rng, 4)
+        # Every other pair shares structure, so equivalent pairs come up too.
+        right = random_formula(rng, 4) if rng.random() < 0.5 else make_node("not", make_node("not", left))
+        yield left, right
+
+
+def test_equivalent_agrees_with_truth_tables():
+    for left, right in random_pairs(400):
+        left_values, _ = table_values(left, VARIABLES)
+        right_values, _ = table_values(right, VARIABLES)
+        assert bdd.equivalent(left, right) == (left_values == right_values)
+
+
+def test_counterexample_is_a_row_where_the_formulas_differ():
+    for left, right in random_pairs(400, seed=18):
+        row = bdd.counterexample(left, right)
+        left_values, _ = table_values(left, VARIABLES)
+        right_values, _ = table_values(right, VARIABLES)
+        if left_values == right_values:
+            assert row is None
+        else:
+            assignment = {name: row.get(name, False) for name in VARIABLES}
+            assert compile_node(left).evaluate_row(assignment) != compile_node(right).evaluate_row(assignment)
+
+
+def test_model_count_tautology_and_satisfiability_agree_with_truth_tables():
+    rng = random.Random(19)
+    for _ in range(400):
+        formula = random_formula(rng, 4)
+        if not formula.variables:
+            continue
+        values, table = table_values(formula, sorted(formula.variables))
+        models = count_true(values)
+        assert bdd.model_count(formula) == models
+        assert bdd.is_tautology(formula) == (models == table.num_rows)
+        assert bdd.is_satisfiable(formula) == (models > 0)
+
+
+def test_satisfying_assignment_satisfies():
+    rng = random.Random(20)
+    for _ in range(200):
+        formula = random_formula(rng, 4)
+        assignment = bdd.satisfying_assignment(formula)
+        if assignment is None:
+            assert not bdd.is_satisfiable(formula)
+        else:
+            assert compile_node(formula).evaluate_row(assignment)
+
+
+@pytest.mark.parametrize("left, right", [
+    ("¬(p ∧ q)", "¬p ∨ ¬q"),
+    ("p → q", "¬q → ¬p"),
+    ("p ↔ q", "(p → q) ∧ (q → p)"),
+    ("p ⊕ q", "(p ∨ q) ∧ ¬(p ∧ q)"),
+    ("p ∨ (q ∧ r)", "(p ∨ q) ∧ (p ∨ r)"),
+])
+def test_textbook_laws(left, right):
+    assert bdd.equivalent(parse_formula(left), parse_formula(right))
+
+
+def test_beyond_truth_table_size():
+    # 40 variables: far past what a truth table can hold.
+    names = [f"x{i}" for i in range(40)]
+    chain = parse_formula(" ∧ ".join(f"({a} → {b})" for a, b in zip(names, names[1:])))
+    goal = parse_formula(f"{names[0]} → {names[-1]}")
+    assert bdd.is_tautology(make_node("implies", chain, goal))
+    assert not bdd.is_tautology(make_node("implies", goal, chain))
+    assert bdd.model_count(parse_formula(" ∨ ".join(names))) == (1 << 40) - 1
+
+
+def test_answers_survive_a_kernel_reset(monkeypatch):
+    monkeypatch.setattr(bdd, "MAX_NODES", 50)
+    for left, right in random_pairs(100, seed=21):
+        left_values, _ = table_values(left, VARIABLES)
+        right_values, _ = table_values(right, VARIABLES)
+        assert bdd.equivalent(left, right) == (left_values == right_values)
+
+
+def test_kernel_does_not_keep_formulas_alive():
+    kernel = bdd.BDD()
+    formula = make_node("and", var("kept_a"), make_node("not", var("kept_b")))
+    kernel.build(formula)
+    assert formula in kernel.built
+    del formula
+    gc.collect()
+    assert not any(key.op == "and" and key.args[0].name == "kept_a" for key in kernel.built)
+
+
+@pytest.mark.parametrize("limit, value", [("MAX_NODES", 8), ("MAX_ITE_ENTRIES", 8), ("MAX_VARIABLES", 2)])
+def test_kernel_starts_over_past_its_limits(monkeypatch, limit, value):
+    monkeypatch.setattr(bdd, limit, value)
+    kernels = []
+    for left, right in random_pairs(40):
+        kernels.append(bdd._kernel())
+        left_values, _ = table_values(left, VARIABLES)
+        right_values, _ = table_values(right, VARIABLES)
+        assert bdd.equivalent(left, right) == (left_values == right_values)
+    assert len({id(kernel) for kernel in kernels}) > 1
@@ -0,0 +1,58 @@
+import json
+
+import pytest
+
+import grading
+
+
+def row(item, answer="", **extra):
+    return dict(extra, item=item, answer=answer)
+
+
+@pytest.mark.parametrize("item, error", [
+    ("nonsense:1", "unknown item kind 'nonsense'"),
+    ("match:-1", "no such item"),
+    ("match:100000", "no such item"),
+    ("puzzle:impossible/0", "unknown puzzle difficulty 'impossible'"),
+    ("truth_table:" + "(" * 160 + "p" + ")" * 160, "Formula is nested too deeply (at most 64 levels)"),
+    ("truth_table:" + " ∧ ".join("p" * 500), "Formula is too long (at most 400 symbols)"),
+])
+def test_bad_rows_are_reported(item, error):
+    graded = grading.grade_record(row(item, learner="ana"))
+    assert graded["error"] == error
+    assert graded["correct"] is False and graded["points"] == 0
+    assert graded["learner"] == "ana"
+
+
+def test_deep_answers_are_wrong_not_errors():
+    graded = grading.grade_record(row("practice:0", "¬" * 500 + "p"))
+    assert graded["error"] is None
+    assert graded["correct"] is False and graded["error_category"] == "unreadable"
+
+
+def test_recursion_error_is_one_bad_row(monkeypatch):
+    grade_submission = grading.grade_submission
+
+    def deep(item, answer):
+        if answer == "deep":
+            raise RecursionError("maximum recursion depth exceeded")
+        return grade_submission(item, answer)
+
+    monkeypatch.setattr(grading, "grade_submission", deep)
+    rows = list(grading.grade_records([row("match:0", "deep"), row("match:-1"), row("match:0")], workers=1))
+    assert [graded["error"] for graded in rows] == ["answer is nested too deeply", "no such item", None]
+
+
+def test_grade_file_counts_invalid_rows(tmp_path):
+    submissions = tmp_path / "submissions.jsonl"
+    records = [
+        row("match:0", "?", learner="ana"),
+        row("nonsense:1", learner="ana"),
+        row("truth_table:" + "¬" * 500 + "p", learner="ben"),
+    ]
+    submissions.write_text("".join(json.dumps(record) + "\n" for record in records), encoding="utf-8")
+    out = tmp_path / "graded.csv"
+    summary = grading.grade_file(str(submissions), str(out), workers=1)
+    assert summary["submissions"] == 3 and summary["invalid"] == 2
+    assert summary["scores"] == {"ana": 0, "ben": 0}
+    assert len(out.read_text(encoding="utf-8").splitlines()) == 4
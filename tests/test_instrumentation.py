@@ -0,0 +1,66 @@
+import threading
+import tracemalloc
+
+import pytest
+
+from instrumentation import RenderProfiler
+
+
+@pytest.fixture
+def profiler():
+    profiler = RenderProfiler(enabled=True)
+    yield profiler
+    tracemalloc.stop()
+
+
+def records(profiler):
+    return {record["view"]: record for record in profiler.snapshot()}
+
+
+def test_memory_is_recorded_for_a_run_alone(profiler):
+    @profiler.view
+    def child():
+        return [bytearray(1000) for _ in range(100)]
+
+    @profiler.view
+    def page():
+        kept = child()
+        return len(kept)
+
+    page()
+    recorded = records(profiler)
+    assert recorded["child"]["allocated_bytes"] >= 100_000
+    assert recorded["page"]["peak_bytes"] >= recorded["child"]["peak_bytes"] >= 100_000
+    assert recorded["child"]["parent"] == "page"
+
+
+def test_memory_is_unavailable_for_overlapping_runs(profiler):
+    started, release = threading.Event(), threading.Event()
+
+    @profiler.view
+    def waiting():
+        started.set()
+        release.wait(5)
+
+    @profiler.view
+    def other():
+        release.set()
+
+    thread = threading.Thread(target=waiting)
+    thread.start()
+    started.wait(5)
+    other()
+    thread.join()
+    recorded = records(profiler)
+    assert recorded["waiting"]["allocated_bytes"] is None and recorded["waiting"]["peak_bytes"] is None
+    assert recorded["other"]["allocated_bytes"] is None
+    assert recorded["waiting"]["run"] != recorded["other"]["run"]
+
+    @profiler.view
+    def later():
+        pass
+
+    later()
+    assert records(profiler)["later"]["allocated_bytes"] is not None
+    summary = {row["view"]: row for row in profiler.summary()}
+    assert summary["waiting"]["mean_alloc_kb"] is None and summary["later"]["mean_alloc_kb"] is not None
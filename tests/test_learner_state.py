@@ -0,0 +1,42 @@
+import pytest
+
+from learner_state import MEMORY_BUDGET_BYTES, LearnerState, report_memory, state_size, worst_case_state
+from question_bank import QuestionBank, get_question_bank
+
+
+def large_bank(size=20000):
+    questions = get_question_bank().questions
+    return QuestionBank(dict(questions[index % len(questions)], id=index) for index in range(size))
+
+
+def test_per_question_flags_grow_with_use_not_with_ids():
+    state = LearnerState()
+    empty = state_size(state)
+    for question_id in (5, 700_000, 12, 700_000):
+        state.show_hint(question_id)
+        state.claim("adaptive", question_id)
+        state.complete("quiz:advanced", question_id)
+    assert state.hint_shown(700_000) and state.hint_shown(12) and not state.hint_shown(13)
+    assert not state.claim("adaptive", 5)
+    assert state.quiz_completed()["advanced"] == 3
+    assert state_size(state) - empty < 1024
+
+
+def test_completed_items_round_trip():
+    state = LearnerState()
+    for question_id in (300, 2, 40_000):
+        state.complete("quiz:beginner", question_id)
+    document = state.to_dict()
+    assert document["completed"] == {"quiz:beginner": [2, 300, 40_000]}
+    loaded = LearnerState.from_dict(document)
+    assert not loaded.complete("quiz:beginner", 40_000)
+    assert loaded.complete("quiz:beginner", 41_000)
+
+
+def test_worst_case_fits_the_budget():
+    assert report_memory()
+
+
+@pytest.mark.parametrize("size", [2000, 20000])
+def test_worst_case_does_not_grow_with_the_bank(size):
+    assert state_size(worst_case_state(large_bank(size))) <= MEMORY_BUDGET_BYTES
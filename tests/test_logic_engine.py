@@ -0,0 +1,61 @@
+import gc
+
+import pytest
+
+from logic_engine import (
+    MAX_FORMULA_DEPTH, MAX_FORMULA_TOKENS, FormulaError, compile_formula, format_formula, make_node,
+    parse_formula, var,
+)
+import logic_engine
+
+
+def test_equal_formulas_are_one_node():
+    assert parse_formula("p ∧ q") is parse_formula("(p & q)")
+    assert parse_formula("p → q → r") is parse_formula("p -> (q -> r)")
+
+
+def test_unused_nodes_are_freed():
+    # Earlier tests leave cyclic garbage; clear it so only these nodes go.
+    gc.collect()
+    before = len(logic_engine._NODES)
+    node = make_node("and", var("unused_a"), make_node("not", var("unused_b")))
+    assert len(logic_engine._NODES) == before + 4
+    del node
+    gc.collect()
+    assert len(logic_engine._NODES) == before
+
+
+@pytest.mark.parametrize("text", [
+    "(" * 160 + "p" + ")" * 160,
+    "¬" * 200 + "p",
+    " → ".join(["p"] * 100),
+    " ∧ ".join(f"x{i}" for i in range(500)),
+    " ∧ ".join(f"x{i}" for i in range(MAX_FORMULA_DEPTH + 1)),
+])
+def test_oversized_formulas_are_unreadable(text):
+    with pytest.raises(FormulaError):
+        parse_formula(text)
+
+
+@pytest.mark.parametrize("text", [
+    "(" * MAX_FORMULA_DEPTH + "p" + ")" * MAX_FORMULA_DEPTH,
+    "¬" * (MAX_FORMULA_DEPTH - 1) + "p",
+    " ∧ ".join(f"x{i}" for i in range(MAX_FORMULA_DEPTH)),
+])
+def test_formulas_at_the_limits_compile(text):
+    formula = parse_formula(text)
+    assert formula.depth <= MAX_FORMULA_DEPTH
+    assert compile_formula(format_formula(formula)).variables
+
+
+def balanced(leaves):
+    # A shallow formula whose length grows with leaves.
+    if leaves == 1:
+        return "p"
+    return f"({balanced(leaves // 2)} ∧ {balanced(leaves - leaves // 2)})"
+
+
+def test_long_shallow_formulas_hit_the_length_limit():
+    parse_formula(balanced(64))
+    with pytest.raises(FormulaError, match="too long"):
+        parse_formula(balanced(MAX_FORMULA_TOKENS))
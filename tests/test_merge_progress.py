@@ -0,0 +1,77 @@
+import random
+
+import pytest
+
+from learner_state import GAMES, LEARNING_TOPICS, LearnerState, merge_progress
+from progress_store import MemoryProgressStore, dump_document
+from question_bank import LEVELS
+
+# Fields merged from both sides; game rounds and the scheduler state take
+# one side and are tested separately.
+MERGED_FIELDS = ("score", "quiz_counts", "game_counts", "errors", "topics", "flags")
+
+
+def play(state, rng, steps=20):
+    for _ in range(steps):
+        action = rng.randrange(5)
+        if action == 0:
+            state.record_quiz(rng.choice(LEVELS), rng.choice((10, 15, 20)))
+        elif action == 1:
+            state.record_game(rng.choice(GAMES), rng.choice((5, 10, 20)))
+        elif action == 2:
+            state.complete_topic(rng.choice(LEARNING_TOPICS))
+        elif action == 3:
+            state.record_error(f"q{rng.randrange(20)}")
+        else:
+            state.puzzle_done = True
+    return state
+
+
+def tab(document, rng):
+    # A second copy of the learner, started from document, that then plays on.
+    return play(LearnerState.from_dict(document), rng).to_dict()
+
+
+@pytest.mark.parametrize("seed", range(25))
+def test_merge_commutes(seed):
+    rng = random.Random(seed)
+    base = play(LearnerState(), rng).to_dict()
+    first, second = tab(base, rng), tab(base, rng)
+    one_way = merge_progress(first, base, second)
+    other_way = merge_progress(second, base, first)
+    for field in MERGED_FIELDS:
+        assert one_way[field] == other_way[field], field
+    assert one_way["score"] == first["score"] + second["score"] - base["score"]
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_merge_without_a_conflict_keeps_mine(seed):
+    rng = random.Random(seed)
+    base = play(LearnerState(), rng).to_dict()
+    mine = tab(base, rng)
+    assert merge_progress(base, base, mine) == mine
+
+
+def test_game_rounds_take_the_side_that_changed_them():
+    base = LearnerState().to_dict()
+    first, second = LearnerState.from_dict(base), LearnerState.from_dict(base)
+    first.transform_round = 2
+    second.truth_table_round = 3
+    for merged in (merge_progress(first.to_dict(), base, second.to_dict()),
+                   merge_progress(second.to_dict(), base, first.to_dict())):
+        state = LearnerState.from_dict(merged)
+        assert (state.transform_round, state.truth_table_round) == (2, 3)
+
+
+def test_store_keeps_points_from_two_tabs():
+    store = MemoryProgressStore()
+    start = dump_document(LearnerState().to_dict())
+    store.save_many({"ana": (None, start)})
+    first, second = LearnerState(), LearnerState()
+    first.record_quiz("beginner", 10)
+    second.record_game("matching", 5)
+    store.save_many({"ana": (start, dump_document(first.to_dict()))}, merge=merge_progress)
+    store.save_many({"ana": (start, dump_document(second.to_dict()))}, merge=merge_progress)
+    state = LearnerState.from_dict(store.load("ana"))
+    assert state.score == 15
+    assert state.quiz_progress()["beginner"] == 1 and state.game_progress()["matching"] == 1
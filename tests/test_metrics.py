@@ -0,0 +1,55 @@
+from learner_state import LearnerState, merge_progress
+from metrics import LearnerMetrics
+from question_bank import LEVELS, get_question_bank
+
+GAME_TOTALS = {"truth_table": 4, "puzzle": 3, "matching": 8}
+
+
+def test_games_without_a_total_stay_out_of_game_completion():
+    metrics = LearnerMetrics.from_progress(
+        {}, GAME_TOTALS, {}, {"matching": 4, "generated_puzzle": 100}, {}, {}
+    )
+    assert metrics.game_completion == 4 / 15
+    metrics.record_game("generated_puzzle")
+    assert metrics.game_completion == 4 / 15
+    assert metrics.game_counts["generated_puzzle"] == 101
+
+
+def test_completion_counts_distinct_items():
+    state = LearnerState()
+    assert state.complete("quiz:beginner", 7)
+    assert not state.complete("quiz:beginner", 7)
+    state.next_attempt("quiz:beginner")
+    assert not state.complete("quiz:beginner", 7)
+    assert state.complete("quiz:beginner", 12)
+    state.complete("transform", 0)
+    state.complete("puzzle", 0)
+    state.complete("puzzle:hard", 3)
+    assert state.quiz_completed() == {"beginner": 2, "intermediate": 0, "advanced": 0}
+    games = state.games_completed()
+    assert games["puzzle"] == 2 and games["generated_puzzle"] == 1 and games["matching"] == 0
+
+
+def test_completed_items_persist_and_merge():
+    base = LearnerState()
+    base.complete("quiz:beginner", 1)
+    first, second = LearnerState.from_dict(base.to_dict()), LearnerState.from_dict(base.to_dict())
+    assert first.quiz_completed()["beginner"] == 1
+    first.complete("quiz:beginner", 2)
+    second.complete("quiz:beginner", 3)
+    second.complete("match", 4)
+    merged = LearnerState.from_dict(merge_progress(first.to_dict(), base.to_dict(), second.to_dict()))
+    assert merged.quiz_completed()["beginner"] == 3
+    assert merged.games_completed()["matching"] == 1
+
+
+def test_quiz_completion_is_out_of_the_bank():
+    bank = get_question_bank()
+    totals = {level: len(bank.pool(level)) for level in LEVELS}
+    assert sum(totals.values()) == len(bank)
+    state = LearnerState()
+    for question in bank.pool("beginner")[:3]:
+        state.complete("quiz:beginner", question["id"])
+        state.complete("quiz:beginner", question["id"])
+    metrics = LearnerMetrics.from_progress(totals, GAME_TOTALS, state.quiz_completed(), {}, {}, {})
+    assert metrics.quiz_completion == 3 / len(bank)
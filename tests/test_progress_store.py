@@ -0,0 +1,95 @@
+import time
+
+import pytest
+
+import scoring
+from learner_state import LearnerState, merge_progress
+from progress_store import MemoryProgressStore, WriteBehindWriter, dump_document
+
+
+class FlakyStore(MemoryProgressStore):
+    # Fails the next `failures` saves, as a locked or full disk would.
+    def __init__(self, failures=0):
+        super().__init__()
+        self.failures = failures
+        self.attempts = 0
+
+    def save_many(self, updates, merge=None, events=()):
+        self.attempts += 1
+        if self.failures:
+            self.failures -= 1
+            raise OSError("disk I/O error")
+        super().save_many(updates, merge, events)
+
+
+def document(quiz_points=0, game_points=0):
+    state = LearnerState()
+    if quiz_points:
+        state.record_quiz("beginner", quiz_points)
+    if game_points:
+        state.record_game("matching", game_points)
+    return dump_document(state.to_dict())
+
+
+@pytest.fixture
+def writer():
+    # No background flushes: the tests call flush() themselves.
+    writer = WriteBehindWriter(FlakyStore(), flush_interval=3600, merge=merge_progress)
+    yield writer
+    writer.store.failures = 0
+    writer.close()
+
+
+def test_failed_batch_is_kept_and_retried(writer):
+    event = scoring.score_event("ana", "s1", "quiz:0", 0, "quiz", "beginner", 10)
+    writer.put("ana", document(10))
+    writer.append_event(event)
+    writer.store.failures = 1
+    with pytest.raises(OSError):
+        writer.flush()
+    assert writer.store.load_text("ana") is None
+    assert writer.latest("ana") == document(10)
+    writer.flush()
+    assert writer.store.load_text("ana") == document(10)
+    assert writer.store.load_events("ana") == [event]
+
+
+def test_retry_keeps_newer_writes(writer):
+    writer.put("ana", document(10))
+    writer.put("ben", document(10))
+    writer.store.failures = 1
+    with pytest.raises(OSError):
+        writer.flush()
+    # The session saved again, on top of the state it last saw.
+    writer.put("ana", document(10, 5), base=document(10))
+    writer.flush()
+    assert writer.store.load_text("ana") == document(10, 5)
+    assert writer.store.load_text("ben") == document(10)
+
+
+def test_retry_merges_another_tabs_write(writer):
+    start = document()
+    writer.store.save_many({"ana": (None, start)})
+    writer.put("ana", document(10), base=start)
+    writer.store.failures = 1
+    with pytest.raises(OSError):
+        writer.flush()
+    # A second tab that never saw the failed write saves its own points.
+    writer.put("ana", document(game_points=5), base=start)
+    writer.flush()
+    state = LearnerState.from_dict(writer.store.load("ana"))
+    assert state.score == 15
+
+
+def test_writer_thread_survives_failed_saves():
+    writer = WriteBehindWriter(FlakyStore(failures=3), flush_interval=0.01)
+    try:
+        writer.put("ana", document(10))
+        deadline = time.monotonic() + 5
+        while writer.store.load_text("ana") is None and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert writer.store.load_text("ana") == document(10)
+        assert writer.store.attempts >= 4
+        assert writer.thread.is_alive()
+    finally:
+        writer.close()
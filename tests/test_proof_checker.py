@@ -0,0 +1,79 @@
+import random
+
+import pytest
+
+import content
+from logic_engine import equivalent, format_formula, make_node, parse_formula, var
+from proof_checker import get_proof_checker
+
+
+@pytest.fixture(scope="module")
+def checker():
+    return get_proof_checker()
+
+
+@pytest.mark.parametrize("before, after, law", [
+    ("¬(p ∧ ¬q)", "¬p ∨ ¬¬q", "De Morgan's Laws"),
+    ("¬p ∨ ¬¬q", "¬p ∨ q", "Double Negation"),
+    ("p", "¬¬p", "Double Negation"),
+    ("p → q", "¬p ∨ q", "Conditional Equivalences"),
+    ("p → q", "¬q → ¬p", "Conditional Equivalences"),
+    ("(a ∧ b) ∨ c", "c ∨ (a ∧ b)", "Commutative Laws"),
+    ("r ∧ (p ∨ q)", "r ∧ (q ∨ p)", "Commutative Laws"),
+    ("p ∨ F", "p", "Identity Laws"),
+    # The law's q only appears on one side and may stand for anything.
+    ("p", "p ∨ (p ∧ (r → s))", "Absorption Laws"),
+])
+def test_single_law_steps_are_accepted(checker, before, after, law):
+    assert checker.check_step(before, after) == (True, law)
+
+
+@pytest.mark.parametrize("before, after, reason", [
+    ("¬(p ∧ q)", "q → ¬p", "several_steps"),
+    ("p → q", "q ∨ ¬p", "several_steps"),
+    ("p → q", "q → p", "not_equivalent"),
+    ("p ∧ q", "p ∨ q", "not_equivalent"),
+    ("p ∧ q", "(p ∧ q)", "unchanged"),
+    ("p ∧ q", "p ∧", "unreadable"),
+])
+def test_other_steps_are_rejected_with_a_reason(checker, before, after, reason):
+    assert checker.check_step(before, after) == (False, reason)
+
+
+def test_verdicts_agree_with_equivalence():
+    # An accepted or "several_steps" step is always an equivalence, and
+    # "not_equivalent" never is.
+    checker = get_proof_checker()
+    rng = random.Random(7)
+
+    def formula(depth):
+        if depth == 0 or rng.random() < 0.3:
+            return var(rng.choice("pqr"))
+        if rng.random() < 0.3:
+            return make_node("not", formula(depth - 1))
+        return make_node(rng.choice(("and", "or", "implies")), formula(depth - 1), formula(depth - 1))
+
+    for _ in range(300):
+        before, after = formula(3), formula(3)
+        if rng.random() < 0.5:
+            after = make_node("or", before, before) if rng.random() < 0.5 else make_node("not", make_node("not", before))
+        ok, reason = checker.check_step(format_formula(before), format_formula(after))
+        if before is after:
+            assert reason == "unchanged"
+        elif ok or reason == "several_steps":
+            assert equivalent(before, after)
+        else:
+            assert reason == "not_equivalent" and not equivalent(before, after)
+
+
+def test_chain_continues_from_the_last_valid_line(checker):
+    results = checker.check_chain("p → q", ["q → p", "¬p ∨ q", "q ∨ ¬p"])
+    assert results == [(False, "not_equivalent"), (True, "Conditional Equivalences"), (True, "Commutative Laws")]
+
+
+def test_worked_steps_of_the_practice_problems_are_single_laws(checker):
+    for problem in content.PRACTICE_PROBLEMS:
+        for step in problem["steps"]:
+            before, after = step.rpartition(":")[2].split("≡")
+            assert checker.check_step(before, after)[0], step
+        assert equivalent(parse_formula(problem["start"]), parse_formula(problem["answer"]))
@@ -0,0 +1,80 @@
+import json
+
+import pytest
+
+from content_packs import CORE_PACK_DIR, ContentPackError, load_packs
+from question_bank import LEVELS, QuestionBank, generate_questions
+
+CORE = f"{CORE_PACK_DIR}/core.json"
+WEATHER = ["it snows", "it does not snow", "school is closed", "school is not closed"]
+TRAIN = ["the train is late", "the train is not late", "I miss the bus", "I do not miss the bus"]
+
+
+def question(text, correct=0):
+    return {"level": "beginner", "topic": "pack_topic", "question": text, "options": ["yes", "no"],
+            "correct": correct, "explanation": "Because."}
+
+
+def write_pack(tmp_path, name, conditionals=(), questions=()):
+    path = tmp_path / f"{name}.json"
+    pack = {"pack": name, "sections": {"conditionals": list(conditionals)}, "questions": list(questions)}
+    path.write_text(json.dumps(pack), encoding="utf-8")
+    return str(path)
+
+
+def generate(*files):
+    return generate_questions(load_packs([CORE, *files]).parts)
+
+
+def by_id(questions):
+    return {q["id"]: {key: value for key, value in q.items() if key != "id"} for q in questions}
+
+
+def test_packs_never_renumber_core_questions(tmp_path):
+    core = generate()
+    extended = generate(write_pack(tmp_path, "extra", [WEATHER, TRAIN], [question("Extra?")]))
+    assert len(extended) == len(core) + 4 * 2 + 1
+    assert by_id(extended[:len(core)]) == by_id(core)
+    assert extended[-1]["question"] == "Extra?"
+
+
+def test_pack_edits_keep_earlier_packs_ids(tmp_path):
+    first = write_pack(tmp_path, "a_first", [WEATHER], [question("First?")])
+    before = generate(first, write_pack(tmp_path, "b_second", [], [question("Second?")]))
+    after = generate(first, write_pack(tmp_path, "b_second", [TRAIN], [question("Second?", 1), question("More?")]))
+    kept = len(before) - 1
+    assert by_id(after[:kept]) == by_id(before[:kept])
+
+
+def test_removing_a_conditional_keeps_the_others_questions(tmp_path):
+    before = generate(write_pack(tmp_path, "extra", [WEATHER, TRAIN]))
+    after = generate(write_pack(tmp_path, "extra", [TRAIN]))
+    assert by_id(after[-4:]) == {i - 4: q for i, q in by_id(before[-4:]).items()}
+
+
+def test_ids_index_the_bank():
+    questions = generate()
+    bank = QuestionBank(questions)
+    assert [q["id"] for q in questions] == list(range(len(questions)))
+    assert all(bank.get(q["id"]) is q for q in questions)
+    assert bank.get(len(questions)) is None
+
+
+def test_invalid_pack_questions_are_rejected(tmp_path):
+    with pytest.raises(ContentPackError, match="correct"):
+        load_packs([CORE, write_pack(tmp_path, "bad", [], [question("Bad?", correct=2)])])
+
+
+def test_pools_match_a_scan_of_the_bank():
+    questions = generate()
+    bank = QuestionBank(questions)
+    for level in LEVELS:
+        topics = sorted({q["topic"] for q in questions if q["level"] == level})
+        assert bank.topics(level) == topics
+        for topic in (None, *topics):
+            for difficulty in (None, 1, 2, 3):
+                expected = [
+                    q for q in questions if q["level"] == level
+                    and topic in (None, q["topic"]) and difficulty in (None, q["difficulty"])
+                ]
+                assert sorted(q["id"] for q in bank.pool(level, topic, difficulty)) == [q["id"] for q in expected]
@@ -0,0 +1,57 @@
+import time
+
+from result_cache import MISSING, DiskTier, ResultCache, canonical_formula, canonical_or_text
+
+
+def test_spellings_of_a_formula_share_a_key():
+    assert canonical_formula("p & q") == canonical_formula("p∧q") == canonical_formula("(p ∧ q)")
+    assert canonical_or_text("  not a formula ((") == "not a formula (("
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = ResultCache("test", maxsize=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1
+    cache.put("c", 3)
+    assert cache.get("b") is MISSING
+    assert (cache.get("a"), cache.get("c")) == (1, 3)
+    stats = cache.stats()
+    assert (stats["entries"], stats["evictions"], stats["hits"], stats["misses"]) == (2, 1, 3, 1)
+
+
+def test_expired_entries_are_recomputed():
+    cache = ResultCache("test", maxsize=4, ttl=0.05)
+    calls = []
+    compute = lambda value: calls.append(value) or value * 2
+    assert cache.get_or_compute("x", compute, 3) == 6
+    assert cache.get_or_compute("x", compute, 3) == 6
+    time.sleep(0.1)
+    assert cache.get_or_compute("x", compute, 3) == 6
+    assert calls == [3, 3]
+    assert cache.stats()["expirations"] == 1
+
+
+def test_disk_tier_warms_a_new_cache(tmp_path):
+    path = str(tmp_path / "results.db")
+    disk = DiskTier(path)
+    ResultCache("verdicts", maxsize=4, disk=disk).put(("p ∧ q", "q"), True)
+    disk.close()
+
+    disk = DiskTier(path)
+    cache = ResultCache("verdicts", maxsize=4, disk=disk)
+    assert cache.get(("p ∧ q", "q")) is True
+    assert ResultCache("proofs", maxsize=4, disk=disk).get(("p ∧ q", "q")) is MISSING
+    assert cache.stats()["disk_hits"] == 1
+    disk.close()
+
+
+def test_expired_disk_entries_are_dropped(tmp_path):
+    path = str(tmp_path / "results.db")
+    disk = DiskTier(path)
+    ResultCache("verdicts", maxsize=4, ttl=-1, disk=disk).put("key", "value")
+    assert disk.get("verdicts", "key") is None
+    disk.close()
+    disk = DiskTier(path)
+    assert disk.conn.execute("SELECT COUNT(*) FROM results").fetchone()[0] == 0
+    disk.close()
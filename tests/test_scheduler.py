@@ -0,0 +1,61 @@
+import random
+
+from question_bank import QuestionBank, get_question_bank
+from scheduler import AdaptiveScheduler, export_scheduler_state, load_scheduler_state, new_scheduler_state
+
+
+def large_bank(size=20000):
+    questions = get_question_bank().questions
+    return QuestionBank(dict(questions[index % len(questions)], id=index) for index in range(size))
+
+
+def test_boxes_are_kept_only_for_answered_questions():
+    bank = large_bank()
+    scheduler = AdaptiveScheduler(bank, rng=random.Random(0))
+    for question_id in (19_999, 7, 19_999):
+        scheduler.record(bank.get(question_id), False)
+    state = scheduler.state
+    assert state["box_ids"].tolist() == [7, 19_999]
+    assert len(state["boxes"]) == 2
+
+
+def test_retired_questions_drop_their_box():
+    bank = get_question_bank()
+    scheduler = AdaptiveScheduler(bank, rng=random.Random(0))
+    question = bank.get(3)
+    for _ in range(4):
+        scheduler.record(question, True)
+    assert scheduler.state["box_ids"].tolist() == []
+
+
+def test_state_round_trips_and_reviews_come_due():
+    bank = large_bank()
+    scheduler = AdaptiveScheduler(bank, rng=random.Random(0))
+    missed = bank.pool("beginner")[-1]
+    scheduler.record(missed, False)
+    loaded = AdaptiveScheduler(bank, load_scheduler_state(export_scheduler_state(scheduler.state)),
+                               random.Random(0))
+    assert loaded.state["box_ids"].tolist() == [missed["id"]]
+    for question in bank.pool("beginner")[:2]:
+        loaded.record(question, True)
+    assert loaded.next_question("beginner") is missed
+
+
+def test_older_box_formats_load():
+    dense = export_scheduler_state(new_scheduler_state())
+    dense.pop("box_ids")
+    dense["boxes"] = [0, 0, 5 << 3 | 1]
+    loaded = load_scheduler_state(dense)
+    assert loaded["box_ids"].tolist() == [2] and loaded["boxes"].tolist() == [5 << 3 | 1]
+    legacy = {"step": 1, "ability": {}, "cursors": {}, "boxes": {"9": [0, 3]}, "reviews": {"beginner": [[3, 9]]}}
+    loaded = load_scheduler_state(legacy)
+    assert loaded["box_ids"].tolist() == [9] and loaded["boxes"].tolist() == [3 << 3]
+
+
+def test_bank_benchmark_reports_every_call():
+    from benchmark import run_bank_benchmark
+
+    report = run_bank_benchmark(2000, learners=2, quizzes=3, log=lambda message: None)
+    assert set(report["calls"]) == {"draw", "record", "next_question", "pool", "sample"}
+    assert report["calls"]["draw"]["calls"] == 6
+    assert report["worst_case_state_bytes"] <= report["memory_budget_bytes"]
@@ -0,0 +1,115 @@
+import random
+
+import pytest
+
+import scoring
+from learner_state import GAMES, LearnerState
+from progress_store import MemoryProgressStore, SQLiteProgressStore, dump_document
+from question_bank import LEVELS
+
+
+def random_events(rng, count=60, learner="ana"):
+    # Award events the way the app makes them, with repeats of earlier keys
+    # (a rerun replaying a click, "Check" pressed twice).
+    events = []
+    for _ in range(count):
+        if events and rng.random() < 0.3:
+            events.append(rng.choice(events))
+            continue
+        session, attempt = rng.choice(("s1", "s2")), rng.randrange(3)
+        kind = rng.choice(("quiz", "game", "proposition"))
+        if kind == "quiz":
+            counter, item = rng.choice(LEVELS), f"quiz:{rng.randrange(30)}"
+        elif kind == "game":
+            counter, item = rng.choice(GAMES), f"match:{rng.randrange(8)}"
+        else:
+            counter = rng.randrange(6)
+            item = f"proposition:{counter}"
+        events.append(scoring.score_event(learner, session, item, attempt, kind, counter, rng.choice((2, 5, 10))))
+    return events
+
+
+def totals(state):
+    return state.score, state.quiz_progress(), state.game_progress()
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_replay_counts_each_key_once(seed):
+    rng = random.Random(seed)
+    events = random_events(rng)
+    unique = list({event[:4]: event for event in reversed(events)}.values())
+    assert totals(scoring.replay(events)) == totals(scoring.replay(unique))
+    assert totals(scoring.replay(events + events)) == totals(scoring.replay(events))
+    assert scoring.replay(events).score == sum(event.points for event in unique)
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_replay_does_not_depend_on_order(seed):
+    rng = random.Random(seed)
+    events = random_events(rng)
+    unique = list({event[:4]: event for event in events}.values())
+    shuffled = unique[:]
+    rng.shuffle(shuffled)
+    assert totals(scoring.replay(shuffled)) == totals(scoring.replay(unique))
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def store(request, tmp_path):
+    store = MemoryProgressStore() if request.param == "memory" else SQLiteProgressStore(str(tmp_path / "progress.db"))
+    yield store
+    store.close()
+
+
+def play_and_save(store, events, learner="ana"):
+    # The live path: each new event is folded into the session's state and
+    # saved with it, in flushes of a few events at a time.
+    state = LearnerState()
+    seen = set()
+    base = None
+    for start in range(0, len(events), 7):
+        batch = events[start:start + 7]
+        for event in batch:
+            if event[:4] not in seen:
+                seen.add(event[:4])
+                scoring.apply_event(state, event)
+        document = dump_document(state.to_dict())
+        store.save_many({learner: (base, document)}, events=batch)
+        base = document
+    return state
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_audit_matches_the_saved_totals(store, seed):
+    events = random_events(random.Random(seed))
+    state = play_and_save(store, events)
+    report = scoring.audit(store, "ana")
+    assert report["stored"] == report["replayed"]
+    assert report["replayed"]["score"] == state.score
+    assert report["events"] == len({event[:4] for event in events})
+
+
+def test_audit_finds_points_without_events(store):
+    state = play_and_save(store, random_events(random.Random(1)))
+    stored = LearnerState.from_dict(store.load("ana"))
+    stored.score += 2
+    store.save_many({"ana": (dump_document(state.to_dict()), dump_document(stored.to_dict()))})
+    report = scoring.audit(store, "ana")
+    assert report["stored"]["score"] == report["replayed"]["score"] + 2
+
+
+def test_cli_exits_non_zero_on_a_mismatch(tmp_path):
+    path = str(tmp_path / "progress.db")
+    store = SQLiteProgressStore(path)
+    state = play_and_save(store, random_events(random.Random(2)))
+    store.close()
+    with pytest.raises(SystemExit) as exit_info:
+        scoring.main(["ana", "--db", path])
+    assert exit_info.value.code == 0
+
+    store = SQLiteProgressStore(path)
+    state.score += 5
+    store.save_many({"ana": (None, dump_document(state.to_dict()))})
+    store.close()
+    with pytest.raises(SystemExit) as exit_info:
+        scoring.main(["ana", "--db", path])
+    assert exit_info.value.code == 1